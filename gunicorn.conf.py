@@ -0,0 +1,48 @@
+# gunicorn.conf.py
+"""
+Профиль развертывания gunicorn + uvicorn (ASGI).
+
+gunicorn читает этот файл из текущего каталога сам. По умолчанию воркеры
+синхронные, и прежняя команда запуска работает без изменений:
+    gunicorn transagency.wsgi:application
+
+ASGI включается классом воркера (приложение — transagency.asgi, не wsgi):
+    GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker gunicorn transagency.asgi:application
+
+Асинхронные представления (create_application) под ASGI не занимают поток
+на время запросов к БД и отправки в Telegram, поэтому всплески заявок
+выдерживают несколько воркеров вместо десятков синхронных.
+Синхронные представления Django выполняет в пуле потоков воркера.
+
+Без gunicorn (один процесс, например для отладки):
+    SERVER_MODE=asgi uvicorn transagency.asgi:application --host 0.0.0.0 --port 8000 --lifespan off
+
+Параметры переопределяются переменными окружения (WEB_CONCURRENCY,
+GUNICORN_WORKER_CLASS, GUNICORN_TIMEOUT, GUNICORN_MAX_REQUESTS) или ключами
+командной строки gunicorn.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# По умолчанию по воркеру на ядро, но не меньше двух
+workers = int(os.getenv('WEB_CONCURRENCY', max(2, os.cpu_count() or 1)))
+# uvicorn_worker.UvicornWorker обслуживает только ASGI-приложение (transagency.asgi)
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+# Настройки, зависящие от режима (DB_CONN_MAX_AGE), — см. SERVER_MODE в settings.py
+raw_env = ['SERVER_MODE=asgi'] if 'uvicorn' in worker_class.lower() else []
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = 20
+keepalive = 5
+
+# Периодический перезапуск воркеров ограничивает рост памяти; jitter — чтобы не все сразу
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = max_requests // 10
+
+# Приложение загружается в каждом воркере: соединения с БД, httpx.AsyncClient
+# и счетчики main/metrics.py не должны наследоваться от мастер-процесса
+preload_app = False
+
+accesslog = '-'
+errorlog = '-'
@@ -1,5 +1,15 @@
-from django.contrib import admin
-from .models import News, NewsImage, Application, Document, CompanyRequisites
+from django.contrib import admin, messages
+from django.core.exceptions import ValidationError
+from django.db.models import F
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from .exports import export_response
+from .forms import TariffImportForm
+from .models import News, NewsImage, Application, Document, CompanyRequisites, TelegramNotification, Tariff
+from .search import ordered_by_ids, search_news_ids
+from .spreadsheets import read_spreadsheet
+from .tariffs import import_tariffs
 
 class NewsImageInline(admin.TabularInline):
     model = NewsImage
@@ -9,14 +19,38 @@ class NewsImageInline(admin.TabularInline):
 class NewsAdmin(admin.ModelAdmin):
     inlines = [NewsImageInline]
     list_display = ('title', 'author', 'created_at')
+    readonly_fields = ('cover',)
     search_fields = ('title', 'content')
     list_filter = ('created_at',)
 
+    def get_search_results(self, request, queryset, search_term):
+        # Полнотекстовый индекс вместо icontains по HTML-тексту
+        if not search_term:
+            return queryset, False
+        return ordered_by_ids(queryset, search_news_ids(search_term)), False
+
 @admin.register(NewsImage)
 class NewsImageAdmin(admin.ModelAdmin):
     list_display = ('news', 'image', 'uploaded_at')
     list_filter = ('news',)
 
+def status_action(status, label):
+    """Действие админки: один UPDATE статуса для выбранных заявок (с увеличением версии)."""
+    def action(modeladmin, request, queryset):
+        updated = queryset.update(status=status, version=F('version') + 1)
+        modeladmin.message_user(request, f"Статус «{label}» установлен для заявок: {updated}")
+    action.__name__ = f'set_status_{status}'
+    action.short_description = f"Установить статус «{label}»"
+    return action
+
+def export_action(export_format):
+    """Действие админки: потоковая выгрузка выбранных заявок."""
+    def action(modeladmin, request, queryset):
+        return export_response(queryset.order_by('-created_at', '-pk'), export_format)
+    action.__name__ = f'export_{export_format}'
+    action.short_description = f"Выгрузить в {export_format.upper()}"
+    return action
+
 @admin.register(Application)
 class ApplicationAdmin(admin.ModelAdmin):
     list_display = ('name', 'email', 'phone', 'get_service_display', 'created_at', 'status')
@@ -24,10 +58,16 @@ class ApplicationAdmin(admin.ModelAdmin):
     list_editable = ('status',)
     search_fields = ('name', 'email', 'phone')
     date_hierarchy = 'created_at'
+    actions = [status_action(value, label) for value, label in Application.STATUS_CHOICES] + [
+        export_action('csv'), export_action('xlsx'),
+    ]
 
-    def mark_as_processed(self, request, queryset):
-        queryset.update(is_processed=True)
-    mark_as_processed.short_description = "Пометить как обработанные"
+@admin.register(TelegramNotification)
+class TelegramNotificationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'application', 'status', 'attempts', 'created_at', 'sent_at', 'next_attempt_at')
+    list_filter = ('status',)
+    readonly_fields = ('created_at', 'sent_at')
+    raw_id_fields = ('application',)
 
 @admin.register(Document)
 class DocumentAdmin(admin.ModelAdmin):
@@ -38,3 +78,44 @@ class CompanyRequisitesAdmin(admin.ModelAdmin):
     list_display = ('short_name', 'inn', 'ogrn')
     search_fields = ('short_name', 'inn', 'ogrn')
 
+
+@admin.register(Tariff)
+class TariffAdmin(admin.ModelAdmin):
+    list_display = ('service', 'container_type', 'loaded', 'base_price', 'unit', 'unit_price', 'min_price', 'updated_at')
+    list_filter = ('service', 'container_type', 'loaded', 'unit')
+    list_editable = ('base_price', 'unit', 'unit_price', 'min_price')
+    change_list_template = 'admin/main/tariff/change_list.html'
+
+    def get_urls(self):
+        urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='main_tariff_import'),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        """Загрузка тарифов таблицей CSV/XLSX."""
+        if not self.has_change_permission(request) or not self.has_add_permission(request):
+            return redirect('admin:main_tariff_changelist')
+
+        errors = []
+        form = TariffImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                count, errors = import_tariffs(read_spreadsheet(upload, upload.name), form.cleaned_data['replace'])
+            except ValidationError as e:
+                errors = e.messages
+            except (UnicodeDecodeError, ValueError) as e:
+                errors = [f'Не удалось прочитать файл: {e}']
+            if not errors:
+                self.message_user(request, f"Загружено тарифов: {count}", messages.SUCCESS)
+                return redirect('admin:main_tariff_changelist')
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Загрузка тарифов',
+            'form': form,
+            'errors': errors,
+        }
+        return TemplateResponse(request, 'admin/main/tariff/import.html', context)
@@ -0,0 +1,186 @@
+# main/application_import.py
+"""
+Импорт заявок из таблиц CSV/XLSX (лиды с сайтов партнеров и выставок).
+
+Файл читается построчно (main/spreadsheets.py). Каждая строка проверяется
+правилами полей модели Application — без ModelForm, которая на сотнях тысяч
+строк заметно медленнее, — и корректные заявки сохраняются через
+bulk_create пачками по APPLICATION_IMPORT_BATCH_SIZE, каждая пачка в своей
+транзакции. Отклоненные строки вместе с причиной пишутся в CSV-файл ошибок.
+
+Уведомление в Telegram одно на весь импорт (notifications.enqueue_import_notification).
+
+Используется командой manage.py import_applications и представлением application_import.
+"""
+import csv
+import logging
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Application
+from .notifications import enqueue_import_notification
+from .spreadsheets import choice_code, header_columns, is_blank_row
+
+logger = logging.getLogger(__name__)
+
+# Столбцы таблицы (заголовок — имя поля или его verbose_name); status необязателен
+IMPORT_FIELDS = ('name', 'email', 'phone', 'service', 'status')
+REQUIRED_FIELDS = ('name', 'email', 'phone', 'service')
+
+# Имя файла ошибок в APPLICATION_IMPORT_ERRORS_DIR
+ERRORS_FILE_SUFFIX = '.errors.csv'
+
+
+@dataclass
+class ImportResult:
+    """Итог импорта."""
+    source: str
+    total: int = 0
+    created: int = 0
+    failed: int = 0
+    errors_path: Optional[Path] = None
+    header_errors: List[str] = field(default_factory=list)
+
+    @property
+    def errors_token(self) -> Optional[str]:
+        """Имя файла ошибок для ссылки на скачивание (errors_file_path)."""
+        return self.errors_path.name[:-len(ERRORS_FILE_SUFFIX)] if self.errors_path else None
+
+
+class _ErrorWriter:
+    """CSV с отклоненными строками: номер строки, причина и исходные значения. Файл создается при первой ошибке."""
+
+    def __init__(self, path: Path, header: list):
+        self.path = path
+        self.header = header
+        self._file = None
+        self._writer = None
+
+    def write(self, line_number: int, errors: List[str], row: list) -> None:
+        if self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'w', encoding='utf-8-sig', newline='')
+            self._writer = csv.writer(self._file, delimiter=';')
+            self._writer.writerow(['Строка', 'Ошибка', *self.header])
+        self._writer.writerow([line_number, '; '.join(errors), *row])
+
+    def close(self) -> Optional[Path]:
+        if self._file is None:
+            return None
+        self._file.close()
+        return self.path
+
+
+def application_from_row(values: dict) -> Application:
+    """
+    Заявка из строки таблицы: значения проверяются правилами полей модели
+    (длина, формат email, допустимые услуги и статусы).
+
+    Raises:
+        ValidationError: Ошибки по полям (message_dict)
+    """
+    errors = {}
+    cleaned = {}
+    for name in IMPORT_FIELDS:
+        model_field = Application._meta.get_field(name)
+        value = str(values.get(name, '')).strip()
+        if name == 'status' and not value:
+            continue
+        try:
+            if model_field.choices and value:
+                try:
+                    value = choice_code(value, model_field.choices, model_field.verbose_name)
+                except ValidationError:
+                    # Неизвестное значение отклонит проверка choices в clean()
+                    pass
+            cleaned[name] = model_field.clean(value, None)
+        except ValidationError as e:
+            errors[name] = e.messages
+    if errors:
+        raise ValidationError(errors)
+    return Application(**cleaned)
+
+
+def _save_batch(batch: List[Application]) -> None:
+    with transaction.atomic():
+        Application.objects.bulk_create(batch)
+
+
+def import_applications(rows: Iterable[list], source: str, batch_size: Optional[int] = None,
+                        dry_run: bool = False, notify: bool = True) -> ImportResult:
+    """
+    Импортирует заявки из строк таблицы (первая строка — заголовки).
+
+    Args:
+        rows: Строки таблицы (spreadsheets.read_spreadsheet)
+        source: Имя исходного файла — для файла ошибок, логов и уведомления
+        batch_size: Размер пачки bulk_create (по умолчанию APPLICATION_IMPORT_BATCH_SIZE)
+        dry_run: Только проверить строки, ничего не сохраняя
+        notify: Поставить в очередь сводное уведомление
+
+    Returns:
+        ImportResult: Счетчики и путь к файлу ошибок (None, если ошибок нет)
+    """
+    batch_size = batch_size or settings.APPLICATION_IMPORT_BATCH_SIZE
+    result = ImportResult(source=source)
+    rows = iter(rows)
+    header = next(rows, None)
+    if not header:
+        result.header_errors.append('Таблица пуста')
+        return result
+    columns = header_columns(header, Application, IMPORT_FIELDS)
+    missing = [name for name in REQUIRED_FIELDS if name not in columns]
+    if missing:
+        result.header_errors.append(f'Нет обязательных столбцов: {", ".join(missing)}')
+        return result
+
+    errors_dir = Path(settings.APPLICATION_IMPORT_ERRORS_DIR)
+    error_writer = _ErrorWriter(errors_dir / f'{uuid.uuid4().hex}{ERRORS_FILE_SUFFIX}', list(header))
+    batch = []
+    try:
+        for line_number, row in enumerate(rows, start=2):
+            if is_blank_row(row):
+                continue
+            result.total += 1
+            values = {column: value for column, value in zip(columns, row) if column}
+            try:
+                batch.append(application_from_row(values))
+            except ValidationError as e:
+                result.failed += 1
+                error_writer.write(line_number, [
+                    f'{Application._meta.get_field(name).verbose_name}: {" ".join(messages)}'
+                    for name, messages in e.message_dict.items()
+                ], row)
+                continue
+            if len(batch) >= batch_size:
+                if not dry_run:
+                    _save_batch(batch)
+                result.created += len(batch)
+                batch = []
+        if batch:
+            if not dry_run:
+                _save_batch(batch)
+            result.created += len(batch)
+    finally:
+        result.errors_path = error_writer.close()
+
+    logger.info(f"Импорт заявок из {source}: загружено {result.created}, отклонено {result.failed}")
+    if notify and not dry_run and result.total:
+        enqueue_import_notification(result.created, result.failed, source)
+    return result
+
+
+def errors_file_path(token: str) -> Optional[Path]:
+    """Файл ошибок импорта по его имени без суффикса (None, если имя некорректно или файла нет)."""
+    try:
+        token = uuid.UUID(hex=token).hex
+    except ValueError:
+        return None
+    path = Path(settings.APPLICATION_IMPORT_ERRORS_DIR) / f'{token}{ERRORS_FILE_SUFFIX}'
+    return path if path.is_file() else None
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class MainConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'main'
+
+    def ready(self):
+        # Регистрация обработчиков сигналов
+        from . import blobs, http_cache, image_variants, metrics, page_cache, requisites_cache, requisites_pdf, search, tariffs  # noqa: F401
+
+        metrics.install_template_timers()
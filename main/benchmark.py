@@ -0,0 +1,362 @@
+# main/benchmark.py
+"""
+Нагрузочный замер всех URL приложения (manage.py bench).
+
+• seed_dataset() заполняет пустую БД синтетическими данными через bulk_create:
+  пользователи с профилями, новости с изображениями, заявки по пользователям,
+  статусам и услугам за последний год, тарифы. Генератор случайных чисел
+  с фиксированным seed — одинаковые параметры дают одинаковые данные.
+• build_cases() строит по одному сценарию на каждый маршрут main/urls.py
+  (GET, для части маршрутов — еще и POST) для анонима, пользователя и суперпользователя.
+• run_case() повторяет сценарий через тестовый клиент и считает p50/p95/p99,
+  SQL-запросы на запрос и размер ответа.
+• compare_reports() сравнивает отчет с сохраненным базовым.
+"""
+import json
+import random
+import statistics
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import BytesIO
+from typing import Callable, Dict, Iterator, List, Optional
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.db import connections, models
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from .models import Application, CompanyRequisites, News, NewsImage, Tariff, UserProfile
+from .news_text import news_text_fields
+from .search import index_news
+from .urls import urlpatterns
+
+BENCH_PASSWORD = 'bench-password'
+SEED_BATCH_SIZE = 5000
+
+WORDS = (
+    'контейнер терминал доставка станция груз вагон экспорт хранение погрузка выгрузка '
+    'документы страхование маршрут тариф клиент склад перевозка Казань Москва порт'
+).split()
+
+AUDIENCES = ('anonymous', 'user', 'admin')
+
+
+# -------------------------------------------------------------------
+# Синтетические данные
+# -------------------------------------------------------------------
+@dataclass
+class DatasetSize:
+    users: int
+    news: int
+    images_per_news: int
+    applications: int
+
+    @classmethod
+    def for_scale(cls, scale: float) -> 'DatasetSize':
+        """Объем при scale=1: 2 000 пользователей, 2 000 новостей по 3 изображения, 200 000 заявок."""
+        return cls(
+            users=max(2, int(2000 * scale)),
+            news=max(10, int(2000 * scale)),
+            images_per_news=3,
+            applications=max(100, int(200000 * scale)),
+        )
+
+
+@contextmanager
+def explicit_timestamps(*fields) -> Iterator[None]:
+    """Временно отключает auto_now_add, чтобы bulk_create сохранил заданные даты."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _image_bytes(color) -> bytes:
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new('RGB', (1200, 800), color).save(buffer, 'JPEG', quality=80)
+    return buffer.getvalue()
+
+
+def seed_dataset(size: DatasetSize, seed: int = 0, log: Callable[[str], None] = lambda message: None) -> dict:
+    """
+    Заполняет БД синтетическими данными.
+
+    Returns:
+        dict: Количество созданных объектов по моделям
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    # Пользователи: один хэш пароля на всех — make_password на каждого занял бы минуты
+    password = make_password(BENCH_PASSWORD)
+    users = [User(username=f'bench_user_{i}', email=f'user{i}@bench.local', password=password)
+             for i in range(size.users)]
+    users.append(User(username='bench_admin', email='admin@bench.local', password=password,
+                      is_staff=True, is_superuser=True))
+    User.objects.bulk_create(users, batch_size=SEED_BATCH_SIZE)
+    user_ids = list(User.objects.filter(username__startswith='bench_').values_list('pk', flat=True))
+    # bulk_create не отправляет post_save — профили создаем сами
+    UserProfile.objects.bulk_create(
+        [UserProfile(user_id=pk, phone=f'+7900{pk:07d}') for pk in user_ids], batch_size=SEED_BATCH_SIZE
+    )
+    log(f'Пользователи: {len(user_ids)}')
+
+    # Новости: производные поля и поисковый индекс обычно заполняет save()/сигналы
+    news_list = []
+    for i in range(size.news):
+        short_description = f'<p>{_sentence(rng, 25)}</p>'
+        content = ''.join(f'<p>{_sentence(rng, 60)}</p>' for _ in range(5))
+        news = News(
+            title=_sentence(rng, 6), short_description=short_description, content=content,
+            author_id=rng.choice(user_ids), created_at=now - timedelta(minutes=i * 37),
+            **news_text_fields(short_description, content),
+        )
+        news_list.append(news)
+    with explicit_timestamps(News._meta.get_field('created_at')):
+        News.objects.bulk_create(news_list, batch_size=SEED_BATCH_SIZE)
+    news_ids = list(News.objects.values_list('pk', flat=True))
+    for news in News.objects.only('id', 'title', 'short_description', 'content_text').iterator(chunk_size=1000):
+        index_news(news)
+    log(f'Новости: {len(news_ids)}')
+
+    # Изображения: несколько файлов на все записи (хранилище контент-адресное — на диске по одному)
+    storage = NewsImage._meta.get_field('image').storage
+    image_names = [
+        storage.save(f'news_images/bench_{i}.jpg', ContentFile(_image_bytes(color)))
+        for i, color in enumerate(((32, 96, 160), (160, 96, 32), (32, 160, 96)))
+    ]
+    images = [NewsImage(news_id=news_id, image=image_names[j % len(image_names)])
+              for news_id in news_ids for j in range(size.images_per_news)]
+    NewsImage.objects.bulk_create(images, batch_size=SEED_BATCH_SIZE)
+    first_image = NewsImage.objects.filter(news_id=models.OuterRef('pk')).order_by('pk').values('pk')[:1]
+    News.objects.update(cover=models.Subquery(first_image))
+    log(f'Изображения: {len(images)}')
+
+    # Заявки: треть анонимных, остальные по пользователям; даты за последний год
+    services = [code for code, _ in Application.SERVICE_CHOICES]
+    statuses = [code for code, _ in Application.STATUS_CHOICES]
+    created = 0
+    with explicit_timestamps(Application._meta.get_field('created_at')):
+        while created < size.applications:
+            batch = []
+            for i in range(created, min(created + SEED_BATCH_SIZE, size.applications)):
+                batch.append(Application(
+                    name=f'Клиент {i}', email=f'client{i}@bench.local', phone=f'+7901{i:07d}',
+                    service=rng.choice(services), status=rng.choice(statuses),
+                    user_id=rng.choice(user_ids) if rng.random() > 0.33 else None,
+                    created_at=now - timedelta(seconds=rng.randrange(365 * 24 * 3600)),
+                ))
+            Application.objects.bulk_create(batch)
+            created += len(batch)
+    log(f'Заявки: {created}')
+
+    tariffs = [
+        Tariff(service=service, container_type=container_type, loaded=loaded,
+               base_price=rng.randrange(1000, 20000), unit=rng.choice(Tariff.UNIT_CHOICES)[0],
+               unit_price=rng.randrange(1, 500), min_price=rng.randrange(0, 5000))
+        for service in services
+        for container_type, _ in Tariff.CONTAINER_TYPES
+        for loaded in (True, False)
+    ]
+    Tariff.objects.bulk_create(tariffs)
+    CompanyRequisites.objects.create()
+
+    return {
+        'users': len(user_ids), 'news': len(news_ids), 'news_images': len(images),
+        'applications': created, 'tariffs': len(tariffs),
+    }
+
+
+# -------------------------------------------------------------------
+# Сценарии
+# -------------------------------------------------------------------
+@dataclass
+class Case:
+    name: str
+    audience: str
+    method: str
+    path: str = ''
+    data: object = None
+    content_type: Optional[str] = None
+    headers: Optional[dict] = None
+    # Вызывается перед каждым повтором (вне замера) и возвращает путь — для разрушающих запросов
+    setup: Optional[Callable[[], str]] = None
+
+    @property
+    def key(self) -> str:
+        return f'{self.name} {self.audience} {self.method}'
+
+
+def _sample(queryset) -> Optional[int]:
+    return queryset.order_by('pk').values_list('pk', flat=True).first()
+
+
+# Удаляемые объекты датируются прошлым: у аудиторий без прав они остаются в БД
+# и не должны вытеснять данные с первых страниц списков следующих сценариев
+THROWAWAY_DATE = datetime(2000, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _throwaway_news() -> str:
+    news = News.objects.create(title='Удаляемая новость', short_description='<p>x</p>', content='<p>x</p>',
+                               author=User.objects.get(username='bench_admin'))
+    News.objects.filter(pk=news.pk).update(created_at=THROWAWAY_DATE)
+    return reverse('delete_news', args=[news.pk])
+
+
+def _throwaway_application() -> str:
+    application = Application.objects.create(name='Удаляемая', email='x@bench.local', phone='+7900', service='shipping_docs')
+    Application.objects.filter(pk=application.pk).update(created_at=THROWAWAY_DATE)
+    return reverse('delete_application', args=[application.pk])
+
+
+def build_cases(quote_lines: int = 100) -> List[Case]:
+    """Сценарии для всех маршрутов main/urls.py и всех групп пользователей."""
+    bench_user = User.objects.get(username='bench_user_0')
+    news_pk = _sample(News.objects.all())
+    application_pk = _sample(Application.objects.all())
+    own_application_pk = _sample(Application.objects.filter(user=bench_user)) or application_pk
+    kwargs_by_name = {
+        'news_detail': {'pk': news_pk},
+        'edit_news': {'pk': news_pk},
+        'update_application': {'pk': application_pk},
+        'update_application_status': {'pk': application_pk},
+        'update_my_application': {'pk': own_application_pk},
+        'application_import_errors': {'token': uuid.uuid4().hex},
+    }
+    query_by_name = {
+        'news_search': '?q=контейнер доставка',
+        # Выгрузка — узкий фильтр: полная занимает секунды и мерится отдельно
+        'export_applications': f'?format=csv&user={bench_user.username}',
+    }
+    setup_by_name = {
+        'delete_news': _throwaway_news,
+        'delete_application': _throwaway_application,
+    }
+
+    services = [code for code, _ in Application.SERVICE_CHOICES]
+    containers = [code for code, _ in Tariff.CONTAINER_TYPES]
+    quote_body = json.dumps([
+        {'service': services[i % len(services)], 'container_type': containers[i % len(containers)],
+         'loaded': i % 2 == 0, 'quantity': 1 + i % 3, 'units': i % 30}
+        for i in range(quote_lines)
+    ])
+    application_data = {'name': 'Bench', 'email': 'bench@bench.local', 'phone': '+79000000000',
+                        'service': 'container_storage'}
+
+    cases = []
+    for audience in AUDIENCES:
+        for pattern in urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            name = pattern.name
+            setup = setup_by_name.get(name)
+            path = '' if setup else reverse(name, kwargs=kwargs_by_name.get(name)) + query_by_name.get(name, '')
+            cases.append(Case(name, audience, 'GET', path, setup=setup))
+        cases.append(Case('calculate_quote', audience, 'POST', reverse('calculate_quote'),
+                          data=quote_body, content_type='application/json'))
+        cases.append(Case('application', audience, 'POST', reverse('application'), data=application_data))
+    return cases
+
+
+def make_client(audience: str, host: str) -> Client:
+    # Ошибка представления (например, без системных библиотек WeasyPrint) попадает в отчет
+    # статусом 500, а не прерывает весь прогон
+    client = Client(HTTP_HOST=host, secure=True, raise_request_exception=False)
+    if audience == 'user':
+        client.force_login(User.objects.get(username='bench_user_0'))
+    elif audience == 'admin':
+        client.force_login(User.objects.get(username='bench_admin'))
+    return client
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_case(client: Client, case: Case, iterations: int, warmup: int = 1) -> dict:
+    """
+    Повторяет сценарий iterations раз (плюс warmup прогревочных).
+
+    Returns:
+        dict: status, p50_ms, p95_ms, p99_ms, queries (медиана), bytes (медиана)
+    """
+    timings, queries, sizes = [], [], []
+    status = None
+    for i in range(warmup + iterations):
+        path = case.setup() if case.setup else case.path
+        kwargs = {'headers': case.headers} if case.headers else {}
+        if case.content_type:
+            kwargs['content_type'] = case.content_type
+        # Запросы считаются по всем БД (с репликой часть чтений идет на нее)
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+            started = time.perf_counter()
+            if case.method == 'POST':
+                response = client.post(path, case.data, **kwargs)
+            else:
+                response = client.get(path, **kwargs)
+            size = (sum(len(chunk) for chunk in response.streaming_content)
+                    if response.streaming else len(response.content))
+            elapsed = (time.perf_counter() - started) * 1000
+        if i < warmup:
+            continue
+        status = response.status_code
+        timings.append(elapsed)
+        queries.append(sum(len(context) for context in captured))
+        sizes.append(size)
+
+    timings.sort()
+    return {
+        'status': status,
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(_percentile(timings, 95), 3),
+        'p99_ms': round(_percentile(timings, 99), 3),
+        'queries': int(statistics.median(queries)),
+        'bytes': int(statistics.median(sizes)),
+    }
+
+
+# -------------------------------------------------------------------
+# Сравнение с базовым отчетом
+# -------------------------------------------------------------------
+def compare_reports(baseline: dict, current: dict, threshold: float, min_delta_ms: float) -> List[str]:
+    """
+    Регрессии относительно базового отчета.
+
+    Регрессия: p95 вырос больше чем на threshold (доля) и на min_delta_ms,
+    выросло число SQL-запросов, размер ответа вырос больше чем на threshold
+    или изменился код ответа.
+    """
+    regressions = []
+    base_results: Dict[str, dict] = baseline.get('results', {})
+    for key, result in current['results'].items():
+        base = base_results.get(key)
+        if base is None:
+            continue
+        if result['status'] != base['status']:
+            regressions.append(f'{key}: код ответа {base["status"]} → {result["status"]}')
+        p95, base_p95 = result['p95_ms'], base['p95_ms']
+        if p95 > base_p95 * (1 + threshold) and p95 - base_p95 > min_delta_ms:
+            regressions.append(f'{key}: p95 {base_p95:.1f} → {p95:.1f} мс')
+        if result['queries'] > base['queries']:
+            regressions.append(f'{key}: SQL-запросов {base["queries"]} → {result["queries"]}')
+        if result['bytes'] > base['bytes'] * (1 + threshold):
+            regressions.append(f'{key}: размер ответа {base["bytes"]} → {result["bytes"]} байт')
+    return regressions
@@ -0,0 +1,100 @@
+# main/blobs.py
+"""
+Подсчет ссылок на blob'ы контент-адресного хранилища.
+
+Один файл может использоваться несколькими записями NewsImage/Document,
+поэтому удалять его можно только когда на него не ссылается ни одна строка.
+Счетчик ссылок вычисляется запросом к полям из CONTENT_ADDRESSED_FIELDS,
+что исключает расхождение между счетчиком и данными.
+
+Загрузка того же содержимого могла переиспользовать blob, но еще не
+зафиксировать свою строку — ее ссылку подсчет не видит. Поэтому blob,
+записанный или переиспользованный за последние MEDIA_BLOB_RELEASE_GRACE
+секунд, не удаляется: если ссылок на него так и не появится, его удалит
+manage.py dedupe_media --delete-orphans.
+"""
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Document, NewsImage, NewsImageVariant
+
+logger = logging.getLogger(__name__)
+
+# Поля моделей, файлы которых хранятся в контент-адресном хранилище
+CONTENT_ADDRESSED_FIELDS = [
+    ('main.NewsImage', 'image'),
+    ('main.Document', 'file'),
+    ('main.NewsImageVariant', 'file'),
+]
+
+
+def count_references(name: str) -> int:
+    """
+    Считает строки БД, ссылающиеся на файл.
+
+    Args:
+        name: Имя файла в хранилище
+
+    Returns:
+        int: Количество ссылок
+    """
+    total = 0
+    for model_label, field_name in CONTENT_ADDRESSED_FIELDS:
+        model = apps.get_model(model_label)
+        total += model._default_manager.filter(**{field_name: name}).count()
+    return total
+
+
+def release_blob(storage, name: str) -> bool:
+    """
+    Удаляет файл из хранилища, если на него больше нет ссылок.
+
+    Returns:
+        bool: True, если файл удален
+    """
+    if not name or not storage.exists(name):
+        return False
+    # Под той же блокировкой ContentAddressedStorage._save решает, переиспользовать ли blob
+    with storage.lock(name):
+        if count_references(name):
+            return False
+        if storage.stored_within(name, settings.MEDIA_BLOB_RELEASE_GRACE):
+            logger.info(f"Media blob {name} was stored recently, left for dedupe_media --delete-orphans")
+            return False
+        storage.delete(name)
+    logger.info(f"Unreferenced media blob deleted: {name}")
+    return True
+
+
+def _release_on_commit(field_file) -> None:
+    storage, name = field_file.storage, field_file.name
+    transaction.on_commit(lambda: release_blob(storage, name))
+
+
+@receiver(post_delete, sender=NewsImage)
+@receiver(post_delete, sender=Document)
+@receiver(post_delete, sender=NewsImageVariant)
+def release_deleted_blob(sender, instance, **kwargs):
+    """После удаления записи освобождаем ее файл."""
+    field_name = dict(CONTENT_ADDRESSED_FIELDS)[sender._meta.label]
+    _release_on_commit(getattr(instance, field_name))
+
+
+@receiver(pre_save, sender=NewsImage)
+@receiver(pre_save, sender=Document)
+@receiver(pre_save, sender=NewsImageVariant)
+def release_replaced_blob(sender, instance, **kwargs):
+    """При замене файла в существующей записи освобождаем прежний файл."""
+    if instance._state.adding or not instance.pk:
+        return
+    field_name = dict(CONTENT_ADDRESSED_FIELDS)[sender._meta.label]
+    old_name = sender._default_manager.filter(pk=instance.pk).values_list(field_name, flat=True).first()
+    new_file = getattr(instance, field_name)
+    if old_name and old_name != new_file.name:
+        storage = new_file.storage
+        transaction.on_commit(lambda: release_blob(storage, old_name))
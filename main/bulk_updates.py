@@ -0,0 +1,94 @@
+# main/bulk_updates.py
+"""
+Пакетное изменение заявок (статус и поля) из списка заявок.
+
+Вся пачка применяется в одной транзакции двумя запросами: SELECT ... FOR UPDATE
+по всем id и один bulk_update. Конфликты определяются оптимистично по
+Application.version: если заявку успели изменить после того, как менеджер
+открыл список, строка не применяется и возвращается ее текущее состояние.
+"""
+from typing import Dict, List
+
+from django.db import transaction
+
+from .forms import ApplicationBulkItemForm
+from .models import Application
+
+# Сколько строк писать одним UPDATE
+BULK_UPDATE_BATCH_SIZE = 500
+
+
+def application_state(application: Application) -> dict:
+    """Текущее состояние заявки для обновления строки таблицы."""
+    return {
+        'id': application.pk,
+        'version': application.version,
+        'status': application.status,
+        'status_display': application.get_status_display(),
+        'status_color': application.get_status_color(),
+        'fields': {
+            'name': application.name,
+            'email': application.email,
+            'phone': application.phone,
+            'service': application.service,
+            'service_display': application.get_service_display(),
+        },
+    }
+
+
+def apply_application_changes(items: List[dict]) -> List[dict]:
+    """
+    Применяет пачку изменений заявок.
+
+    Args:
+        items: Строки вида {id, version, status?, name?, email?, phone?, service?}
+
+    Returns:
+        list[dict]: Результат для каждой строки в исходном порядке: success и
+            текущее состояние заявки, либо errors / error (conflict=True при
+            несовпадении версии)
+    """
+    results: Dict[int, dict] = {}
+    valid = []
+    seen = set()
+    for position, item in enumerate(items):
+        form = ApplicationBulkItemForm(item if isinstance(item, dict) else {})
+        if not form.is_valid():
+            results[position] = {'id': item.get('id') if isinstance(item, dict) else None,
+                                 'success': False, 'errors': form.errors}
+        elif form.cleaned_data['id'] in seen:
+            results[position] = {'id': form.cleaned_data['id'], 'success': False,
+                                 'error': 'Заявка повторяется в пакете'}
+        else:
+            seen.add(form.cleaned_data['id'])
+            valid.append((position, form))
+
+    if valid:
+        fields = sorted(set().union(*(form.changes() for _, form in valid)))
+        with transaction.atomic():
+            current = (
+                Application.objects.select_for_update()
+                .only('id', 'version', 'name', 'email', 'phone', 'service', 'status')
+                .in_bulk([form.cleaned_data['id'] for _, form in valid])
+            )
+            changed = []
+            for position, form in valid:
+                application = current.get(form.cleaned_data['id'])
+                if application is None:
+                    results[position] = {'id': form.cleaned_data['id'], 'success': False,
+                                         'error': 'Заявка не найдена'}
+                    continue
+                if application.version != form.cleaned_data['version']:
+                    results[position] = {**application_state(application), 'success': False, 'conflict': True,
+                                         'error': 'Заявка уже изменена другим пользователем'}
+                    continue
+                for name, value in form.changes().items():
+                    setattr(application, name, value)
+                application.version += 1
+                changed.append(application)
+                results[position] = {**application_state(application), 'success': True}
+
+            if changed:
+                Application.objects.bulk_update(changed, [*fields, 'version'], batch_size=BULK_UPDATE_BATCH_SIZE)
+
+    return [results[position] for position in range(len(items))]
@@ -0,0 +1,129 @@
+# main/db_router.py
+"""
+Чтение публичных страниц с реплики БД.
+
+Если задан DATABASE_REPLICA_URL, в DATABASES появляется алиас 'replica', и
+запросы на чтение представлений из DATABASE_REPLICA_VIEWS (главная, новости,
+реквизиты) уходят на реплику. На основной БД остаются:
+    • все записи и чтения остальных представлений;
+    • запросы, кроме GET/HEAD, и все чтения после первой записи в запросе;
+    • запросы посетителя в течение DATABASE_REPLICA_PIN_SECONDS после его
+      записи (cookie), чтобы он видел свою заявку, профиль или вход сразу,
+      несмотря на отставание реплики;
+    • рендер страницы, которая попадет в кэш страниц (main/page_cache.py):
+      устаревшая копия жила бы в кэше до PAGE_CACHE_TIMEOUT.
+
+Локально реплику можно изобразить второй SQLite-базой — копией основной:
+    cp db.sqlite3 replica.sqlite3
+    DATABASE_REPLICA_URL=sqlite:///replica.sqlite3 python manage.py runserver
+Изменения основной базы в копию не попадают, поэтому видно, какие запросы
+читают с реплики.
+"""
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpRequest
+
+REPLICA_DB = 'replica'
+PIN_COOKIE_NAME = 'db_primary'
+READ_ONLY_METHODS = ('GET', 'HEAD')
+
+
+@dataclass
+class RoutingState:
+    """Состояние маршрутизации запроса (общее для потоков sync_to_async под ASGI)."""
+    request: HttpRequest
+    pinned: bool
+    wrote: bool = False
+
+
+_state: ContextVar[Optional[RoutingState]] = ContextVar('db_routing', default=None)
+
+
+class ReplicaRouter:
+    """Маршрутизатор БД: чтения публичных представлений — на реплику, остальное — на основную."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.pinned or state.wrote:
+            return None
+        match = state.request.resolver_match
+        if match is None or match.url_name not in settings.DATABASE_REPLICA_VIEWS:
+            return None
+        if getattr(state.request, '_page_cache_render', False):
+            return None
+        return REPLICA_DB
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На реплике те же данные, что и на основной БД
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схему реплики создает репликация основной БД
+        return False if db == REPLICA_DB else None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Передает маршрутизатору текущий запрос и закрепляет посетителя за основной БД
+    после записи. Должен стоять до SessionMiddleware, чтобы учитывать и запись сессии.
+    Без реплики отключается (MiddlewareNotUsed).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if REPLICA_DB not in settings.DATABASES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _begin(request: HttpRequest) -> RoutingState:
+        pinned = request.method not in READ_ONLY_METHODS or PIN_COOKIE_NAME in request.COOKIES
+        return RoutingState(request=request, pinned=pinned)
+
+    @staticmethod
+    def _finish(state: RoutingState, response):
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE_NAME, '1',
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = self._begin(request)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(state, response)
+
+    async def __acall__(self, request):
+        state = self._begin(request)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(state, response)
@@ -0,0 +1,211 @@
+# main/exports.py
+"""
+Потоковая выгрузка заявок в CSV и XLSX.
+
+Строки читаются из БД через values_list().iterator(chunk_size=...) и сразу
+отдаются клиенту StreamingHttpResponse: в памяти не бывает больше одной
+пачки, сколько бы заявок ни выгружалось. Подписи услуг и статусов берутся
+из заранее собранных словарей, а не из get_*_display() на каждую строку.
+
+XLSX пишется без openpyxl (его write_only-режим все равно собирает файл
+целиком): это zip-архив из нескольких XML-файлов, и лист с данными
+дописывается в архив по мере чтения строк.
+"""
+import csv
+import io
+import re
+import zipfile
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from xml.sax.saxutils import escape
+
+from .models import Application
+
+# (заголовок, поле для values_list)
+EXPORT_COLUMNS = [
+    ('ID', 'id'),
+    ('Дата создания', 'created_at'),
+    ('Имя', 'name'),
+    ('Email', 'email'),
+    ('Телефон', 'phone'),
+    ('Услуга', 'service'),
+    ('Статус', 'status'),
+    ('Пользователь', 'user__username'),
+]
+
+SERVICE_LABELS = dict(Application.SERVICE_CHOICES)
+STATUS_LABELS = dict(Application.STATUS_CHOICES)
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Сколько строк склеивать в один кусок ответа
+ROWS_PER_CHUNK = 500
+
+DATE_FORMAT = '%d.%m.%Y %H:%M'
+
+# Начала ячеек, с которых табличные редакторы разбирают формулу (CSV injection)
+_CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def export_rows(queryset) -> Iterator[tuple]:
+    """Строки выгрузки: значения колонок EXPORT_COLUMNS с подписями вместо кодов."""
+    fields = [field for _, field in EXPORT_COLUMNS]
+    rows = queryset.values_list(*fields).iterator(chunk_size=settings.APPLICATION_EXPORT_CHUNK_SIZE)
+    current_timezone = timezone.get_current_timezone()
+    for pk, created_at, name, email, phone, service, status, username in rows:
+        yield (
+            pk,
+            timezone.localtime(created_at, current_timezone).strftime(DATE_FORMAT),
+            name,
+            email,
+            phone,
+            SERVICE_LABELS.get(service, service),
+            STATUS_LABELS.get(status, status),
+            username or '',
+        )
+
+
+class _Echo:
+    """Файлоподобный объект для csv.writer: write() возвращает строку, а не пишет ее."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _csv_cell(value):
+    """
+    Текст, который Excel/LibreOffice приняли бы за формулу (=HYPERLINK(...) в имени
+    заявки), экранируется апострофом и открывается как обычная строка.
+    """
+    if isinstance(value, str) and value.startswith(_CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(rows: Iterable[tuple]) -> Iterator[bytes]:
+    """CSV с BOM (чтобы Excel распознал UTF-8) и разделителем «;»."""
+    writer = csv.writer(_Echo(), delimiter=';')
+    chunk = ['\ufeff', writer.writerow([header for header, _ in EXPORT_COLUMNS])]
+    for row in rows:
+        chunk.append(writer.writerow([_csv_cell(value) for value in row]))
+        if len(chunk) >= ROWS_PER_CHUNK:
+            yield ''.join(chunk).encode()
+            chunk = []
+    yield ''.join(chunk).encode()
+
+
+class _ZipBuffer(io.RawIOBase):
+    """Приемник для zipfile без seek(): записанное забирается через drain()."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+# Символы, недопустимые в XML 1.0 (могут попасть в текстовые поля заявки)
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Заявки" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_cell(value) -> str:
+    if isinstance(value, int):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_XML_ILLEGAL.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values) -> str:
+    return f'<row>{"".join(_xlsx_cell(value) for value in values)}</row>'
+
+
+def stream_xlsx(rows: Iterable[tuple]) -> Iterator[bytes]:
+    """XLSX с одним листом; строки пишутся в архив по мере поступления."""
+    buffer = _ZipBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        # Размер листа заранее неизвестен — zip64 на случай больших выгрузок
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'.encode()
+            )
+            sheet.write(_xlsx_row(header for header, _ in EXPORT_COLUMNS).encode())
+            chunk = []
+            for row in rows:
+                chunk.append(_xlsx_row(row))
+                if len(chunk) >= ROWS_PER_CHUNK:
+                    sheet.write(''.join(chunk).encode())
+                    chunk = []
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            sheet.write(''.join(chunk).encode())
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.drain()
+
+
+def export_response(queryset, export_format: str) -> StreamingHttpResponse:
+    """
+    Потоковый ответ с выгрузкой заявок.
+
+    Args:
+        queryset: Заявки (фильтры и сортировка уже применены)
+        export_format: 'csv' или 'xlsx'
+    """
+    stream = stream_xlsx if export_format == 'xlsx' else stream_csv
+    response = StreamingHttpResponse(stream(export_rows(queryset)), content_type=EXPORT_FORMATS[export_format])
+    filename = f'applications-{timezone.localdate():%Y-%m-%d}.{export_format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,43 @@
+# main/file_locks.py
+"""
+Межпроцессная блокировка на lock-файле.
+
+Lock-файл создается с O_EXCL (работает и без fcntl, в том числе на Windows)
+и удаляется при выходе. Файл, оставшийся от упавшего процесса, считается
+брошенным через stale_after секунд и удаляется.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def file_lock(path: str, stale_after: float, poll_interval: float = 0.05):
+    """
+    Захватывает блокировку path, ожидая ее освобождения другим процессом.
+
+    Args:
+        path: Путь к lock-файлу
+        stale_after: Через сколько секунд чужой lock-файл считается брошенным
+        poll_interval: Пауза между попытками, секунд
+    """
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > stale_after:
+                    os.remove(path)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(poll_interval)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -3,20 +3,9 @@ from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from django.utils.safestring import mark_safe
 from .models import Application, News, NewsImage, UserProfile  # Добавлен импорт UserProfile
-import bleach
-
-ALLOWED_TAGS = [
-    'p', 'br', 'strong', 'em', 'b', 'i', 'u', 's', 
-    'ul', 'ol', 'li', 'a', 'img', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
-    'blockquote', 'code', 'pre', 'hr', 'span', 'div'
-]
-
-ALLOWED_ATTRIBUTES = {
-    'a': ['href', 'title', 'target'],
-    'img': ['src', 'alt', 'width', 'height', 'style'],
-    '*': ['class', 'style']
-}
-
+from .news_text import sanitize_html
+from datetime import datetime, time, timedelta
+from django.utils import timezone
 
 class RegistrationForm(UserCreationForm):
     """Форма регистрации нового пользователя"""
@@ -131,6 +120,130 @@ class AdminApplicationForm(forms.ModelForm):
         }
 
 
+class ApplicationFilterForm(forms.Form):
+    """Фильтры и сортировка списка заявок (GET-параметры application_list)"""
+    SORT_CHOICES = [
+        ('newest', 'Сначала новые'),
+        ('oldest', 'Сначала старые'),
+    ]
+
+    status = forms.ChoiceField(
+        choices=[('', 'Все статусы')] + Application.STATUS_CHOICES,
+        required=False,
+        label='Статус',
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'})
+    )
+    service = forms.ChoiceField(
+        choices=[('', 'Все услуги')] + Application.SERVICE_CHOICES,
+        required=False,
+        label='Услуга',
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'})
+    )
+    date_from = forms.DateField(
+        required=False,
+        label='С даты',
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control form-control-sm'})
+    )
+    date_to = forms.DateField(
+        required=False,
+        label='По дату',
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control form-control-sm'})
+    )
+    user = forms.CharField(
+        required=False,
+        label='Пользователь',
+        widget=forms.TextInput(attrs={'placeholder': 'Логин', 'class': 'form-control form-control-sm'})
+    )
+    sort = forms.ChoiceField(
+        choices=SORT_CHOICES,
+        required=False,
+        label='Сортировка',
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'})
+    )
+
+    def filter_queryset(self, queryset):
+        """
+        Применяет фильтры к queryset заявок.
+        Каждый фильтр вместе с сортировкой по created_at покрывается составным индексом
+        (status, created_at), (service, created_at) или (user, created_at).
+        """
+        # Некорректные поля отбрасываются, остальные фильтры применяются
+        self.is_valid()
+        data = {name: self.cleaned_data.get(name) for name in self.fields}
+        if data['status']:
+            queryset = queryset.filter(status=data['status'])
+        if data['service']:
+            queryset = queryset.filter(service=data['service'])
+        if data['date_from']:
+            start = timezone.make_aware(datetime.combine(data['date_from'], time.min))
+            queryset = queryset.filter(created_at__gte=start)
+        if data['date_to']:
+            end = timezone.make_aware(datetime.combine(data['date_to'] + timedelta(days=1), time.min))
+            queryset = queryset.filter(created_at__lt=end)
+        if data['user']:
+            # Логин уникален: находим id и фильтруем по индексу (user, created_at)
+            user_id = User.objects.filter(username=data['user']).values_list('pk', flat=True).first()
+            queryset = queryset.filter(user_id=user_id) if user_id else queryset.none()
+        return queryset
+
+    @property
+    def descending(self) -> bool:
+        self.is_valid()
+        return self.cleaned_data.get('sort') != 'oldest'
+
+
+
+class ApplicationBulkItemForm(forms.Form):
+    """
+    Одна строка пакетного изменения заявок: {id, version, status?, name?, email?, phone?, service?}.
+    Изменяются только переданные поля; version — версия заявки, которую видел менеджер.
+    """
+    EDITABLE_FIELDS = ('status', 'name', 'email', 'phone', 'service')
+
+    id = forms.IntegerField(min_value=1)
+    version = forms.IntegerField(min_value=1)
+    status = forms.ChoiceField(choices=Application.STATUS_CHOICES, required=False)
+    name = forms.CharField(max_length=100, required=False)
+    email = forms.EmailField(required=False)
+    phone = forms.CharField(max_length=20, required=False)
+    service = forms.ChoiceField(choices=Application.SERVICE_CHOICES, required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        passed = [name for name in self.EDITABLE_FIELDS if name in self.data]
+        if not passed:
+            raise forms.ValidationError('Не передано ни одного изменяемого поля')
+        for name in passed:
+            if name in cleaned_data and not cleaned_data[name]:
+                self.add_error(name, 'Обязательное поле.')
+        return cleaned_data
+
+    def changes(self) -> dict:
+        """Переданные поля с очищенными значениями."""
+        return {name: self.cleaned_data[name] for name in self.EDITABLE_FIELDS if name in self.data}
+
+class TariffImportForm(forms.Form):
+    """Загрузка тарифов таблицей CSV/XLSX в админке (см. tariffs.import_tariffs)."""
+    file = forms.FileField(
+        label='Файл тарифов',
+        help_text='CSV (UTF-8, разделитель «;» или «,») или XLSX. Столбцы: service, container_type, '
+                  'loaded, base_price, unit, unit_price, min_price'
+    )
+    replace = forms.BooleanField(label='Удалить тарифы, которых нет в файле', required=False)
+
+class ApplicationImportForm(forms.Form):
+    """Загрузка заявок таблицей CSV/XLSX (см. application_import.import_applications)."""
+    file = forms.FileField(
+        label='Файл заявок',
+        help_text='CSV (UTF-8, разделитель «;» или «,») или XLSX. Столбцы: Имя, Email, Телефон, Услуга, '
+                  'Статус (необязательно) — или name, email, phone, service, status',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'})
+    )
+    dry_run = forms.BooleanField(
+        label='Только проверить, не сохраняя', required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+
 class NewsForm(forms.ModelForm):
     """Форма для создания и редактирования новостей с поддержкой множественных изображений"""
     images = MultipleFileField(
@@ -159,13 +272,7 @@ class NewsForm(forms.ModelForm):
         """Очистка HTML контента от потенциально опасных тегов"""
         content = self.cleaned_data.get('content')
         if content:
-            cleaned_content = bleach.clean(
-                content,
-                tags=ALLOWED_TAGS,
-                attributes=ALLOWED_ATTRIBUTES,
-                strip=True
-            )
-            return cleaned_content
+            return sanitize_html(content)
         return content
 
 class ProfileEditForm(forms.ModelForm):
@@ -0,0 +1,167 @@
+# main/http_cache.py
+"""
+Условные запросы и HTTP-кэширование страниц новостей.
+
+Декоратор conditional_page до вызова представления получает у валидатора
+время изменения страницы — один запрос по индексу (News.updated_at) — и
+сравнивает ETag/Last-Modified с If-None-Match/If-Modified-Since. Совпадение —
+ответ 304 без загрузки новости, рендера и обращения к кэшу страниц;
+повторные визиты и обходы поисковиков стоят одного запроса к БД.
+
+ETag учитывает, кроме времени изменения:
+    • реквизиты компании (подвал страницы);
+    • кому отдана страница: анонимным посетителям — общий вариант, вошедшему
+      пользователю — свой (в шапке его имя и ссылки по правам, в форме выхода —
+      CSRF-токен: после смены секрета, например при повторном входе, страница
+      со старым токеном не подтверждается ответом 304);
+    • HTTP_CACHE_VERSION — версию развертывания (шаблоны, статика).
+Удаление новости MAX(updated_at) не меняет, поэтому в ETag списка входит
+номер версии удалений (CacheVersion, увеличивается сигналом post_delete).
+Last-Modified — только время изменения: клиенты, присылающие лишь
+If-Modified-Since, удаления не заметят; браузеры и CDN присылают
+If-None-Match, и он проверяется первым.
+
+Cache-Control:
+    • анонимным — public: браузер хранит страницу HTTP_CACHE_MAX_AGE секунд,
+      общий кэш (CDN) — HTTP_CACHE_S_MAXAGE и еще HTTP_CACHE_STALE_WHILE_REVALIDATE
+      отдает устаревшую копию, перепроверяя ее в фоне. Vary: Cookie выставляет
+      SessionMiddleware, так что ответы посетителям с сессией не смешиваются;
+    • вошедшим — private, no-cache: хранит только браузер и перепроверяет
+      при каждом показе (дешево — см. выше);
+    • запросам с ожидающими flash-сообщениями — private, no-cache без
+      валидаторов: сообщения показываются один раз.
+"""
+import hashlib
+from calendar import timegm
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db import transaction
+from django.db.models import Max
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import News
+from .requisites_cache import get_company_requisites
+from .versioning import CacheVersion
+
+NEWS_DELETIONS_VERSION_KEY = 'main:news_deletions:version'
+
+_deletions_version = CacheVersion(NEWS_DELETIONS_VERSION_KEY, 'HTTP_CACHE_VERSION_TTL')
+
+# Валидатор страницы: (время изменения, дополнительная часть ETag) или None —
+# страницу нельзя проверить заранее (нет новости), представление отвечает как обычно
+Validator = Callable[..., Optional[tuple[datetime, str]]]
+
+
+def page_audience(request: HttpRequest) -> Optional[str]:
+    """
+    Для кого рендерится страница: 'public' — общий вариант для анонимных посетителей,
+    иначе вариант вошедшего пользователя; None — есть ожидающие flash-сообщения.
+    """
+    # len() не помечает сообщения прочитанными — они покажутся при рендере
+    if len(get_messages(request)):
+        return None
+    user = request.user
+    if not user.is_authenticated:
+        return 'public'
+    # CSRF-секрет, которым подписан токен формы выхода; get_token() создаст его
+    # (и cookie), если у посетителя секрета еще нет. В ETag он входит только хэшем
+    get_token(request)
+    csrf_secret = request.META['CSRF_COOKIE']
+    return f'user:{user.pk}:{user.get_username()}:{user.is_staff}:{user.is_superuser}:{csrf_secret}'
+
+
+def requisites_tag() -> str:
+    """Значения полей реквизитов компании (подвал страниц) без запроса к БД."""
+    requisites = get_company_requisites()
+    if requisites is None:
+        return ''
+    return '\0'.join(str(field.value_from_object(requisites)) for field in requisites._meta.concrete_fields)
+
+
+def page_etag(last_modified: datetime, tag: str, audience: str) -> str:
+    digest = hashlib.md5()
+    for part in (last_modified.isoformat(), tag, audience, requisites_tag(), settings.HTTP_CACHE_VERSION):
+        digest.update(part.encode('utf-8') + b'\0')
+    return quote_etag(digest.hexdigest())
+
+
+def _set_cache_headers(response, audience: str) -> None:
+    if audience == 'public':
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.HTTP_CACHE_MAX_AGE,
+            s_maxage=settings.HTTP_CACHE_S_MAXAGE,
+            stale_while_revalidate=settings.HTTP_CACHE_STALE_WHILE_REVALIDATE,
+        )
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+
+
+def conditional_page(validator: Validator):
+    """
+    Декоратор представления: ETag/Last-Modified по validator(request, *args, **kwargs),
+    ответ 304 до вызова представления и Cache-Control (см. описание модуля).
+    Ставится над cache_anonymous_page: кэш страниц не хранит ответы с Cache-Control.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            audience = page_audience(request)
+            if audience is None:
+                response = view(request, *args, **kwargs)
+                patch_cache_control(response, private=True, no_cache=True)
+                return response
+
+            validated = validator(request, *args, **kwargs)
+            if validated is None:
+                return view(request, *args, **kwargs)
+            last_modified, tag = validated
+            etag = page_etag(last_modified, tag, audience)
+            timestamp = timegm(last_modified.utctimetuple())
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                response['Last-Modified'] = http_date(timestamp)
+                _set_cache_headers(response, audience)
+            return response
+        return wrapper
+    return decorator
+
+
+def news_detail_validator(request: HttpRequest, pk: int) -> Optional[tuple[datetime, str]]:
+    """Время изменения новости — поиск по первичному ключу."""
+    updated_at = News.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    return (updated_at, '') if updated_at is not None else None
+
+
+def news_list_validator(request: HttpRequest) -> Optional[tuple[datetime, str]]:
+    """
+    Последнее изменение среди новостей — MAX(updated_at) по индексу
+    main_news_updated_idx — и версия удалений из кэша.
+    """
+    last_modified = News.objects.aggregate(last_modified=Max('updated_at'))['last_modified']
+    if last_modified is None:
+        return None
+    return last_modified, str(_deletions_version.get())
+
+
+@receiver(post_delete, sender=News)
+def news_deleted(sender, **kwargs):
+    """Удаление новости меняет ETag списка после фиксации."""
+    transaction.on_commit(_deletions_version.bump)
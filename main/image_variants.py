@@ -0,0 +1,146 @@
+# main/image_variants.py
+"""
+Генерация уменьшенных WebP/AVIF копий изображений новостей.
+
+Варианты строятся вне обработки запроса: после сохранения NewsImage задача
+уходит в фоновый поток (IMAGE_VARIANTS_BACKGROUND), а для уже загруженных
+изображений есть команда manage.py generate_image_variants с пулом процессов.
+Шаблонный тег {% responsive_image %} выводит <picture> с srcset по вариантам.
+"""
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from PIL import Image, ImageOps
+
+from . import lazy_imports
+from .models import NewsImage, NewsImageVariant
+
+logger = logging.getLogger(__name__)
+
+# Параметры кодирования для каждого формата
+SAVE_OPTIONS = {
+    'avif': {'format': 'AVIF', 'quality': 55},
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+@cache
+def register_avif() -> None:
+    """
+    Добавляет в Pillow поддержку AVIF через pillow-heif, если она не встроена.
+    Вызывается при первой генерации вариантов в процессе: кодек не загружается
+    при старте воркера.
+    """
+    try:
+        lazy_imports.pillow_heif().register_avif_opener()
+    except ImportError:
+        pass
+
+
+def supported_formats() -> List[str]:
+    """Форматы вариантов, которые умеет сохранять установленный Pillow."""
+    register_avif()
+    Image.init()
+    return [fmt for fmt, options in SAVE_OPTIONS.items() if options['format'] in Image.SAVE]
+
+
+def target_widths(original_width: int) -> List[int]:
+    """
+    Ширины вариантов для изображения: корзины из NEWS_IMAGE_WIDTHS не шире оригинала.
+
+    Для маленьких изображений возвращается одна ширина, равная оригиналу,
+    чтобы получить хотя бы перекодированную в WebP/AVIF копию.
+    """
+    widths = [w for w in settings.NEWS_IMAGE_WIDTHS if w < original_width]
+    return widths or [original_width]
+
+
+def render_variants(path: str, formats: List[str]) -> List[Tuple[int, str, bytes]]:
+    """
+    Строит варианты изображения. Не обращается к БД и Django, поэтому
+    подходит для выполнения в отдельном процессе.
+
+    Args:
+        path: Путь к исходному файлу на диске
+        formats: Форматы вариантов ('avif', 'webp')
+
+    Returns:
+        list: Кортежи (ширина, формат, байты файла)
+    """
+    # В процессах пула generate_image_variants AVIF регистрируется здесь
+    register_avif()
+    results = []
+    with Image.open(path) as source:
+        source = ImageOps.exif_transpose(source)
+        if source.mode not in ('RGB', 'RGBA'):
+            source = source.convert('RGBA' if 'transparency' in source.info or source.mode in ('LA', 'PA') else 'RGB')
+        for width in target_widths(source.width):
+            height = max(1, round(source.height * width / source.width))
+            resized = source if width == source.width else source.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                buffer = io.BytesIO()
+                resized.save(buffer, **SAVE_OPTIONS[fmt])
+                results.append((width, fmt, buffer.getvalue()))
+    return results
+
+
+def save_variants(news_image: NewsImage, rendered: List[Tuple[int, str, bytes]]) -> int:
+    """
+    Сохраняет построенные варианты в хранилище и БД, заменяя прежние.
+
+    Returns:
+        int: Количество сохраненных вариантов
+    """
+    stem = os.path.splitext(os.path.basename(news_image.image.name))[0]
+    with transaction.atomic():
+        news_image.variants.all().delete()
+        for width, fmt, data in rendered:
+            variant = NewsImageVariant(image=news_image, width=width, format=fmt)
+            variant.file.save(f'{stem}-{width}.{fmt}', ContentFile(data), save=False)
+            variant.save()
+    return len(rendered)
+
+
+def generate_variants(news_image: NewsImage) -> int:
+    """Строит и сохраняет варианты одного изображения в текущем процессе."""
+    formats = supported_formats()
+    if not formats or not news_image.image:
+        return 0
+    return save_variants(news_image, render_variants(news_image.image.path, formats))
+
+
+def _generate_in_background(news_image_id: int) -> None:
+    try:
+        news_image = NewsImage.objects.filter(pk=news_image_id).first()
+        if news_image:
+            generate_variants(news_image)
+    except Exception as e:
+        logger.error(f"Ошибка генерации вариантов изображения #{news_image_id}: {e}")
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(news_image_id: int) -> None:
+    """Ставит генерацию вариантов в фоновый поток процесса."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-variants')
+    _executor.submit(_generate_in_background, news_image_id)
+
+
+@receiver(post_save, sender=NewsImage)
+def news_image_saved(sender, instance, created, **kwargs):
+    """После загрузки изображения строим его варианты вне запроса."""
+    if created and settings.IMAGE_VARIANTS_BACKGROUND:
+        transaction.on_commit(lambda: schedule_variants(instance.pk))
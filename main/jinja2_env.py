@@ -0,0 +1,72 @@
+# main/jinja2_env.py
+"""
+Окружение Jinja2 для "горячих" публичных страниц.
+
+Шаблоны лежат в main/jinja2/ и повторяют разметку Django-шаблонов из
+main/templates/. Каким движком рендерить список и карточку новости,
+задает HOT_PAGES_TEMPLATE_ENGINE ('django' или 'jinja2').
+
+Аналоги тегов и фильтров Django-шаблонов:
+    {% static 'x' %}           → {{ static('x') }}
+    {% url 'name' pk %}        → {{ url('name', pk) }}
+    {% querystring cursor=c %} → {{ querystring(cursor=c) }}
+    {% now "Y" %}              → {{ now('Y') }}
+    {% responsive_image ... %} → {{ responsive_image(image, sizes=..., alt=...) }}
+    |add_class, |date, |striptags, |truncatechars — те же функции, что в Django.
+"""
+from django.conf import settings
+from django.template.defaultfilters import date, striptags, truncatechars
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils import dateformat, timezone
+from django.utils.timezone import template_localtime
+from jinja2 import Environment, pass_context
+
+from .templatetags.form_tags import add_class
+from .templatetags.image_tags import responsive_image
+
+
+def url(name: str, *args, **kwargs) -> str:
+    return reverse(name, args=args, kwargs=kwargs)
+
+
+@pass_context
+def querystring(context, **kwargs) -> str:
+    """То же, что {% querystring %}: текущие GET-параметры с изменениями."""
+    query_dict = context['request'].GET
+    params = query_dict.copy()
+    for key, value in kwargs.items():
+        if value is None:
+            params.pop(key, None)
+        else:
+            params[key] = value
+    if not params and not query_dict:
+        return ''
+    return f'?{params.urlencode()}'
+
+
+def now(format_string: str) -> str:
+    return dateformat.format(timezone.localtime() if settings.USE_TZ else timezone.now(), format_string)
+
+
+def local_date(value, arg=None) -> str:
+    # Django-шаблоны переводят время в текущую зону до вызова фильтра date
+    return date(template_localtime(value), arg)
+
+
+def environment(**options) -> Environment:
+    env = Environment(**options)
+    env.globals.update({
+        'static': static,
+        'url': url,
+        'querystring': querystring,
+        'now': now,
+        'responsive_image': responsive_image,
+    })
+    env.filters.update({
+        'add_class': add_class,
+        'date': local_date,
+        'striptags': striptags,
+        'truncatechars': truncatechars,
+    })
+    return env
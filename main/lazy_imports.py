@@ -0,0 +1,75 @@
+# main/lazy_imports.py
+"""
+Ленивая загрузка тяжелых зависимостей.
+
+WeasyPrint (вместе с cairo/Pango/fontTools), requests, httpx, bleach и NumPy
+нужны единицам запросов, но при импорте на уровне модуля загружаются каждым
+воркером до первого запроса. Модули приложения получают их только через
+функции ниже: импорт происходит при первом вызове, дальше модуль берется
+из sys.modules.
+
+Что грузится при старте, показывает manage.py import_profile; модули из
+LAZY_MODULES там считаются ошибкой, если попали в загрузку transagency.wsgi.
+"""
+import importlib
+import logging
+import time
+from functools import cache
+from types import ModuleType
+
+logger = logging.getLogger(__name__)
+
+# Зависимости, которые не должны импортироваться при старте процесса
+LAZY_MODULES = ('weasyprint', 'requests', 'httpx', 'bleach', 'numpy', 'openpyxl', 'pillow_heif')
+
+
+def _load(name: str) -> ModuleType:
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    logger.info(f"Модуль {name} загружен за {(time.perf_counter() - started) * 1000:.0f} мс")
+    return module
+
+
+@cache
+def weasyprint() -> ModuleType:
+    """WeasyPrint: рендер PDF (main/requisites_pdf.py)."""
+    return _load('weasyprint')
+
+
+@cache
+def requests() -> ModuleType:
+    """requests: HTTP-клиент для Telegram Bot API (main/telegram_utils.py)."""
+    return _load('requests')
+
+
+@cache
+def httpx() -> ModuleType:
+    """httpx: асинхронный HTTP-клиент для Telegram Bot API (main/telegram_utils.py)."""
+    return _load('httpx')
+
+
+@cache
+def bleach() -> ModuleType:
+    """bleach: очистка HTML новостей (main/forms.py)."""
+    return _load('bleach')
+
+
+@cache
+def numpy() -> ModuleType:
+    """NumPy: расчет стоимости по тарифам (main/tariffs.py)."""
+    return _load('numpy')
+
+
+@cache
+def openpyxl() -> ModuleType:
+    """
+    openpyxl: чтение загружаемых таблиц XLSX (main/spreadsheets.py).
+    Есть в requirements.txt, но нужен только при загрузке XLSX.
+    """
+    return _load('openpyxl')
+
+
+@cache
+def pillow_heif() -> ModuleType:
+    """pillow-heif: кодек AVIF для Pillow без встроенной поддержки (main/image_variants.py)."""
+    return _load('pillow_heif')
@@ -0,0 +1,138 @@
+import json
+import os
+import platform
+import sys
+import tempfile
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from main.benchmark import (AUDIENCES, DatasetSize, build_cases, compare_reports, make_client, run_case,
+                            seed_dataset)
+from main.metrics import registry
+
+BENCH_HOST = 'bench.local'
+
+
+class Command(BaseCommand):
+    help = ('Заполняет отдельную тестовую БД синтетическими данными, прогоняет все URL main/urls.py '
+            'для анонима, пользователя и суперпользователя и выводит p50/p95/p99, SQL-запросы и размер '
+            'ответов в JSON; с --compare сравнивает с базовым отчетом')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Объем данных: 1 — 2 000 новостей, 200 000 заявок, 2 000 пользователей')
+        parser.add_argument('--seed', type=int, default=0, help='Seed генератора данных')
+        parser.add_argument('--iterations', type=int, default=20, help='Повторов каждого сценария')
+        parser.add_argument('--only', nargs='*', default=None,
+                            help='Имена URL, которые мерить (по умолчанию все)')
+        parser.add_argument('--audience', nargs='*', choices=AUDIENCES, default=list(AUDIENCES),
+                            help='Группы пользователей')
+        parser.add_argument('--output', help='Сохранить отчет в файл (например, как новый базовый)')
+        parser.add_argument('--compare', metavar='BASELINE', help='Сравнить с базовым отчетом')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Допустимый рост p95 и размера ответа (доля, по умолчанию 0.2)')
+        parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                            help='Рост p95 меньше этого значения не считается регрессией')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Не удалять тестовую БД и не заполнять ее повторно, если данные уже есть')
+
+    def log(self, message):
+        self.stderr.write(message)
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations должен быть положительным')
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Не удалось прочитать базовый отчет: {e}')
+
+        # Отдельная БД, как у тестов: рабочие данные не затрагиваются
+        old_name = connection.settings_dict['NAME']
+        keepdb = options['keepdb']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+        # Реплика (DATABASE_REPLICA_URL) на время замера смотрит в ту же тестовую БД
+        for alias in connections:
+            if connections[alias].settings_dict.get('TEST', {}).get('MIRROR') == connection.alias:
+                connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+        try:
+            with tempfile.TemporaryDirectory() as tmp, override_settings(
+                ALLOWED_HOSTS=[BENCH_HOST],
+                CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                # Файлы, которые пишут измеряемые представления и сигналы, — только во временный
+                # каталог: иначе бенчмарк удалял бы PDF реквизитов из var/ и мерил бы их отдачу
+                MEDIA_ROOT=os.path.join(tmp, 'media'),
+                METRICS_DIR=os.path.join(tmp, 'metrics'),
+                REQUISITES_PDF_CACHE_DIR=os.path.join(tmp, 'requisites_pdf'),
+                APPLICATION_IMPORT_ERRORS_DIR=os.path.join(tmp, 'import_errors'),
+                # Повторы POST не должны упираться в лимиты частоты
+                RATE_LIMIT_ENABLED=False,
+            ):
+                try:
+                    report = self.run_bench(options)
+                finally:
+                    registry.discard()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output)
+            self.log(f'Отчет сохранен в {options["output"]}')
+        else:
+            self.stdout.write(output)
+
+        if baseline is not None:
+            regressions = compare_reports(baseline, report, options['threshold'], options['min_delta_ms'])
+            if regressions:
+                for line in regressions:
+                    self.log(self.style.ERROR(line))
+                raise CommandError(f'Регрессий: {len(regressions)}')
+            self.log(self.style.SUCCESS('Регрессий относительно базового отчета нет'))
+
+    def run_bench(self, options) -> dict:
+        size = DatasetSize.for_scale(options['scale'])
+        if User.objects.filter(username='bench_admin').exists():
+            self.log('Данные уже есть в БД (--keepdb), заполнение пропущено')
+            counts = None
+        else:
+            self.log(f'Заполнение БД: {size}')
+            counts = seed_dataset(size, seed=options['seed'], log=self.log)
+
+        cases = [
+            case for case in build_cases()
+            if case.audience in options['audience'] and (not options['only'] or case.name in options['only'])
+        ]
+        clients = {audience: make_client(audience, BENCH_HOST) for audience in options['audience']}
+        results = {}
+        for case in cases:
+            results[case.key] = result = run_case(clients[case.audience], case, options['iterations'])
+            self.log(f'{case.key:<55} {result["status"]}  p50 {result["p50_ms"]:8.2f}  '
+                     f'p95 {result["p95_ms"]:8.2f}  p99 {result["p99_ms"]:8.2f} мс  '
+                     f'{result["queries"]:3d} SQL  {result["bytes"]} Б')
+
+        return {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'scale': options['scale'],
+                'seed': options['seed'],
+                'dataset': counts,
+                'iterations': options['iterations'],
+                'database': connection.vendor,
+                'python': sys.version.split()[0],
+                'django': django.get_version(),
+                'platform': platform.platform(),
+                'debug': settings.DEBUG,
+            },
+            'results': results,
+        }
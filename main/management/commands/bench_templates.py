@@ -0,0 +1,66 @@
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+from django.test import RequestFactory
+
+from main.models import News
+from main.pagination import KeysetPaginator
+from main.views import base_context
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает время рендера горячих страниц движками Django и Jinja2'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200,
+                            help='Количество рендеров каждого шаблона каждым движком')
+
+    def make_request(self, path):
+        request = RequestFactory().get(path)
+        request.user = AnonymousUser()
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        return request
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        news = (News.objects.select_related('author', 'cover')
+                .prefetch_related('cover__variants', 'images__variants').first())
+        if news is None:
+            raise CommandError('Для замера нужна хотя бы одна новость')
+
+        page_obj = KeysetPaginator(News.objects.select_related('cover').prefetch_related('cover__variants'), 5).get_page()
+        # Данные загружаются один раз, чтобы мерить только шаблонизатор
+        list(page_obj)
+        news.images.all()
+        cases = [
+            ('main/news_list.html', '/news/', {'page_obj': page_obj}),
+            ('main/news_detail.html', f'/news/{news.pk}/', {'news': news}),
+        ]
+
+        for template_name, path, context in cases:
+            request = self.make_request(path)
+            context = {**context, **base_context(request)}
+            results = {}
+            for alias in ('django', 'jinja2'):
+                template = engines[alias].get_template(template_name)
+                template.render(context, request)  # прогрев
+                timings = []
+                for _ in range(iterations):
+                    started = time.perf_counter()
+                    template.render(context, request)
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                results[alias] = statistics.median(timings)
+                self.stdout.write(
+                    f'{template_name:<24} {alias:<7} '
+                    f'p50 {results[alias]:.3f} мс, p95 {timings[int(len(timings) * 0.95) - 1]:.3f} мс'
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f'{template_name}: Django / Jinja2 = {results["django"] / results["jinja2"]:.2f}'
+            ))
@@ -0,0 +1,34 @@
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ('Удаляет истекшие сессии из таблицы django_session пачками (при любом SESSION_BACKEND, '
+            'в том числе после перехода на signed_cookies, когда clearsessions ничего не делает)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Строк в одном DELETE: короткие транзакции не блокируют таблицу надолго')
+        parser.add_argument('--all', action='store_true',
+                            help='Удалить и действующие сессии — после перехода на signed_cookies, '
+                                 'когда старые сессии больше не нужно переносить (пользователи выйдут)')
+        parser.add_argument('--dry-run', action='store_true', help='Только посчитать строки')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть положительным')
+
+        sessions = Session.objects.all() if options['all'] else Session.objects.filter(expire_date__lte=timezone.now())
+        if options['dry_run']:
+            self.stdout.write(f'К удалению сессий: {sessions.count()}')
+            return
+
+        deleted = 0
+        while True:
+            keys = list(sessions.values_list('pk', flat=True)[:batch_size])
+            if not keys:
+                break
+            deleted += Session.objects.filter(pk__in=keys).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'Удалено сессий: {deleted}'))
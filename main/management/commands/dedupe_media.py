@@ -0,0 +1,106 @@
+import hashlib
+
+from django.apps import apps
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main.blobs import CONTENT_ADDRESSED_FIELDS, release_blob
+from main.storage import content_name, is_content_addressed
+
+
+def file_digest(storage, name: str) -> str:
+    """SHA-256 содержимого файла из хранилища."""
+    digest = hashlib.sha256()
+    with storage.open(name, 'rb') as f:
+        for chunk in f.chunks():
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Command(BaseCommand):
+    help = ('Переносит существующие медиафайлы в контент-адресное хранилище: '
+            'схлопывает дубликаты и переписывает пути в БД')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать дубликаты и объем, который освободится')
+        parser.add_argument('--delete-orphans', action='store_true',
+                            help='Удалить файлы в каталогах upload_to, на которые не ссылается ни одна запись')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        migrated = 0
+        old_names = {}   # старое имя -> (storage, размер)
+        by_hash = {}     # sha256 -> список старых имен (для dry-run отчета)
+        new_blobs = {}   # новое имя -> (storage, размер)
+        created = {}     # blob'ы, записанные этим запуском (а не существовавшие раньше) -> размер
+
+        for model_label, field_name in CONTENT_ADDRESSED_FIELDS:
+            model = apps.get_model(model_label)
+            storage = model._meta.get_field(field_name).storage
+            rows = model._default_manager.exclude(**{field_name: ''}).values_list('pk', field_name)
+
+            for pk, name in rows.iterator(chunk_size=500):
+                if is_content_addressed(name):
+                    continue
+                if not storage.exists(name):
+                    self.stderr.write(f'{model_label} #{pk}: файл {name} не найден, пропущен')
+                    continue
+
+                digest = file_digest(storage, name)
+                if dry_run:
+                    by_hash.setdefault(digest, set()).add(name)
+                    old_names[name] = (storage, storage.size(name))
+                    continue
+
+                existed = storage.exists(content_name(name, digest))
+                with storage.open(name, 'rb') as f:
+                    new_name = storage.save(name, File(f, name=name))
+                with transaction.atomic():
+                    model._default_manager.filter(pk=pk).update(**{field_name: new_name})
+                new_blobs[new_name] = old_names[name] = (storage, storage.size(new_name))
+                if not existed:
+                    created[new_name] = storage.size(new_name)
+                migrated += 1
+                self.stdout.write(f'{model_label} #{pk}: {name} -> {new_name}')
+
+        if dry_run:
+            duplicates = {h: names for h, names in by_hash.items() if len(names) > 1}
+            reclaimable = sum(old_names[n][1] for names in by_hash.values() for n in sorted(names)[1:])
+            for digest, names in duplicates.items():
+                self.stdout.write(f'{digest[:12]}…: ' + ', '.join(sorted(names)))
+            self.stdout.write(self.style.SUCCESS(
+                f'Файлов к переносу: {len(old_names)}, групп дубликатов: {len(duplicates)}, '
+                f'освободится: {reclaimable / 1024:.1f} КБ'
+            ))
+            return
+
+        # Старые копии удаляем только когда на них не осталось ссылок
+        deleted, freed = 0, 0
+        for name, (storage, size) in old_names.items():
+            if release_blob(storage, name):
+                deleted += 1
+                freed += size
+        # Место, занятое новыми blob'ами; уже существовавшие blob'ы места не добавили
+        freed -= sum(created.values())
+
+        if options['delete_orphans']:
+            for model_label, field_name in CONTENT_ADDRESSED_FIELDS:
+                field = apps.get_model(model_label)._meta.get_field(field_name)
+                directory = field.upload_to.rstrip('/')
+                if not field.storage.exists(directory):
+                    continue
+                for filename in field.storage.listdir(directory)[1]:
+                    if filename.endswith(('.upload', '.lock')):
+                        # Незавершенная загрузка или блокировка blob'а
+                        continue
+                    name = f'{directory}/{filename}'
+                    size = field.storage.size(name)
+                    if release_blob(field.storage, name):
+                        deleted += 1
+                        freed += size
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено записей: {migrated}, удалено старых файлов: {deleted}, '
+            f'уникальных blob\'ов: {len(new_blobs)}, освобождено: {freed / 1024:.1f} КБ'
+        ))
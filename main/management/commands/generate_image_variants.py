@@ -0,0 +1,49 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from main.image_variants import render_variants, save_variants, supported_formats
+from main.models import NewsImage
+
+
+class Command(BaseCommand):
+    help = 'Строит WebP/AVIF варианты для уже загруженных изображений новостей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Количество процессов для перекодирования')
+        parser.add_argument('--force', action='store_true',
+                            help='Перестроить варианты и для изображений, у которых они уже есть')
+
+    def handle(self, *args, **options):
+        formats = supported_formats()
+        if not formats:
+            self.stderr.write('Pillow не поддерживает ни WebP, ни AVIF')
+            return
+        self.stdout.write(f'Форматы: {", ".join(formats)}')
+
+        images = NewsImage.objects.exclude(image='')
+        if not options['force']:
+            images = images.filter(variants__isnull=True)
+        images = {image.pk: image for image in images.distinct()}
+
+        done = 0
+        # Перекодирование — в пуле процессов, запись в БД — в основном процессе
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = {
+                pool.submit(render_variants, image.image.path, formats): pk
+                for pk, image in images.items()
+                if os.path.exists(image.image.path)
+            }
+            for future in as_completed(futures):
+                image = images[futures[future]]
+                try:
+                    count = save_variants(image, future.result())
+                except Exception as e:
+                    self.stderr.write(f'{image.image.name}: {e}')
+                    continue
+                done += 1
+                self.stdout.write(f'{image.image.name}: вариантов {count}')
+
+        self.stdout.write(self.style.SUCCESS(f'Обработано изображений: {done} из {len(images)}'))
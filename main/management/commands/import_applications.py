@@ -0,0 +1,50 @@
+import os
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from main.application_import import import_applications
+from main.spreadsheets import read_spreadsheet
+
+
+class Command(BaseCommand):
+    help = ('Импортирует заявки из таблицы CSV/XLSX: строки проверяются правилами полей Application, '
+            'сохраняются пачками через bulk_create, отклоненные строки пишутся в файл ошибок')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .csv или .xlsx (первая строка — заголовки)')
+        parser.add_argument('--batch-size', type=int, default=settings.APPLICATION_IMPORT_BATCH_SIZE,
+                            help='Размер пачки bulk_create (каждая пачка — отдельная транзакция)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только проверить строки, ничего не сохраняя')
+        parser.add_argument('--no-notify', action='store_true',
+                            help='Не отправлять сводное уведомление в Telegram')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным')
+        try:
+            with open(path, 'rb') as f:
+                result = import_applications(
+                    read_spreadsheet(f, path),
+                    source=os.path.basename(path),
+                    batch_size=options['batch_size'],
+                    dry_run=options['dry_run'],
+                    notify=not options['no_notify'],
+                )
+        except OSError as e:
+            raise CommandError(f'Не удалось открыть {path}: {e}')
+        except ValidationError as e:
+            raise CommandError('; '.join(e.messages))
+
+        if result.header_errors:
+            raise CommandError('; '.join(result.header_errors))
+
+        verb = 'проверено' if options['dry_run'] else 'загружено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Строк: {result.total}, {verb} заявок: {result.created}, отклонено: {result.failed}'
+        ))
+        if result.errors_path:
+            self.stdout.write(f'Отклоненные строки: {result.errors_path}')
@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from main.lazy_imports import LAZY_MODULES
+
+
+def parse_importtime(output: str):
+    """
+    Разбирает вывод python -X importtime.
+
+    Returns:
+        list: Кортежи (модуль, собственное время мкс, накопленное время мкс)
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            # Заголовок таблицы
+            continue
+        rows.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+    return rows
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время импорта модулей при старте (python -X importtime) '
+            'и завершается с ошибкой, если превышен бюджет STARTUP_IMPORT_BUDGET_MS')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default='transagency.wsgi',
+                            help='Импортируемый модуль (по умолчанию transagency.wsgi)')
+        parser.add_argument('--budget', type=float, default=settings.STARTUP_IMPORT_BUDGET_MS,
+                            help='Бюджет времени импорта, мс')
+        parser.add_argument('--top', type=int, default=20,
+                            help='Сколько самых медленных модулей показать')
+
+    def handle(self, *args, **options):
+        module = options['module']
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'transagency.settings')}
+        # Отдельный процесс: в текущем Django и приложение уже импортированы
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR
+        )
+        if result.returncode != 0:
+            raise CommandError(f'Не удалось импортировать {module}:\n{result.stderr[-2000:]}')
+
+        rows = parse_importtime(result.stderr)
+        total = next((cumulative for name, _, cumulative in rows if name == module), None)
+        if total is None:
+            raise CommandError(f'{module} нет в выводе -X importtime')
+
+        by_package = defaultdict(int)
+        for name, own, _ in rows:
+            by_package[name.split('.')[0]] += own
+
+        top = options['top']
+        self.stdout.write('Самые медленные модули (собственное / накопленное время, мс):')
+        for name, own, cumulative in sorted(rows, key=lambda row: row[1], reverse=True)[:top]:
+            self.stdout.write(f'  {own / 1000:8.1f} {cumulative / 1000:8.1f}  {name}')
+        self.stdout.write('Пакеты верхнего уровня (мс):')
+        for package, own in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]:
+            self.stdout.write(f'  {own / 1000:8.1f}  {package}')
+
+        total_ms = total / 1000
+        budget = options['budget']
+        self.stdout.write(f'Импорт {module}: {total_ms:.0f} мс (бюджет {budget:.0f} мс)')
+
+        loaded = sorted(set(LAZY_MODULES) & set(by_package))
+        if loaded:
+            raise CommandError(
+                f'При старте импортированы модули, которые должны загружаться лениво: {", ".join(loaded)}'
+            )
+        if total_ms > budget:
+            raise CommandError(f'Время импорта {total_ms:.0f} мс превышает бюджет {budget:.0f} мс')
+        self.stdout.write(self.style.SUCCESS('Бюджет времени старта соблюден'))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main.notifications import NotificationDispatcher
+
+
+class Command(BaseCommand):
+    help = 'Отправляет уведомления о заявках из очереди (outbox) в Telegram'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Обработать очередь один раз и завершиться')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Пауза между опросами пустой очереди, секунд')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Количество уведомлений, забираемых за один проход')
+
+    def handle(self, *args, **options):
+        dispatcher = NotificationDispatcher(batch_size=options['batch_size'])
+
+        if options['once']:
+            total = 0
+            while True:
+                processed = dispatcher.dispatch_once()
+                total += processed
+                if not processed:
+                    break
+            self.stdout.write(self.style.SUCCESS(f'Обработано уведомлений: {total}'))
+            return
+
+        self.stdout.write('Воркер уведомлений запущен')
+        try:
+            while True:
+                if not dispatcher.dispatch_once():
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Воркер уведомлений остановлен')
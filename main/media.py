@@ -0,0 +1,158 @@
+# main/media.py
+"""
+Отдача файлов из MEDIA_ROOT в production.
+
+• Условные запросы (ETag/Last-Modified) проверяются до открытия файла.
+• Файлы с контент-адресными именами (см. main/storage.py) отдаются с
+  Cache-Control: immutable на год, остальные — на MEDIA_CACHE_MAX_AGE.
+• Передачу байтов можно переложить на веб-сервер (MEDIA_OFFLOAD):
+  'x-accel-redirect' для nginx или 'x-sendfile' для Apache/lighttpd.
+  Без offload полный файл отдается FileResponse, который gunicorn
+  передает через wsgi.file_wrapper (os.sendfile, без копирования в Python).
+• Поддерживается одиночный диапазон Range: bytes=… (ответ 206).
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from .storage import is_content_addressed
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def _x_accel_redirect(response: HttpResponse, path: str, full_path: str) -> None:
+    response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_REDIRECT_PREFIX + path)
+
+
+def _x_sendfile(response: HttpResponse, path: str, full_path: str) -> None:
+    response['X-Sendfile'] = full_path
+
+
+# Способы переложить передачу файла на веб-сервер (значения MEDIA_OFFLOAD)
+OFFLOAD_BACKENDS = {
+    'x-accel-redirect': _x_accel_redirect,
+    'x-sendfile': _x_sendfile,
+}
+
+
+def file_etag(path: str, stat: os.stat_result) -> str:
+    """Сильный ETag: хэш из имени для контент-адресных файлов, иначе mtime и размер."""
+    if is_content_addressed(path):
+        return '"%s"' % os.path.splitext(posixpath.basename(path))[0]
+    return '"%x-%x"' % (stat.st_mtime_ns, stat.st_size)
+
+
+def parse_range(header: str, size: int):
+    """
+    Разбирает заголовок Range с одним диапазоном.
+
+    Returns:
+        tuple | None: (start, end) включительно; None, если заголовок не поддерживается
+            и нужно отдать файл целиком
+
+    Raises:
+        ValueError: Если диапазон невыполним (ответ 416)
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if start == '':
+        # bytes=-N — последние N байт
+        length = int(end)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def _iter_range(file, start: int, length: int):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+@require_safe
+def serve_media(request: HttpRequest, path: str) -> HttpResponse:
+    """Отдача медиафайла с поддержкой кэширования, Range и offload на веб-сервер."""
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (OSError, ValueError):
+        raise Http404("Файл не найден")
+    if not os.path.isfile(full_path):
+        raise Http404("Файл не найден")
+
+    etag = file_etag(path, stat)
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        content_type, encoding = mimetypes.guess_type(full_path)
+        content_type = content_type or 'application/octet-stream'
+        offload = OFFLOAD_BACKENDS.get(settings.MEDIA_OFFLOAD)
+        range_header = request.headers.get('Range')
+        if_range = request.headers.get('If-Range')
+        if if_range and if_range != etag and parse_http_date_safe(if_range) != last_modified:
+            # Файл изменился с момента первого запроса — отдаем целиком
+            range_header = None
+
+        if offload:
+            # Веб-сервер сам отдаст файл, обработает Range и sendfile
+            response = HttpResponse(content_type=content_type)
+            offload(response, path, full_path)
+        elif range_header:
+            try:
+                byte_range = parse_range(range_header, stat.st_size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{stat.st_size}'
+                return response
+            if byte_range is None:
+                response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+            else:
+                start, end = byte_range
+                length = end - start + 1
+                response = StreamingHttpResponse(
+                    _iter_range(open(full_path, 'rb'), start, length),
+                    status=206, content_type=content_type
+                )
+                response['Content-Length'] = str(length)
+                response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        else:
+            response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Accept-Ranges'] = 'bytes'
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if is_content_addressed(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+    return response
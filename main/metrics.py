@@ -0,0 +1,448 @@
+# main/metrics.py
+"""
+Метрики запросов в формате Prometheus.
+
+RequestMetricsMiddleware для каждого запроса записывает по имени URL
+(home, news_list, application_list, ...):
+    • гистограмму длительности и число ответов по кодам;
+    • число и время SQL-запросов (execute_wrapper на каждом соединении с БД);
+    • время рендера шаблонов (Django и Jinja2);
+    • время исходящих вызовов (outbound('telegram') в telegram_utils).
+
+Метрики копятся в памяти процесса и не чаще раза в METRICS_FLUSH_INTERVAL
+секунд сбрасываются в собственный файл процесса в METRICS_DIR (атомарной
+заменой). /metrics суммирует файлы всех воркеров gunicorn, поэтому счетчики
+общие для сервера и не пропадают при перезапуске воркера. Файлы завершившихся
+процессов /metrics при сборе складывает в один архивный файл и удаляет, так
+что каталог не растет с перезапусками воркеров. При новом развертывании
+каталог METRICS_DIR стоит очищать.
+
+Для потоковых ответов учитывается время до начала отдачи тела.
+"""
+import atexit
+import bisect
+import logging
+import marshal
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .file_locks import file_lock
+
+logger = logging.getLogger(__name__)
+
+# Верхние границы корзин гистограммы длительности запроса, секунды
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+KNOWN_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+
+# Имя для запросов, не сопоставленных ни одному URL (404): не раздувает число рядов
+UNRESOLVED_VIEW = '<unresolved>'
+
+# Файл с суммой метрик завершившихся процессов
+ARCHIVE_NAME = 'archive.metrics'
+
+# Через сколько секунд lock-файл свертки считается брошенным
+COMPACT_LOCK_STALE_AFTER = 30
+
+# Индексы в списке значений запроса (view, method)
+_COUNT, _SUM, _DB_COUNT, _DB_TIME, _TEMPLATE_COUNT, _TEMPLATE_TIME, _BUCKETS = range(7)
+
+
+class RequestStats:
+    """Счетчики текущего запроса (контекстная переменная _current)."""
+    __slots__ = ('db_count', 'db_time', 'template_count', 'template_time', 'render_depth', 'outbound')
+
+    def __init__(self):
+        self.db_count = 0
+        self.db_time = 0.0
+        self.template_count = 0
+        self.template_time = 0.0
+        self.render_depth = 0
+        self.outbound: Optional[Dict[str, List[float]]] = None
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar('request_metrics', default=None)
+
+
+class MetricsRegistry:
+    """Агрегаты процесса и их сброс в файл METRICS_DIR/<id процесса>.metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.pid = os.getpid()
+        self.path: Optional[Path] = None
+        self.requests: Dict[Tuple[str, str], list] = {}
+        self.statuses: Dict[Tuple[str, str, str], int] = {}
+        self.outbound: Dict[Tuple[str, str], list] = {}
+        self.flushed_at = time.monotonic()
+
+    def record(self, view: str, method: str, status: int, duration: float, stats: RequestStats) -> None:
+        with self._lock:
+            if self.pid != os.getpid():
+                # После fork (gunicorn --preload) данные мастер-процесса не наши
+                self._reset()
+            values = self.requests.get((view, method))
+            if values is None:
+                values = self.requests[(view, method)] = [0, 0.0, 0, 0.0, 0, 0.0] + [0] * (len(DURATION_BUCKETS) + 1)
+            values[_COUNT] += 1
+            values[_SUM] += duration
+            values[_DB_COUNT] += stats.db_count
+            values[_DB_TIME] += stats.db_time
+            values[_TEMPLATE_COUNT] += stats.template_count
+            values[_TEMPLATE_TIME] += stats.template_time
+            values[_BUCKETS + bisect.bisect_left(DURATION_BUCKETS, duration)] += 1
+
+            status_key = (view, method, str(status))
+            self.statuses[status_key] = self.statuses.get(status_key, 0) + 1
+
+            if stats.outbound:
+                for target, (count, seconds) in stats.outbound.items():
+                    totals = self.outbound.setdefault((view, target), [0, 0.0])
+                    totals[0] += count
+                    totals[1] += seconds
+
+            if time.monotonic() - self.flushed_at >= settings.METRICS_FLUSH_INTERVAL:
+                self._flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self.pid == os.getpid():
+                self._flush()
+
+    def discard(self) -> None:
+        """Забывает накопленные данные без записи (manage.py bench — замеры не должны попасть в /metrics)."""
+        with self._lock:
+            self._reset()
+
+    def _flush(self) -> None:
+        self.flushed_at = time.monotonic()
+        if not self.requests:
+            return
+        data = marshal.dumps({
+            'requests': self.requests,
+            'statuses': self.statuses,
+            'outbound': self.outbound,
+        })
+        try:
+            if self.path is None:
+                directory = Path(settings.METRICS_DIR)
+                directory.mkdir(parents=True, exist_ok=True)
+                self.path = directory / f'{self.pid}-{uuid.uuid4().hex[:8]}.metrics'
+            tmp_path = self.path.with_suffix('.tmp')
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            # Метрики не должны ломать обработку запроса; файл создадим заново при следующем сбросе
+            logger.warning(f"Не удалось сохранить метрики: {e}")
+            self.path = None
+
+
+registry = MetricsRegistry()
+# Данные последней секунды перед остановкой воркера
+atexit.register(registry.flush)
+
+
+# -------------------------------------------------------------------
+# Сбор
+# -------------------------------------------------------------------
+class RequestMetricsMiddleware:
+    """
+    Замеряет запрос целиком; должен стоять первым в MIDDLEWARE.
+    Работает и в синхронной, и в асинхронной цепочке (ASGI).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._record(request, response, time.perf_counter() - started, stats)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._record(request, response, time.perf_counter() - started, stats)
+        return response
+
+    @staticmethod
+    def _record(request, response, duration: float, stats: RequestStats) -> None:
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else UNRESOLVED_VIEW
+        method = request.method if request.method in KNOWN_METHODS else 'OTHER'
+        registry.record(view, method, response.status_code, duration, stats)
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_count += 1
+        stats.db_time += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def install_db_wrapper(sender, connection, **kwargs):
+    """Замер SQL-запросов на каждом соединении (обертка ставится один раз на объект соединения)."""
+    if _db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_wrapper)
+
+
+@contextmanager
+def timed_render() -> Iterator[None]:
+    """
+    Замер рендера шаблона верхнего уровня: вложенные рендеры (виджеты форм,
+    render_to_string внутри тегов) уже входят во время внешнего.
+    """
+    stats = _current.get()
+    if stats is None or stats.render_depth:
+        if stats is not None:
+            stats.render_depth += 1
+        try:
+            yield
+        finally:
+            if stats is not None:
+                stats.render_depth -= 1
+        return
+    stats.render_depth = 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.render_depth = 0
+        stats.template_count += 1
+        stats.template_time += time.perf_counter() - started
+
+
+@contextmanager
+def outbound(target: str) -> Iterator[None]:
+    """
+    Замер исходящего вызова внешнего сервиса в рамках текущего запроса.
+
+    Args:
+        target: Имя сервиса в метках (например, 'telegram')
+    """
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats.outbound is None:
+            stats.outbound = {}
+        totals = stats.outbound.setdefault(target, [0, 0.0])
+        totals[0] += 1
+        totals[1] += time.perf_counter() - started
+
+
+def install_template_timers() -> None:
+    """Оборачивает render() шаблонов бэкендов Django и Jinja2 (вызывается из MainConfig.ready)."""
+    from django.template.backends import django as django_backend, jinja2 as jinja2_backend
+
+    for template_class in (django_backend.Template, jinja2_backend.Template):
+        render = template_class.render
+        if getattr(render, '_metrics_timed', False):
+            continue
+
+        def timed(self, context=None, request=None, _render=render):
+            with timed_render():
+                return _render(self, context, request)
+
+        timed._metrics_timed = True
+        template_class.render = timed
+
+
+# -------------------------------------------------------------------
+# Экспорт
+# -------------------------------------------------------------------
+def _empty() -> dict:
+    return {'requests': {}, 'statuses': {}, 'outbound': {}}
+
+
+def _merge(total: dict, data: dict) -> None:
+    """Прибавляет метрики data (содержимое файла процесса) к total."""
+    requests = total['requests']
+    for key, values in data['requests'].items():
+        merged = requests.get(key)
+        if merged is None or len(merged) != len(values):
+            requests[key] = list(values)
+        else:
+            requests[key] = [a + b for a, b in zip(merged, values)]
+    statuses = total['statuses']
+    for key, count in data['statuses'].items():
+        statuses[key] = statuses.get(key, 0) + count
+    for key, (count, seconds) in data['outbound'].items():
+        totals = total['outbound'].setdefault(key, [0, 0.0])
+        totals[0] += count
+        totals[1] += seconds
+
+
+def _read(path: Path) -> Optional[dict]:
+    try:
+        return marshal.loads(path.read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        # Процесс есть, но чужой (или проверка невозможна) — файл не трогаем
+        return True
+    return True
+
+
+def _dead_process_files(directory: Path) -> List[Path]:
+    """Файлы процессов (<pid>-<id>.metrics), которых уже нет."""
+    dead = []
+    for path in directory.glob('*-*.metrics'):
+        pid = path.name.split('-', 1)[0]
+        if pid.isdigit() and int(pid) != os.getpid() and not _process_alive(int(pid)):
+            dead.append(path)
+    return dead
+
+
+def compact(directory: Path) -> None:
+    """
+    Складывает файлы завершившихся процессов в ARCHIVE_NAME и удаляет их.
+    Сборщики в разных воркерах сворачивают каталог по очереди (lock-файл).
+    """
+    if not _dead_process_files(directory):
+        return
+    with file_lock(str(directory / '.compact.lock'), COMPACT_LOCK_STALE_AFTER):
+        dead = _dead_process_files(directory)
+        if not dead:
+            return
+        archive_path = directory / ARCHIVE_NAME
+        archive = _read(archive_path) if archive_path.exists() else _empty()
+        if archive is None:
+            logger.warning(f"Архив метрик {archive_path} не читается, создается заново")
+            archive = _empty()
+        for path in dead:
+            data = _read(path)
+            if data is not None:
+                _merge(archive, data)
+        tmp_path = archive_path.with_suffix('.tmp')
+        tmp_path.write_bytes(marshal.dumps(archive))
+        os.replace(tmp_path, archive_path)
+        for path in dead:
+            path.unlink(missing_ok=True)
+
+
+def collect() -> dict:
+    """Сумма метрик всех процессов из METRICS_DIR."""
+    registry.flush()
+    total = _empty()
+    directory = Path(settings.METRICS_DIR)
+    if not directory.is_dir():
+        return total
+    try:
+        compact(directory)
+    except OSError as e:
+        logger.warning(f"Не удалось свернуть файлы метрик: {e}")
+    for path in sorted(directory.glob('*.metrics')):
+        data = _read(path)
+        if data is not None:
+            _merge(total, data)
+    return total
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels) -> str:
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _metric_header(lines: List[str], name: str, metric_type: str, help_text: str) -> None:
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {metric_type}')
+
+
+def render_prometheus(data: dict) -> str:
+    """Текстовый формат Prometheus 0.0.4."""
+    lines: List[str] = []
+    requests = sorted(data['requests'].items())
+
+    _metric_header(lines, 'http_requests_total', 'counter', 'Ответы по имени URL, методу и коду.')
+    for (view, method, status), count in sorted(data['statuses'].items()):
+        lines.append(f'http_requests_total{_labels(view=view, method=method, status=status)} {count}')
+
+    _metric_header(lines, 'http_request_duration_seconds', 'histogram', 'Длительность запроса.')
+    for (view, method), values in requests:
+        cumulative = 0
+        for bound, count in zip((*DURATION_BUCKETS, '+Inf'), values[_BUCKETS:]):
+            cumulative += count
+            lines.append(f'http_request_duration_seconds_bucket{_labels(view=view, method=method, le=bound)} {cumulative}')
+        lines.append(f'http_request_duration_seconds_sum{_labels(view=view, method=method)} {values[_SUM]:.6f}')
+        lines.append(f'http_request_duration_seconds_count{_labels(view=view, method=method)} {values[_COUNT]}')
+
+    for name, index, metric_type, help_text in (
+        ('db_queries_total', _DB_COUNT, 'counter', 'SQL-запросы при обработке запросов.'),
+        ('db_query_duration_seconds_total', _DB_TIME, 'counter', 'Время SQL-запросов.'),
+        ('template_renders_total', _TEMPLATE_COUNT, 'counter', 'Рендеры шаблонов верхнего уровня.'),
+        ('template_render_duration_seconds_total', _TEMPLATE_TIME, 'counter', 'Время рендера шаблонов.'),
+    ):
+        _metric_header(lines, name, metric_type, help_text)
+        for (view, method), values in requests:
+            value = values[index]
+            value = f'{value:.6f}' if isinstance(value, float) else value
+            lines.append(f'{name}{_labels(view=view, method=method)} {value}')
+
+    outbound_items = sorted(data['outbound'].items())
+    _metric_header(lines, 'outbound_calls_total', 'counter', 'Исходящие вызовы внешних сервисов.')
+    for (view, target), (count, _) in outbound_items:
+        lines.append(f'outbound_calls_total{_labels(view=view, target=target)} {count}')
+    _metric_header(lines, 'outbound_call_duration_seconds_total', 'counter', 'Время исходящих вызовов.')
+    for (view, target), (_, seconds) in outbound_items:
+        lines.append(f'outbound_call_duration_seconds_total{_labels(view=view, target=target)} {seconds:.6f}')
+
+    return '\n'.join(lines) + '\n'
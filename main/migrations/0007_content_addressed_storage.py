@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:09
+
+import main.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_telegramnotification'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='document',
+            name='file',
+            field=models.FileField(storage=main.storage.ContentAddressedStorage(), upload_to='documents/'),
+        ),
+        migrations.AlterField(
+            model_name='newsimage',
+            name='image',
+            field=models.ImageField(storage=main.storage.ContentAddressedStorage(), upload_to='news_images/', verbose_name='Изображение'),
+        ),
+    ]
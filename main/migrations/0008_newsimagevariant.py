@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:10
+
+import django.db.models.deletion
+import main.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsImageVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('width', models.PositiveIntegerField(verbose_name='Ширина')),
+                ('format', models.CharField(choices=[('avif', 'AVIF'), ('webp', 'WebP')], max_length=10, verbose_name='Формат')),
+                ('file', models.FileField(storage=main.storage.ContentAddressedStorage(), upload_to='news_images/variants/', verbose_name='Файл')),
+                ('image', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variants', to='main.newsimage', verbose_name='Исходное изображение')),
+            ],
+            options={
+                'verbose_name': 'Вариант изображения новости',
+                'verbose_name_plural': 'Варианты изображений новостей',
+                'ordering': ['format', 'width'],
+                'constraints': [models.UniqueConstraint(fields=('image', 'format', 'width'), name='main_newsimagevariant_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_news_cover(apps, schema_editor):
+    News = apps.get_model('main', 'News')
+    NewsImage = apps.get_model('main', 'NewsImage')
+    first_image = NewsImage.objects.filter(news=models.OuterRef('pk')).order_by('pk').values('pk')[:1]
+    News.objects.update(cover=models.Subquery(first_image))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_newsimagevariant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='cover',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='main.newsimage', verbose_name='Обложка'),
+        ),
+        migrations.RunPython(fill_news_cover, migrations.RunPython.noop),
+    ]
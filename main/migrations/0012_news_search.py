@@ -0,0 +1,59 @@
+import html
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+
+def plain_text(value):
+    return html.unescape(strip_tags(value or ''))
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    News = apps.get_model('main', 'News')
+
+    if connection.vendor == 'postgresql':
+        schema_editor.execute("ALTER TABLE main_news ADD COLUMN search_vector tsvector")
+        schema_editor.execute("CREATE INDEX main_news_search_gin ON main_news USING GIN (search_vector)")
+        for news in News.objects.only('title', 'short_description', 'content').iterator():
+            schema_editor.execute(
+                """
+                UPDATE main_news SET search_vector =
+                    setweight(to_tsvector('russian', %s), 'A') ||
+                    setweight(to_tsvector('russian', %s), 'B') ||
+                    setweight(to_tsvector('russian', %s), 'C')
+                WHERE id = %s
+                """,
+                [news.title, plain_text(news.short_description), plain_text(news.content), news.pk]
+            )
+
+    elif connection.vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE main_news_fts USING fts5("
+            "title, short_description, content, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        for news in News.objects.only('title', 'short_description', 'content').iterator():
+            schema_editor.execute(
+                "INSERT INTO main_news_fts (rowid, title, short_description, content) VALUES (%s, %s, %s, %s)",
+                [news.pk, news.title, plain_text(news.short_description), plain_text(news.content)]
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS main_news_search_gin")
+        schema_editor.execute("ALTER TABLE main_news DROP COLUMN IF EXISTS search_vector")
+    elif connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS main_news_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_application_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
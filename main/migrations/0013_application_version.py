@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_news_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Версия'),
+        ),
+    ]
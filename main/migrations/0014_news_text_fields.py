@@ -0,0 +1,88 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:24
+
+import html
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+DERIVED_FIELDS = ['content_html', 'content_text', 'excerpt', 'teaser']
+
+# Копия правил main/news_text.py на момент миграции: данные заполняются так,
+# как их заполнял бы News.save() этой версии, что бы потом ни изменилось в модуле
+ALLOWED_TAGS = [
+    'p', 'br', 'strong', 'em', 'b', 'i', 'u', 's',
+    'ul', 'ol', 'li', 'a', 'img', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'blockquote', 'code', 'pre', 'hr', 'span', 'div'
+]
+
+ALLOWED_ATTRIBUTES = {
+    'a': ['href', 'title', 'target'],
+    'img': ['src', 'alt', 'width', 'height', 'style'],
+    '*': ['class', 'style']
+}
+
+EXCERPT_LENGTH = 120
+TEASER_WORDS = 20
+
+
+def plain_text(value):
+    return html.unescape(strip_tags(value or ''))
+
+
+def news_text_fields(short_description, content):
+    import bleach
+
+    summary = plain_text(short_description)
+    return {
+        'content_html': bleach.clean(content, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, strip=True)
+        if content else '',
+        'content_text': plain_text(content),
+        'excerpt': Truncator(summary).chars(EXCERPT_LENGTH),
+        'teaser': Truncator(summary).words(TEASER_WORDS, truncate=' …'),
+    }
+
+
+def fill_news_text_fields(apps, schema_editor):
+    News = apps.get_model('main', 'News')
+    batch = []
+    for news in News.objects.only('id', 'short_description', 'content').iterator(chunk_size=200):
+        for name, value in news_text_fields(news.short_description, news.content).items():
+            setattr(news, name, value)
+        batch.append(news)
+        if len(batch) >= 200:
+            News.objects.bulk_update(batch, DERIVED_FIELDS)
+            batch = []
+    if batch:
+        News.objects.bulk_update(batch, DERIVED_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_application_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Очищенный HTML текста'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='content_text',
+            field=models.TextField(blank=True, editable=False, verbose_name='Текст без разметки'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=120, verbose_name='Анонс для списка новостей'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='teaser',
+            field=models.TextField(blank=True, editable=False, verbose_name='Анонс для главной'),
+        ),
+        migrations.RunPython(fill_news_text_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_news_text_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tariff',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('service', models.CharField(choices=[('container_reception', 'Прием груженых и порожних контейнеров'), ('documents_clearance', 'Раскредитовка документов на станции'), ('container_delivery', 'Доставка контейнеров автотранспортом'), ('loading_unloading', 'Организация погрузки-выгрузки'), ('container_storage', 'Хранение контейнеров на терминале'), ('container_shipping', 'Отправка контейнеров по России/экспорт'), ('shipping_docs', 'Оформление перевозочных документов'), ('cargo_insurance', 'Страхование грузов')], max_length=50, verbose_name='Услуга')),
+                ('container_type', models.CharField(choices=[('20dc', "20' DC"), ('40dc', "40' DC"), ('40hc', "40' HC"), ('45hc', "45' HC")], max_length=10, verbose_name='Тип контейнера')),
+                ('loaded', models.BooleanField(default=True, verbose_name='Груженый')),
+                ('base_price', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Базовая цена, руб.')),
+                ('unit', models.CharField(choices=[('container', 'За контейнер'), ('day', 'За сутки'), ('km', 'За километр'), ('cargo_value', '% от стоимости груза')], default='container', max_length=20, verbose_name='Единица тарификации')),
+                ('unit_price', models.DecimalField(decimal_places=4, default=0, help_text='Руб. за сутки/км или процент для страхования', max_digits=12, verbose_name='Ставка за единицу')),
+                ('min_price', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Минимальная цена, руб.')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Изменен')),
+            ],
+            options={
+                'verbose_name': 'Тариф',
+                'verbose_name_plural': 'Тарифы',
+                'ordering': ['service', 'container_type', '-loaded'],
+                'constraints': [models.UniqueConstraint(fields=('service', 'container_type', 'loaded'), name='main_tariff_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:57
+
+from django.db import migrations, models
+
+
+def fill_news_updated_at(apps, schema_editor):
+    # Существующие новости не менялись с публикации (иначе все получили бы время миграции)
+    News = apps.get_model('main', 'News')
+    News.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_tariff'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.RunPython(fill_news_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['updated_at'], name='main_news_updated_idx'),
+        ),
+    ]
@@ -1,23 +1,56 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+from .news_text import EXCERPT_LENGTH, news_text_fields
+from .storage import content_addressed_storage
 
 class News(models.Model):
     title = models.CharField(max_length=200, verbose_name="Заголовок")
     short_description = models.TextField(verbose_name="Краткое описание", help_text="Этот текст будет отображаться в списке новостей")
     content = models.TextField(verbose_name="Полный текст новости")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата публикации")
+    # Меняется при каждом сохранении и при изменении изображений (сигналы в конце модуля);
+    # по нему отвечают на условные запросы (main/http_cache.py)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
     author = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Автор")
+    # Первое изображение новости; поддерживается сигналами NewsImage (см. конец модуля)
+    cover = models.ForeignKey('NewsImage', on_delete=models.SET_NULL, null=True, blank=True,
+                              related_name='+', verbose_name="Обложка")
+    # Производные поля: вычисляются в save() из short_description и content (см. main/news_text.py)
+    content_html = models.TextField(blank=True, editable=False, verbose_name="Очищенный HTML текста")
+    content_text = models.TextField(blank=True, editable=False, verbose_name="Текст без разметки")
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False,
+                               verbose_name="Анонс для списка новостей")
+    teaser = models.TextField(blank=True, editable=False, verbose_name="Анонс для главной")
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        derived = news_text_fields(self.short_description, self.content)
+        for name, value in derived.items():
+            setattr(self, name, value)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            if {'short_description', 'content'} & set(update_fields):
+                update_fields = set(update_fields) | set(derived)
+            # auto_now обновляется, только если поле есть в update_fields
+            kwargs['update_fields'] = list(set(update_fields) | {'updated_at'})
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Новость"
         verbose_name_plural = "Новости"
+        indexes = [
+            # Keyset-пагинация (main/pagination.py)
+            models.Index(fields=['created_at', 'id'], name='main_news_created_id_idx'),
+            # Last-Modified списка новостей — MAX(updated_at) без чтения таблицы
+            models.Index(fields=['updated_at'], name='main_news_updated_idx'),
+        ]
 
 class NewsImage(models.Model):
     news = models.ForeignKey(News, related_name='images', on_delete=models.CASCADE)
-    image = models.ImageField(upload_to='news_images/', verbose_name="Изображение")
+    image = models.ImageField(upload_to='news_images/', storage=content_addressed_storage, verbose_name="Изображение")
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -27,6 +60,35 @@ class NewsImage(models.Model):
         verbose_name = "Изображение новости"
         verbose_name_plural = "Изображения новостей"
 
+class NewsImageVariant(models.Model):
+    """Уменьшенная копия изображения новости в современном формате (для srcset)."""
+    FORMAT_CHOICES = [
+        ('avif', 'AVIF'),
+        ('webp', 'WebP'),
+    ]
+
+    image = models.ForeignKey(NewsImage, related_name='variants', on_delete=models.CASCADE,
+                              verbose_name="Исходное изображение")
+    width = models.PositiveIntegerField(verbose_name="Ширина")
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, verbose_name="Формат")
+    file = models.FileField(upload_to='news_images/variants/', storage=content_addressed_storage,
+                            verbose_name="Файл")
+
+    def __str__(self):
+        return f"{self.image} — {self.format} {self.width}w"
+
+    @property
+    def mime_type(self):
+        return f"image/{self.format}"
+
+    class Meta:
+        verbose_name = "Вариант изображения новости"
+        verbose_name_plural = "Варианты изображений новостей"
+        ordering = ['format', 'width']
+        constraints = [
+            models.UniqueConstraint(fields=['image', 'format', 'width'], name='main_newsimagevariant_unique'),
+        ]
+
 
 class Application(models.Model):
     SERVICE_CHOICES = [
@@ -74,21 +136,89 @@ class Application(models.Model):
         blank=True,
         verbose_name='Пользователь'
     )
+    # Номер версии для оптимистичной блокировки: растет при каждом изменении
+    version = models.PositiveIntegerField(default=1, editable=False, verbose_name='Версия')
 
     class Meta:
         verbose_name = 'Заявка'
         verbose_name_plural = 'Заявки'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset-пагинация (main/pagination.py)
+            models.Index(fields=['created_at', 'id'], name='main_app_created_id_idx'),
+            # Фильтры списка заявок (ApplicationFilterForm)
+            models.Index(fields=['status', 'created_at'], name='main_app_status_created_idx'),
+            models.Index(fields=['service', 'created_at'], name='main_app_service_created_idx'),
+            models.Index(fields=['user', 'created_at'], name='main_app_user_created_idx'),
+        ]
 
     def __str__(self):
         return f'Заявка от {self.name} ({self.service})'
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        # Версия увеличивается в самом UPDATE (version = version + 1): два одновременных
+        # сохранения дают +2, а не одно и то же значение
+        self.version = models.F('version') + 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'version' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'version']
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=['version'])
     
     def get_status_color(self):
         return self.STATUS_COLORS.get(self.status, 'secondary')
 
+class TelegramNotification(models.Model):
+    """Исходящее уведомление в Telegram (outbox), отправляется воркером send_notifications."""
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'В очереди'),
+        (STATUS_SENT, 'Отправлено'),
+        (STATUS_FAILED, 'Ошибка'),
+    ]
+
+    application = models.ForeignKey(
+        Application,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='notifications',
+        verbose_name='Заявка'
+    )
+    chat_id = models.CharField(max_length=64, verbose_name='Чат')
+    message = models.TextField(verbose_name='Текст сообщения')
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Попыток')
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name='Следующая попытка')
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Дата отправки')
+
+    class Meta:
+        verbose_name = 'Уведомление Telegram'
+        verbose_name_plural = 'Уведомления Telegram'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='main_tgnotif_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f'Уведомление #{self.pk} ({self.get_status_display()})'
+
 class Document(models.Model):
     title = models.CharField(max_length=200)
-    file = models.FileField(upload_to='documents/')
+    file = models.FileField(upload_to='documents/', storage=content_addressed_storage)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -154,6 +284,48 @@ class CompanyRequisites(models.Model):
         verbose_name = "Реквизиты компании"
         verbose_name_plural = "Реквизиты компании"
 
+class Tariff(models.Model):
+    """Тариф на услугу для типа контейнера; расчет стоимости — main/tariffs.py."""
+    CONTAINER_TYPES = [
+        ('20dc', "20' DC"),
+        ('40dc', "40' DC"),
+        ('40hc', "40' HC"),
+        ('45hc', "45' HC"),
+    ]
+
+    UNIT_CHOICES = [
+        ('container', 'За контейнер'),
+        ('day', 'За сутки'),
+        ('km', 'За километр'),
+        ('cargo_value', '% от стоимости груза'),
+    ]
+
+    service = models.CharField(max_length=50, choices=Application.SERVICE_CHOICES, verbose_name='Услуга')
+    container_type = models.CharField(max_length=10, choices=CONTAINER_TYPES, verbose_name='Тип контейнера')
+    loaded = models.BooleanField(default=True, verbose_name='Груженый')
+    base_price = models.DecimalField(max_digits=12, decimal_places=2, default=0,
+                                     verbose_name='Базовая цена, руб.')
+    unit = models.CharField(max_length=20, choices=UNIT_CHOICES, default='container',
+                            verbose_name='Единица тарификации')
+    unit_price = models.DecimalField(max_digits=12, decimal_places=4, default=0,
+                                     verbose_name='Ставка за единицу',
+                                     help_text='Руб. за сутки/км или процент для страхования')
+    min_price = models.DecimalField(max_digits=12, decimal_places=2, default=0,
+                                    verbose_name='Минимальная цена, руб.')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Изменен')
+
+    def __str__(self):
+        state = 'груженый' if self.loaded else 'порожний'
+        return f'{self.get_service_display()} — {self.get_container_type_display()}, {state}'
+
+    class Meta:
+        verbose_name = "Тариф"
+        verbose_name_plural = "Тарифы"
+        ordering = ['service', 'container_type', '-loaded']
+        constraints = [
+            models.UniqueConstraint(fields=['service', 'container_type', 'loaded'], name='main_tariff_unique'),
+        ]
+
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     phone = models.CharField(max_length=20, verbose_name='Телефон', blank=True, null=True)
@@ -168,7 +340,7 @@ class UserProfile(models.Model):
         verbose_name_plural = 'Профили пользователей'
 
 # Сигнал для автоматического создания профиля при создании пользователя
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 @receiver(post_save, sender=User)
@@ -179,4 +351,31 @@ def create_user_profile(sender, instance, created, **kwargs):
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
     if hasattr(instance, 'profile'):
-        instance.profile.save()
\ No newline at end of file
+        instance.profile.save()
+
+# Поддержка обложки новости (News.cover) при добавлении и удалении изображений
+def refresh_news_cover(news_id):
+    """Назначает обложкой новости без обложки ее первое изображение (как news.images.first())."""
+    first_image = NewsImage.objects.filter(news_id=news_id).order_by('pk').values('pk')[:1]
+    News.objects.filter(pk=news_id, cover__isnull=True).update(cover=models.Subquery(first_image))
+
+@receiver(post_save, sender=NewsImage)
+def set_news_cover(sender, instance, created, **kwargs):
+    if created:
+        News.objects.filter(pk=instance.news_id, cover__isnull=True).update(cover=instance)
+
+@receiver(post_delete, sender=NewsImage)
+def replace_news_cover(sender, instance, **kwargs):
+    # Если удалили обложку, on_delete=SET_NULL уже обнулил ссылку
+    refresh_news_cover(instance.news_id)
+
+# Изображения и их варианты (srcset) входят в страницу новости: их изменение меняет News.updated_at
+@receiver(post_save, sender=NewsImage)
+@receiver(post_delete, sender=NewsImage)
+def touch_news_on_image_change(sender, instance, **kwargs):
+    News.objects.filter(pk=instance.news_id).update(updated_at=timezone.now())
+
+@receiver(post_save, sender=NewsImageVariant)
+@receiver(post_delete, sender=NewsImageVariant)
+def touch_news_on_variant_change(sender, instance, **kwargs):
+    News.objects.filter(images=instance.image_id).update(updated_at=timezone.now())
@@ -0,0 +1,59 @@
+# main/news_text.py
+"""
+Производные текстовые поля новости.
+
+Очищенный HTML, текст без разметки и анонсы вычисляются один раз в
+News.save() и хранятся в колонках, вместо того чтобы прогонять
+striptags/truncatechars/truncatewords при каждом рендере карточки.
+"""
+import html
+
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+from . import lazy_imports
+
+ALLOWED_TAGS = [
+    'p', 'br', 'strong', 'em', 'b', 'i', 'u', 's', 
+    'ul', 'ol', 'li', 'a', 'img', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'blockquote', 'code', 'pre', 'hr', 'span', 'div'
+]
+
+ALLOWED_ATTRIBUTES = {
+    'a': ['href', 'title', 'target'],
+    'img': ['src', 'alt', 'width', 'height', 'style'],
+    '*': ['class', 'style']
+}
+
+# Длина анонса в списке новостей, символов
+EXCERPT_LENGTH = 120
+# Длина анонса на главной, слов
+TEASER_WORDS = 20
+
+
+def sanitize_html(value: str) -> str:
+    """Удаляет из HTML теги и атрибуты, не входящие в ALLOWED_TAGS/ALLOWED_ATTRIBUTES."""
+    if not value:
+        return value or ''
+    return lazy_imports.bleach().clean(value, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, strip=True)
+
+
+def html_to_text(value: str) -> str:
+    """HTML → обычный текст (теги удалены, сущности раскодированы)."""
+    return html.unescape(strip_tags(value or ''))
+
+
+def news_text_fields(short_description: str, content: str) -> dict:
+    """
+    Вычисляет производные поля новости.
+
+    Returns:
+        dict: content_html, content_text, excerpt, teaser
+    """
+    summary = html_to_text(short_description)
+    return {
+        'content_html': sanitize_html(content),
+        'content_text': html_to_text(content),
+        'excerpt': Truncator(summary).chars(EXCERPT_LENGTH),
+        'teaser': Truncator(summary).words(TEASER_WORDS, truncate=' …'),
+    }
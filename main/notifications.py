@@ -0,0 +1,382 @@
+# main/notifications.py
+"""
+Outbox уведомлений о заявках.
+
+Представления только записывают уведомление в таблицу TelegramNotification
+в той же транзакции, что и заявку. Доставкой занимается воркер
+(manage.py send_notifications), который использует NotificationDispatcher.
+
+Под ASGI асинхронные представления дополнительно пытаются отправить
+уведомление сразу после сохранения заявки (schedule_instant_delivery) —
+на общем httpx.AsyncClient, не задерживая ответ. Неотправленное так
+уведомление остается в outbox и уходит через воркер.
+
+Интервал между сообщениями в один чат и паузу после ответа 429 воркер и
+мгновенная доставка во всех процессах соблюдают вместе: момент, раньше
+которого в чат писать нельзя, хранится в общем кэше (hold_chat). Мгновенная
+доставка занимает чат атомарно (cache.add) и, если он занят, оставляет
+уведомление воркеру.
+"""
+import asyncio
+import contextvars
+import html
+import logging
+import time
+from datetime import timedelta
+from math import ceil
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from . import lazy_imports
+from .models import Application, TelegramNotification
+from .telegram_utils import TelegramError, TelegramRetryAfter, apost_message, get_session, post_message
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+# Максимальная длина текста сообщения в Telegram
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+# Ключ кэша: момент (time.time), раньше которого в чат не пишет ни один процесс
+CHAT_READY_KEY = 'main:telegram:chat_ready:{}'
+
+# Выполняющиеся фоновые задачи мгновенной доставки (ссылки держим, чтобы задачи не собрал GC)
+_instant_tasks: Set[asyncio.Task] = set()
+
+
+def _chat_hold(chat_id: str, seconds: float) -> tuple:
+    # Redis хранит таймаут в целых секундах; точный момент — в значении
+    return CHAT_READY_KEY.format(chat_id), time.time() + seconds, max(1, ceil(seconds))
+
+
+def chat_wait(chat_id: str) -> float:
+    """Сколько секунд чат еще занят (пишет другой процесс или действует пауза Telegram)."""
+    ready_at = cache.get(CHAT_READY_KEY.format(chat_id))
+    return max(0.0, ready_at - time.time()) if ready_at else 0.0
+
+
+def hold_chat(chat_id: str, seconds: float) -> None:
+    """Запрещает всем процессам писать в чат seconds секунд."""
+    key, ready_at, timeout = _chat_hold(chat_id, seconds)
+    cache.set(key, ready_at, timeout)
+
+
+async def atry_hold_chat(chat_id: str, seconds: float) -> bool:
+    """Занимает свободный чат на seconds секунд; False — в чат недавно писали."""
+    key, ready_at, timeout = _chat_hold(chat_id, seconds)
+    return await cache.aadd(key, ready_at, timeout)
+
+
+async def ahold_chat(chat_id: str, seconds: float) -> None:
+    key, ready_at, timeout = _chat_hold(chat_id, seconds)
+    await cache.aset(key, ready_at, timeout)
+
+
+def build_application_message(application: Application) -> str:
+    """
+    Формирует текст уведомления о новой заявке.
+
+    Args:
+        application: Объект заявки Application
+
+    Returns:
+        str: Текст сообщения с HTML разметкой
+    """
+    # Получаем название услуги
+    service_display = dict(Application.SERVICE_CHOICES).get(application.service, application.service)
+
+    # Определяем тип пользователя
+    user_type = "Зарегистрированный пользователь" if application.user else "Анонимный пользователь"
+    username = f"@{application.user.username}" if application.user else "Не указан"
+
+    return f"""
+🚀 <b>НОВАЯ ЗАЯВКА</b>
+
+👤 <b>Имя:</b> {html.escape(application.name)}
+📧 <b>Email:</b> {html.escape(application.email)}
+📞 <b>Телефон:</b> {html.escape(application.phone)}
+
+🛠 <b>Услуга:</b> {service_display}
+📅 <b>Дата:</b> {timezone.localtime(application.created_at).strftime('%d.%m.%Y %H:%M')}
+
+👥 <b>Тип:</b> {user_type}
+🔗 <b>Логин:</b> {html.escape(username)}
+🆔 <b>ID заявки:</b> #{application.id}
+        """
+
+
+def enqueue_application_notification(application: Application) -> Optional[TelegramNotification]:
+    """
+    Ставит уведомление о новой заявке в очередь на отправку.
+
+    Вызывается внутри транзакции, сохраняющей заявку, поэтому уведомление
+    появляется в outbox тогда и только тогда, когда заявка зафиксирована.
+
+    Args:
+        application: Сохраненный объект заявки Application
+
+    Returns:
+        TelegramNotification | None: Запись outbox или None, если чат не настроен
+    """
+    if not settings.TELEGRAM_CHAT_ID:
+        logger.warning("Telegram chat ID not configured, notification skipped")
+        return None
+    return TelegramNotification.objects.create(
+        application=application,
+        chat_id=settings.TELEGRAM_CHAT_ID,
+        message=build_application_message(application),
+    )
+
+
+def enqueue_import_notification(created: int, failed: int, source: str) -> Optional[TelegramNotification]:
+    """
+    Ставит в очередь одно сводное уведомление об импорте заявок из таблицы
+    (вместо уведомления на каждую заявку).
+
+    Args:
+        created: Сколько заявок загружено
+        failed: Сколько строк отклонено
+        source: Имя загруженного файла
+
+    Returns:
+        TelegramNotification | None: Запись outbox или None, если чат не настроен
+    """
+    if not settings.TELEGRAM_CHAT_ID:
+        logger.warning("Telegram chat ID not configured, notification skipped")
+        return None
+    message = (
+        f"📥 <b>ИМПОРТ ЗАЯВОК</b>\n\n"
+        f"📄 <b>Файл:</b> {html.escape(source)}\n"
+        f"✅ <b>Загружено:</b> {created}\n"
+        f"⚠️ <b>Отклонено строк:</b> {failed}"
+    )
+    return TelegramNotification.objects.create(chat_id=settings.TELEGRAM_CHAT_ID, message=message)
+
+
+async def adeliver_notification(notification: TelegramNotification) -> bool:
+    """
+    Сразу отправляет одно только что созданное уведомление.
+
+    Запись арендуется так же, как в NotificationDispatcher.claim_batch, поэтому
+    воркер не отправит ее повторно. Если в этот чат кто-либо (воркер или другой
+    процесс) писал менее TELEGRAM_CHAT_MIN_INTERVAL назад или действует пауза
+    Telegram, уведомление остается воркеру — при всплеске он объединит его со
+    сводкой. При ошибке аренда снимается, повторы с задержкой выполняет воркер.
+
+    Returns:
+        bool: True, если сообщение отправлено
+    """
+    chat_id = notification.chat_id
+    if not await atry_hold_chat(chat_id, settings.TELEGRAM_CHAT_MIN_INTERVAL):
+        return False
+
+    now = timezone.now()
+    pending = TelegramNotification.objects.filter(pk=notification.pk, status=TelegramNotification.STATUS_PENDING)
+    leased = await pending.filter(next_attempt_at__lte=now).aupdate(
+        next_attempt_at=now + timedelta(seconds=settings.TELEGRAM_OUTBOX_LEASE)
+    )
+    if not leased:
+        return False
+
+    try:
+        await apost_message(notification.message, chat_id=chat_id)
+    except TelegramRetryAfter as e:
+        logger.warning(f"Telegram flood control for chat {chat_id}: {e}")
+        await ahold_chat(chat_id, e.retry_after)
+        await pending.aupdate(next_attempt_at=timezone.now() + timedelta(seconds=e.retry_after), last_error=str(e))
+        return False
+    except (TelegramError, lazy_imports.httpx().HTTPError) as e:
+        logger.error(f"Error sending Telegram notification: {e}")
+        await pending.aupdate(next_attempt_at=timezone.now(), last_error=str(e))
+        return False
+
+    await pending.aupdate(status=TelegramNotification.STATUS_SENT, sent_at=timezone.now(), last_error='')
+    logger.info("Telegram notification sent instantly")
+    return True
+
+
+def _instant_task_done(task: asyncio.Task) -> None:
+    _instant_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Instant Telegram delivery failed: {task.exception()!r}")
+
+
+def schedule_instant_delivery(notification: TelegramNotification) -> None:
+    """
+    Запускает adeliver_notification в фоне текущего цикла событий.
+
+    Вызывать только там, где цикл живет дольше запроса (ASGI-сервер): под WSGI
+    цикл async_to_sync завершается вместе с представлением и задача бы потерялась.
+    Задача выполняется в пустом контексте, чтобы ее время не попало в метрики запроса.
+    """
+    task = asyncio.get_running_loop().create_task(
+        adeliver_notification(notification), context=contextvars.Context()
+    )
+    _instant_tasks.add(task)
+    task.add_done_callback(_instant_task_done)
+
+
+def build_digest(notifications: List[TelegramNotification]) -> List[Tuple[List[TelegramNotification], str]]:
+    """
+    Объединяет несколько уведомлений в сводные сообщения с учетом лимита длины Telegram.
+
+    Args:
+        notifications: Уведомления одного чата в порядке создания
+
+    Returns:
+        list: Пары (уведомления, вошедшие в сообщение; текст сообщения)
+    """
+    separator = "\n➖➖➖➖➖➖\n"
+    chunks: List[Tuple[List[TelegramNotification], List[str]]] = []
+    length = 0
+    for notification in notifications:
+        text = notification.message.strip()
+        if not chunks or length + len(separator) + len(text) > TELEGRAM_MESSAGE_LIMIT - 100:
+            chunks.append(([], []))
+            length = 0
+        chunks[-1][0].append(notification)
+        chunks[-1][1].append(text)
+        length += len(separator) + len(text)
+
+    return [
+        (items, f"📦 <b>СВОДКА: {len(items)} новых заявок</b>\n\n" + separator.join(texts))
+        for items, texts in chunks
+    ]
+
+
+class NotificationDispatcher:
+    """
+    Доставляет уведомления из outbox в Telegram.
+
+    • Использует одну HTTP-сессию с пулом соединений.
+    • Соблюдает минимальный интервал между сообщениями в один чат
+      и паузу, которую Telegram возвращает при ответе 429, — вместе
+      с мгновенной доставкой и другими воркерами (общий кэш, hold_chat).
+    • При всплеске заявок объединяет их в сводное сообщение.
+    • Повторяет неудачные отправки с экспоненциальной задержкой.
+    """
+
+    def __init__(self, session: Optional['requests.Session'] = None,
+                 batch_size: Optional[int] = None,
+                 sleep: Callable[[float], None] = time.sleep,
+                 clock: Callable[[], float] = time.monotonic):
+        self.session = session or get_session()
+        self.batch_size = batch_size or settings.TELEGRAM_OUTBOX_BATCH_SIZE
+        self.digest_threshold = settings.TELEGRAM_DIGEST_THRESHOLD
+        self.chat_interval = settings.TELEGRAM_CHAT_MIN_INTERVAL
+        self.max_attempts = settings.TELEGRAM_MAX_ATTEMPTS
+        self.lease = timedelta(seconds=settings.TELEGRAM_OUTBOX_LEASE)
+        self.sleep = sleep
+        self.clock = clock
+        # Момент (по clock), раньше которого нельзя писать в чат
+        self._chat_ready_at: Dict[str, float] = {}
+
+    def claim_batch(self) -> List[TelegramNotification]:
+        """
+        Забирает пачку готовых к отправке уведомлений.
+
+        Строки блокируются на время короткой транзакции и получают аренду
+        (next_attempt_at сдвигается на TELEGRAM_OUTBOX_LEASE), поэтому
+        параллельные воркеры их не возьмут, а после падения воркера
+        они снова станут доступны. HTTP-запросы выполняются уже вне транзакции.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                TelegramNotification.objects
+                .select_for_update(skip_locked=True)
+                .filter(status=TelegramNotification.STATUS_PENDING, next_attempt_at__lte=now)
+                .order_by('created_at')[:self.batch_size]
+            )
+            if batch:
+                TelegramNotification.objects.filter(pk__in=[n.pk for n in batch]).update(
+                    next_attempt_at=now + self.lease
+                )
+        return batch
+
+    def dispatch_once(self) -> int:
+        """
+        Обрабатывает одну пачку уведомлений.
+
+        Returns:
+            int: Количество обработанных записей outbox
+        """
+        request_error = lazy_imports.requests().exceptions.RequestException
+        batch = self.claim_batch()
+        by_chat: Dict[str, List[TelegramNotification]] = {}
+        for notification in batch:
+            by_chat.setdefault(notification.chat_id, []).append(notification)
+
+        for chat_id, notifications in by_chat.items():
+            if len(notifications) >= self.digest_threshold:
+                messages = build_digest(notifications)
+            else:
+                messages = [([n], n.message) for n in notifications]
+
+            for position, (items, text) in enumerate(messages):
+                try:
+                    self._send(chat_id, text)
+                except TelegramRetryAfter as e:
+                    logger.warning(f"Telegram flood control for chat {chat_id}: {e}")
+                    self._chat_ready_at[chat_id] = self.clock() + e.retry_after
+                    hold_chat(chat_id, e.retry_after)
+                    # Оставшиеся сообщения чата откладываем без штрафа за попытку
+                    rest = [n for pending, _ in messages[position:] for n in pending]
+                    self._reschedule(rest, timedelta(seconds=e.retry_after), str(e))
+                    break
+                except (TelegramError, request_error) as e:
+                    logger.error(f"Error sending Telegram notification: {e}")
+                    self._mark_failed_attempt(items, str(e))
+                else:
+                    self._mark_sent(items)
+        return len(batch)
+
+    def _send(self, chat_id: str, text: str) -> None:
+        """Отправляет сообщение, выдерживая интервал для чата (свой и общий для процессов)."""
+        wait = max(self._chat_ready_at.get(chat_id, 0) - self.clock(), chat_wait(chat_id))
+        if wait > 0:
+            self.sleep(wait)
+        hold_chat(chat_id, self.chat_interval)
+        try:
+            post_message(text, chat_id=chat_id, session=self.session)
+        finally:
+            self._chat_ready_at[chat_id] = self.clock() + self.chat_interval
+
+    def _mark_sent(self, notifications: List[TelegramNotification]) -> None:
+        TelegramNotification.objects.filter(pk__in=[n.pk for n in notifications]).update(
+            status=TelegramNotification.STATUS_SENT,
+            sent_at=timezone.now(),
+            last_error='',
+        )
+        logger.info(f"Telegram notifications sent: {len(notifications)}")
+
+    def _reschedule(self, notifications: List[TelegramNotification], delay: timedelta, error: str) -> None:
+        TelegramNotification.objects.filter(pk__in=[n.pk for n in notifications]).update(
+            next_attempt_at=timezone.now() + delay,
+            last_error=error,
+        )
+
+    def _mark_failed_attempt(self, notifications: List[TelegramNotification], error: str) -> None:
+        now = timezone.now()
+        for notification in notifications:
+            notification.attempts += 1
+            notification.last_error = error
+            if notification.attempts >= self.max_attempts:
+                notification.status = TelegramNotification.STATUS_FAILED
+            else:
+                notification.next_attempt_at = now + self.backoff(notification.attempts)
+        TelegramNotification.objects.bulk_update(
+            notifications, ['attempts', 'last_error', 'status', 'next_attempt_at']
+        )
+
+    @staticmethod
+    def backoff(attempts: int) -> timedelta:
+        """Экспоненциальная задержка перед повторной попыткой: 5 с, 10 с, 20 с ... до часа."""
+        base = settings.TELEGRAM_RETRY_BASE_DELAY
+        return timedelta(seconds=min(base * 2 ** (attempts - 1), settings.TELEGRAM_RETRY_MAX_DELAY))
@@ -0,0 +1,182 @@
+# main/page_cache.py
+"""
+Кэш целых страниц для анонимных посетителей.
+
+Публичные страницы (главная, новости, реквизиты, калькулятор) одинаковы для
+всех анонимных пользователей, поэтому готовый HTML хранится в общем кэше
+Django и отдается без рендера шаблона и запросов к БД.
+
+• Ключ страницы содержит номер версии; сигналы post_save/post_delete моделей,
+  которые видны на этих страницах, увеличивают версию, и все старые записи
+  перестают использоваться (истекают сами по PAGE_CACHE_TIMEOUT).
+• В ключ входят путь и только те параметры строки запроса, которые читает
+  представление (query_params декоратора, например cursor у списка новостей).
+  Запросы с любыми другими параметрами (?utm_source=..., мусор от ботов) кэш
+  не используют: иначе каждый новый набор параметров заводил бы новую запись.
+• Авторизованные пользователи, запросы не GET/HEAD и запросы с ожидающими
+  flash-сообщениями кэш не используют: такие страницы отличаются от общей.
+• CSRF: при рендере для кэша {% csrf_token %} выводит заглушку (контекстный
+  процессор csrf_placeholder), а при каждой отдаче заглушка заменяется на
+  токен текущего посетителя — get_token() заодно выставит ему CSRF-cookie.
+• Защита от лавины промахов: страницу рендерит только один воркер (блокировка
+  через cache.add), остальные ждут появления записи до PAGE_CACHE_LOCK_WAIT секунд.
+"""
+import hashlib
+import time
+from functools import wraps
+from typing import Iterable
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.html import format_html
+
+from .models import CompanyRequisites, News, NewsImage, NewsImageVariant
+from .versioning import CacheVersion
+
+PAGE_CACHE_VERSION_KEY = 'main:page_cache:version'
+
+# Заглушка на месте CSRF-токена в закэшированном HTML
+CSRF_PLACEHOLDER = 'page-cache-csrf-token-placeholder'
+
+# Сколько ждать между проверками кэша, пока страницу рендерит другой воркер
+LOCK_POLL_INTERVAL = 0.05
+
+_version = CacheVersion(PAGE_CACHE_VERSION_KEY, 'PAGE_CACHE_VERSION_TTL')
+
+
+def get_version() -> int:
+    """Текущая версия кэша страниц."""
+    return _version.get()
+
+
+def bump_version() -> None:
+    """Делает недействительными все закэшированные страницы."""
+    _version.bump()
+
+
+def page_cache_key(request, url_name: str, version: int, query_params: Iterable[str] = ()) -> str:
+    """Ключ страницы: путь и значения параметров query_params в отсортированном порядке."""
+    parts = [request.path]
+    for name in sorted(query_params):
+        for value in request.GET.getlist(name):
+            parts.append(f'{name}={value}')
+    digest = hashlib.md5('\0'.join(parts).encode()).hexdigest()
+    return f'main:page:{version}:{url_name}:{digest}'
+
+
+def is_cacheable_request(request, query_params: Iterable[str] = ()) -> bool:
+    """Можно ли отдать запросу общую для всех анонимных посетителей страницу."""
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if not set(request.GET).issubset(query_params):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # len() не помечает сообщения прочитанными — они покажутся при обычном рендере
+    return len(get_messages(request)) == 0
+
+
+def _build_response(request, entry: dict, state: str) -> HttpResponse:
+    content = entry['content']
+    if entry['csrf']:
+        content = content.replace(CSRF_PLACEHOLDER.encode(), get_token(request).encode())
+    response = HttpResponse(content, content_type=entry['content_type'])
+    response['X-Page-Cache'] = state
+    return response
+
+
+def _is_cacheable_response(response) -> bool:
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not response.has_header('Cache-Control')
+    )
+
+
+def cache_anonymous_page(url_name: str, query_params: Iterable[str] = ()):
+    """
+    Декоратор представления: кэширует страницу для анонимных посетителей.
+
+    Args:
+        url_name: Имя URL представления, входит в ключ кэша
+        query_params: Параметры строки запроса, которые читает представление
+    """
+    query_params = frozenset(query_params)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not settings.PAGE_CACHE_ENABLED or not is_cacheable_request(request, query_params):
+                return view(request, *args, **kwargs)
+
+            key = page_cache_key(request, url_name, get_version(), query_params)
+            entry = cache.get(key)
+            if entry is not None:
+                return _build_response(request, entry, 'hit')
+
+            lock_key = f'{key}:lock'
+            if not cache.add(lock_key, 1, settings.PAGE_CACHE_LOCK_TIMEOUT):
+                # Страницу уже рендерит другой воркер — ждем его результат
+                deadline = time.monotonic() + settings.PAGE_CACHE_LOCK_WAIT
+                while time.monotonic() < deadline:
+                    time.sleep(LOCK_POLL_INTERVAL)
+                    entry = cache.get(key)
+                    if entry is not None:
+                        return _build_response(request, entry, 'hit')
+                return view(request, *args, **kwargs)
+
+            try:
+                request._page_cache_render = True
+                response = view(request, *args, **kwargs)
+                request._page_cache_render = False
+                if not _is_cacheable_response(response):
+                    if not response.streaming and CSRF_PLACEHOLDER.encode() in response.content:
+                        response.content = response.content.replace(
+                            CSRF_PLACEHOLDER.encode(), get_token(request).encode()
+                        )
+                    return response
+                entry = {
+                    'content': response.content,
+                    'content_type': response['Content-Type'],
+                    'csrf': CSRF_PLACEHOLDER.encode() in response.content,
+                }
+                cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+            finally:
+                cache.delete(lock_key)
+            return _build_response(request, entry, 'miss')
+        return wrapper
+    return decorator
+
+
+def csrf_placeholder(request):
+    """
+    Контекстный процессор: при рендере страницы для кэша подставляет
+    заглушку вместо CSRF-токена (токен у каждого посетителя свой).
+    """
+    if getattr(request, '_page_cache_render', False):
+        return {
+            'csrf_token': CSRF_PLACEHOLDER,
+            # {{ csrf_input }} в шаблонах Jinja2
+            'csrf_input': format_html('<input type="hidden" name="csrfmiddlewaretoken" value="{}">', CSRF_PLACEHOLDER),
+        }
+    return {}
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+@receiver(post_save, sender=NewsImage)
+@receiver(post_delete, sender=NewsImage)
+@receiver(post_save, sender=NewsImageVariant)
+@receiver(post_delete, sender=NewsImageVariant)
+@receiver(post_save, sender=CompanyRequisites)
+@receiver(post_delete, sender=CompanyRequisites)
+def public_content_changed(sender, **kwargs):
+    """Изменилось содержимое публичных страниц — сбрасываем кэш после фиксации."""
+    transaction.on_commit(bump_version)
@@ -0,0 +1,139 @@
+# main/pagination.py
+"""
+Keyset (курсорная) пагинация по паре полей (created_at, id).
+
+В отличие от Paginator не выполняет COUNT и OFFSET: каждая страница —
+это диапазонный запрос по индексу (created_at, id) от ключа последней
+(или первой) записи предыдущей страницы. Стоимость страницы не зависит
+от ее номера. Ключ передается в URL непрозрачным курсором ?cursor=...
+"""
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from django.db.models import Model, Q, QuerySet
+
+# Направление курсора: следующая или предыдущая страница
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction: str, obj: Model, field: str = 'created_at') -> str:
+    """Кодирует ключ записи в непрозрачный курсор для URL."""
+    raw = f'{direction}|{getattr(obj, field).isoformat()}|{obj.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, datetime, int]]:
+    """
+    Декодирует курсор.
+
+    Returns:
+        tuple | None: (направление, значение поля, pk) или None для некорректного курсора
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        direction, value, pk = raw.split('|')
+        if direction not in (NEXT, PREVIOUS):
+            return None
+        return direction, datetime.fromisoformat(value), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    """Страница keyset-пагинации; в шаблонах ведет себя как список объектов."""
+
+    def __init__(self, object_list: List[Model], has_next: bool, has_previous: bool, field: str):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.field = field
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self) -> Optional[str]:
+        if not self._has_next:
+            return None
+        return encode_cursor(NEXT, self.object_list[-1], self.field)
+
+    @property
+    def previous_cursor(self) -> Optional[str]:
+        if not self._has_previous:
+            return None
+        return encode_cursor(PREVIOUS, self.object_list[0], self.field)
+
+
+class KeysetPaginator:
+    """
+    Пагинатор по (field, pk), по умолчанию по убыванию.
+
+    Пример:
+        page_obj = KeysetPaginator(News.objects.all(), 5).get_page(request.GET.get('cursor'))
+    """
+
+    def __init__(self, queryset: QuerySet, per_page: int, field: str = 'created_at', descending: bool = True):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+        self.descending = descending
+
+    def get_page(self, cursor: Optional[str] = None) -> KeysetPage:
+        """
+        Возвращает страницу по курсору; без курсора или с некорректным курсором — первую.
+
+        Args:
+            cursor: Значение параметра ?cursor= из URL
+
+        Returns:
+            KeysetPage: Страница с объектами и курсорами соседних страниц
+        """
+        field = self.field
+        sign = '-' if self.descending else ''
+        forward_order = (f'{sign}{field}', f'{sign}pk')
+        key = decode_cursor(cursor)
+
+        if key is None:
+            rows = list(self.queryset.order_by(*forward_order)[:self.per_page + 1])
+            return KeysetPage(rows[:self.per_page], len(rows) > self.per_page, False, field)
+
+        direction, value, pk = key
+        # Сравнение "после ключа" в порядке выдачи и обратное ему
+        after, before = ('lt', 'gt') if self.descending else ('gt', 'lt')
+        if direction == NEXT:
+            rows = list(
+                self.queryset
+                .filter(Q(**{f'{field}__{after}': value}) | Q(**{field: value, f'pk__{after}': pk}))
+                .order_by(*forward_order)[:self.per_page + 1]
+            )
+            return KeysetPage(rows[:self.per_page], len(rows) > self.per_page, True, field)
+
+        backward_order = tuple(o[1:] if o.startswith('-') else f'-{o}' for o in forward_order)
+        rows = list(
+            self.queryset
+            .filter(Q(**{f'{field}__{before}': value}) | Q(**{field: value, f'pk__{before}': pk}))
+            .order_by(*backward_order)[:self.per_page + 1]
+        )
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return KeysetPage(rows, True, has_previous, field)
@@ -0,0 +1,277 @@
+# main/rate_limit.py
+"""
+Ограничение частоты запросов и сброс нагрузки.
+
+RateLimitMiddleware — token bucket в кэше (общий для всех воркеров при Redis)
+для POST-запросов к маршрутам из RATE_LIMITS, отдельно по IP клиента и по
+учетной записи:
+
+    RATE_LIMITS = {
+        'login': {'ip': '20/m', 'account': '5/m'},
+    }
+
+Частота '<количество>/<период>' — емкость корзины и время ее полного
+пополнения: s, m, h, d или с множителем ('10/15m'). Учетная запись —
+вошедший пользователь, а для входа и регистрации — введенное имя пользователя,
+поэтому перебор паролей одного аккаунта с разных IP тоже ограничивается.
+Превышение — ответ 429 с Retry-After. Чтение и запись корзины не атомарны:
+при одновременных запросах лимит может быть превышен на единицы.
+
+ConcurrencyLimitMiddleware сразу отвечает 503 с Retry-After, когда в процессе
+выполняется CONCURRENCY_LIMIT запросов или запрос уже простоял в очереди
+прокси дольше CONCURRENCY_MAX_QUEUE_TIME (заголовок X-Request-Start), —
+вместо того чтобы держать его до таймаута.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from math import ceil
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_KEY_PREFIX = 'ratelimit'
+
+_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+_RATE_RE = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*([smhd])\s*$')
+
+
+@dataclass(frozen=True)
+class Rate:
+    """Емкость корзины и время ее полного пополнения в секундах."""
+    capacity: int
+    period: float
+
+
+@lru_cache(maxsize=None)
+def parse_rate(value: str) -> Rate:
+    """
+    Разбирает частоту вида '5/m', '100/h', '10/15m'.
+
+    Raises:
+        ValueError: Если формат неверный
+    """
+    match = _RATE_RE.match(value)
+    if not match or int(match.group(1)) < 1:
+        raise ValueError(f'Неверная частота: {value!r}')
+    return Rate(int(match.group(1)), int(match.group(2) or 1) * _PERIODS[match.group(3)])
+
+
+def take_token(key: str, rate: Rate, now: Optional[float] = None) -> float:
+    """
+    Берет токен из корзины key.
+
+    Корзина хранится в кэше парой (токенов, время обновления) и пополняется
+    равномерно; через period без запросов запись истекает — корзина снова полная.
+
+    Returns:
+        float: 0, если токен взят, иначе через сколько секунд появится следующий
+    """
+    now = time.time() if now is None else now
+    state = cache.get(key)
+    tokens, updated_at = state if state else (rate.capacity, now)
+    tokens = min(rate.capacity, tokens + max(0.0, now - updated_at) * rate.capacity / rate.period)
+    if tokens < 1:
+        return (1 - tokens) * rate.period / rate.capacity
+    cache.set(key, (tokens - 1, now), timeout=ceil(rate.period))
+    return 0.0
+
+
+def client_ip(request: HttpRequest) -> str:
+    """
+    IP клиента. За RATE_LIMIT_TRUSTED_PROXIES прокси (Render — один) адрес берется
+    из X-Forwarded-For, который дополнил ближайший к приложению прокси:
+    значения левее подставляет сам клиент, им верить нельзя.
+    """
+    proxies = settings.RATE_LIMIT_TRUSTED_PROXIES
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and forwarded:
+        addresses = [address.strip() for address in forwarded.split(',') if address.strip()]
+        if addresses:
+            return addresses[-min(proxies, len(addresses))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def account_key(request: HttpRequest, user) -> Optional[str]:
+    """Учетная запись запроса: вошедший пользователь или имя из формы входа/регистрации."""
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    username = request.POST.get('username', '').strip().lower()
+    return f'username:{username}' if username else None
+
+
+def _bucket_key(url_name: str, scope: str, value: str) -> str:
+    digest = hashlib.sha256(value.encode()).hexdigest()[:32]
+    return f'{RATE_LIMIT_KEY_PREFIX}:{url_name}:{scope}:{digest}'
+
+
+def check_rate_limits(request: HttpRequest, url_name: str, limits: dict, user=None) -> Optional[HttpResponse]:
+    """
+    Проверяет лимиты маршрута (ключи 'ip' и 'account' из RATE_LIMITS).
+
+    Returns:
+        HttpResponse | None: Ответ 429, если лимит исчерпан
+    """
+    values = {'ip': client_ip(request)}
+    if 'account' in limits:
+        values['account'] = account_key(request, user)
+    for scope, rate in limits.items():
+        value = values.get(scope)
+        if not value:
+            continue
+        retry_after = take_token(_bucket_key(url_name, scope, value), parse_rate(rate))
+        if retry_after:
+            logger.info(f"Rate limit {url_name}/{scope} exceeded for {value}")
+            return too_many_requests(request, retry_after)
+    return None
+
+
+def too_many_requests(request: HttpRequest, retry_after: float) -> HttpResponse:
+    """Ответ 429: JSON для JSON-запросов, иначе текст."""
+    message = 'Слишком много запросов, повторите попытку позже'
+    if request.content_type == 'application/json':
+        response = JsonResponse({'success': False, 'error': message}, status=429)
+    else:
+        response = HttpResponse(message, status=429, content_type='text/plain; charset=utf-8')
+    response['Retry-After'] = str(max(1, ceil(retry_after)))
+    return response
+
+
+def service_unavailable(retry_after: int) -> HttpResponse:
+    """Быстрый ответ 503 при перегрузке."""
+    response = HttpResponse('Сервер перегружен, повторите запрос позже', status=503,
+                            content_type='text/plain; charset=utf-8')
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+class RateLimitMiddleware:
+    """Лимиты RATE_LIMITS по имени URL; должен стоять после AuthenticationMiddleware."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _limits(request: HttpRequest) -> Optional[tuple]:
+        """Имя URL и его лимиты; маршрут определяется только для методов из RATE_LIMIT_METHODS."""
+        if not settings.RATE_LIMIT_ENABLED or request.method not in settings.RATE_LIMIT_METHODS:
+            return None
+        try:
+            match = resolve(request.path_info, getattr(request, 'urlconf', None))
+        except Resolver404:
+            return None
+        limits = settings.RATE_LIMITS.get(match.url_name)
+        return (match.url_name, limits) if limits else None
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        found = self._limits(request)
+        if found:
+            url_name, limits = found
+            user = request.user if 'account' in limits else None
+            response = check_rate_limits(request, url_name, limits, user)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        found = self._limits(request)
+        if found:
+            url_name, limits = found
+            user = await request.auser() if 'account' in limits else None
+            response = await sync_to_async(check_rate_limits)(request, url_name, limits, user)
+            if response is not None:
+                return response
+        return await self.get_response(request)
+
+
+def queue_time(request: HttpRequest, now: Optional[float] = None) -> Optional[float]:
+    """
+    Сколько секунд запрос ждал в очереди прокси по заголовку X-Request-Start
+    ('t=1700000000.123' — секунды, как у nginx, или миллисекунды/микросекунды числом).
+    """
+    value = request.META.get('HTTP_X_REQUEST_START', '')
+    if value.startswith('t='):
+        value = value[2:]
+    try:
+        started = float(value)
+    except ValueError:
+        return None
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return max(0.0, (time.time() if now is None else now) - started)
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Сброс нагрузки: не больше CONCURRENCY_LIMIT одновременных запросов в процессе
+    (для потоковых ответов учитывается время до начала отдачи тела).
+    Ставится сразу после RequestMetricsMiddleware, чтобы 503 попадали в метрики.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _enter(self, request: HttpRequest) -> bool:
+        """Занимает место для запроса; False — запрос нужно отклонить."""
+        max_queue_time = settings.CONCURRENCY_MAX_QUEUE_TIME
+        if max_queue_time:
+            waited = queue_time(request)
+            if waited is not None and waited > max_queue_time:
+                return False
+        with self._lock:
+            if settings.CONCURRENCY_LIMIT and self.in_flight >= settings.CONCURRENCY_LIMIT:
+                return False
+            self.in_flight += 1
+            return True
+
+    def _exit(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def _shed(self, request: HttpRequest) -> HttpResponse:
+        logger.warning(f"Load shedding: {request.method} {request.path} rejected, in flight {self.in_flight}")
+        return service_unavailable(settings.CONCURRENCY_RETRY_AFTER)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self._enter(request):
+            return self._shed(request)
+        try:
+            return self.get_response(request)
+        finally:
+            self._exit()
+
+    async def __acall__(self, request):
+        if not self._enter(request):
+            return self._shed(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            self._exit()
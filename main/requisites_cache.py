@@ -0,0 +1,83 @@
+# main/requisites_cache.py
+"""
+Кэшированный доступ к единственной записи CompanyRequisites.
+
+Реквизиты нужны почти каждому шаблону (контекстный процессор base_context),
+а меняются только через админку. Значение хранится в общем кэше Django
+(виден всем воркерам) и дополнительно в памяти процесса на
+REQUISITES_LOCAL_TTL секунд, так что страница рендерится без запросов к БД.
+
+Оба уровня привязаны к версии кэша страниц (main/page_cache.py), которую
+увеличивает изменение реквизитов в любом воркере: с новой версией реквизиты
+перечитываются из БД, и страница, закэшированная под новой версией, не
+получит старый подвал из памяти процесса.
+"""
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CompanyRequisites
+from .page_cache import get_version
+
+REQUISITES_CACHE_KEY = 'main:company_requisites'
+
+# Маркер отсутствия значения (None — допустимое закэшированное значение: реквизитов нет)
+_MISSING = object()
+
+_local_lock = threading.Lock()
+_local_value = _MISSING
+_local_version = None
+_local_expires_at = 0.0
+
+
+def get_company_requisites() -> Optional[CompanyRequisites]:
+    """
+    Возвращает реквизиты компании из кэша, при промахе — из БД.
+
+    Returns:
+        CompanyRequisites | None: Первая запись реквизитов или None, если их нет
+    """
+    global _local_value, _local_version, _local_expires_at
+    now = time.monotonic()
+    version = get_version()
+    with _local_lock:
+        value = _local_value
+        fresh = _local_version == version and now < _local_expires_at
+    if value is not _MISSING and fresh:
+        return value
+
+    key = f'{REQUISITES_CACHE_KEY}:{version}'
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = CompanyRequisites.objects.first()
+        # Записи прежних версий истекают вместе со страницами
+        cache.set(key, value, settings.PAGE_CACHE_TIMEOUT)
+
+    with _local_lock:
+        _local_value = value
+        _local_version = version
+        _local_expires_at = now + settings.REQUISITES_LOCAL_TTL
+    return value
+
+
+def invalidate_company_requisites() -> None:
+    """
+    Сбрасывает копию реквизитов в памяти текущего процесса. Другие воркеры и
+    общий кэш переходят на новые реквизиты вместе с версией кэша страниц.
+    """
+    global _local_value
+    with _local_lock:
+        _local_value = _MISSING
+
+
+@receiver(post_save, sender=CompanyRequisites)
+@receiver(post_delete, sender=CompanyRequisites)
+def company_requisites_changed(sender, **kwargs):
+    """Сброс кэша после фиксации изменений реквизитов."""
+    transaction.on_commit(invalidate_company_requisites)
@@ -0,0 +1,135 @@
+# main/requisites_pdf.py
+"""
+Кэш PDF с реквизитами компании.
+
+PDF рендерится WeasyPrint один раз для каждого состояния реквизитов
+и шаблона и хранится на диске под именем <sha256>.pdf. Хэш служит
+также сильным ETag для ответа download_requisites_pdf.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.template.loader import get_template, render_to_string
+
+from . import lazy_imports
+from .file_locks import file_lock
+from .models import CompanyRequisites
+
+logger = logging.getLogger(__name__)
+
+PDF_TEMPLATE = 'main/requisites_pdf.html'
+
+# Через сколько секунд lock-файл считается брошенным упавшим процессом
+LOCK_STALE_AFTER = 120
+LOCK_POLL_INTERVAL = 0.1
+
+_render_lock = threading.Lock()
+
+
+def requisites_fingerprint(requisites: CompanyRequisites) -> str:
+    """
+    Вычисляет хэш содержимого PDF: значения всех полей реквизитов и исходник шаблона.
+
+    Args:
+        requisites: Объект реквизитов компании
+
+    Returns:
+        str: SHA-256 в шестнадцатеричном виде
+    """
+    digest = hashlib.sha256()
+    digest.update(get_template(PDF_TEMPLATE).template.source.encode('utf-8'))
+    for field in requisites._meta.concrete_fields:
+        digest.update(b'\0' + field.attname.encode('utf-8') + b'=')
+        digest.update(str(field.value_from_object(requisites)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _pdf_path(fingerprint: str) -> str:
+    return os.path.join(settings.REQUISITES_PDF_CACHE_DIR, f'{fingerprint}.pdf')
+
+
+def _read(path: str) -> Optional[bytes]:
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """Записывает файл через временный файл и os.replace, чтобы читатели не видели неполный PDF."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _remove_stale(keep: str) -> None:
+    """Удаляет PDF, построенные для прежних версий реквизитов или шаблона."""
+    directory = os.path.dirname(keep)
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.endswith('.pdf') and path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _render(requisites: CompanyRequisites, path: str) -> bytes:
+    """Рендерит PDF, если его еще нет; одновременно рендер выполняет только один процесс."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _render_lock, file_lock(path + '.lock', LOCK_STALE_AFTER, LOCK_POLL_INTERVAL):
+        # Пока ждали блокировку, PDF мог построить другой процесс
+        data = _read(path)
+        if data is not None:
+            return data
+        html_string = render_to_string(PDF_TEMPLATE, {'requisites': requisites})
+        data = lazy_imports.weasyprint().HTML(string=html_string).write_pdf()
+        _write_atomic(path, data)
+        _remove_stale(keep=path)
+        logger.info(f"Requisites PDF rendered: {os.path.basename(path)}")
+        return data
+
+
+def get_requisites_pdf(requisites: CompanyRequisites) -> Tuple[str, bytes]:
+    """
+    Возвращает PDF реквизитов из кэша, при промахе рендерит его.
+
+    Args:
+        requisites: Объект реквизитов компании
+
+    Returns:
+        tuple: (хэш содержимого для ETag, байты PDF)
+    """
+    fingerprint = requisites_fingerprint(requisites)
+    path = _pdf_path(fingerprint)
+    data = _read(path)
+    if data is None:
+        data = _render(requisites, path)
+    return fingerprint, data
+
+
+@receiver(post_save, sender=CompanyRequisites)
+def prerender_requisites_pdf(sender, instance, **kwargs):
+    """Заранее строит PDF после сохранения реквизитов в админке."""
+    def prerender():
+        try:
+            get_requisites_pdf(instance)
+        except Exception as e:
+            # Ошибка рендера не должна ломать сохранение; PDF построится при скачивании
+            logger.error(f"Ошибка предварительного рендера PDF реквизитов: {e}")
+
+    transaction.on_commit(prerender)
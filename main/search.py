@@ -0,0 +1,212 @@
+# main/search.py
+"""
+Полнотекстовый поиск по новостям средствами СУБД.
+
+• PostgreSQL: колонка main_news.search_vector (tsvector, конфигурация 'russian')
+  с GIN-индексом; веса: заголовок A, краткое описание B, текст C.
+• SQLite: виртуальная таблица FTS5 main_news_fts (rowid = id новости).
+• Прочие СУБД или не примененная миграция: поиск icontains по заголовку и описанию.
+
+Схема создается миграцией 0012_news_search, индекс поддерживается сигналами
+post_save/post_delete модели News. Текст новости индексируется по колонке
+content_text (без HTML-тегов, см. main/news_text.py).
+"""
+import html
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+from django.db import connection, transaction
+from django.db.models import Case, Q, When
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.safestring import SafeString, mark_safe
+
+from .models import News
+from .news_text import html_to_text
+
+SEARCH_CONFIG = 'russian'
+
+# Маркеры подсветки: СУБД вставляет их в сниппет, потом они заменяются на <mark>
+# уже после экранирования текста
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+# Поля новости, нужные странице результатов
+RESULT_FIELDS = ('id', 'title', 'excerpt', 'created_at', 'cover')
+
+
+@dataclass
+class SearchResult:
+    news: News
+    rank: float
+    snippet: SafeString
+
+
+def _highlight(snippet: str) -> SafeString:
+    escaped = html.escape(snippet or '')
+    return mark_safe(escaped.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>'))
+
+
+def _fts5_query(query: str) -> Optional[str]:
+    """Строка FTS5 MATCH из пользовательского ввода: все слова, с поиском по префиксу."""
+    words = WORD_RE.findall(query)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words[:16])
+
+
+_backend_cache = {}
+
+
+def backend() -> str:
+    """Определяет доступный способ поиска: 'postgresql', 'sqlite' или 'basic'."""
+    alias = connection.alias
+    if alias not in _backend_cache:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                columns = connection.introspection.get_table_description(cursor, News._meta.db_table)
+                found = any(column.name == 'search_vector' for column in columns)
+                _backend_cache[alias] = 'postgresql' if found else 'basic'
+            elif connection.vendor == 'sqlite':
+                found = 'main_news_fts' in connection.introspection.table_names(cursor)
+                _backend_cache[alias] = 'sqlite' if found else 'basic'
+            else:
+                _backend_cache[alias] = 'basic'
+    return _backend_cache[alias]
+
+
+def index_news(news: News) -> None:
+    """Обновляет поисковый индекс одной новости."""
+    kind = backend()
+    title, short_description, content = news.title, html_to_text(news.short_description), news.content_text
+    with connection.cursor() as cursor:
+        if kind == 'postgresql':
+            cursor.execute(
+                f"""
+                UPDATE main_news SET search_vector =
+                    setweight(to_tsvector('{SEARCH_CONFIG}', %s), 'A') ||
+                    setweight(to_tsvector('{SEARCH_CONFIG}', %s), 'B') ||
+                    setweight(to_tsvector('{SEARCH_CONFIG}', %s), 'C')
+                WHERE id = %s
+                """,
+                [title, short_description, content, news.pk]
+            )
+        elif kind == 'sqlite':
+            cursor.execute("DELETE FROM main_news_fts WHERE rowid = %s", [news.pk])
+            cursor.execute(
+                "INSERT INTO main_news_fts (rowid, title, short_description, content) VALUES (%s, %s, %s, %s)",
+                [news.pk, title, short_description, content]
+            )
+
+
+def unindex_news(news_id: int) -> None:
+    """Удаляет новость из индекса (для PostgreSQL индекс удаляется вместе со строкой)."""
+    if backend() == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM main_news_fts WHERE rowid = %s", [news_id])
+
+
+def _ranked_ids(query: str, limit: int) -> List[tuple]:
+    """Возвращает [(id, rank, snippet)] в порядке релевантности."""
+    kind = backend()
+    with connection.cursor() as cursor:
+        if kind == 'postgresql':
+            # Сначала отбираем ids по GIN-индексу, сниппеты строим только для них
+            cursor.execute(
+                f"""
+                WITH q AS (SELECT websearch_to_tsquery('{SEARCH_CONFIG}', %s) AS query),
+                top AS (
+                    SELECT n.id, ts_rank(n.search_vector, q.query) AS rank, q.query
+                    FROM main_news n, q
+                    WHERE n.search_vector @@ q.query
+                    ORDER BY rank DESC, n.created_at DESC
+                    LIMIT %s
+                )
+                SELECT top.id, top.rank,
+                       ts_headline('{SEARCH_CONFIG}',
+                                   regexp_replace(n.short_description, '<[^>]*>', ' ', 'g') || ' ' || n.content_text,
+                                   top.query,
+                                   %s)
+                FROM top JOIN main_news n ON n.id = top.id
+                ORDER BY top.rank DESC
+                """,
+                [query, limit,
+                 f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords=35, MinWords=15']
+            )
+            return cursor.fetchall()
+        if kind == 'sqlite':
+            match = _fts5_query(query)
+            if not match:
+                return []
+            # bm25: меньше — релевантнее; веса колонок как у PostgreSQL (A/B/C)
+            cursor.execute(
+                """
+                SELECT rowid, -bm25(main_news_fts, 10.0, 4.0, 1.0) AS rank,
+                       snippet(main_news_fts, -1, %s, %s, '…', 24)
+                FROM main_news_fts
+                WHERE main_news_fts MATCH %s
+                ORDER BY bm25(main_news_fts, 10.0, 4.0, 1.0)
+                LIMIT %s
+                """,
+                [HIGHLIGHT_START, HIGHLIGHT_END, match, limit]
+            )
+            return cursor.fetchall()
+    return []
+
+
+def search_news_ids(query: str, limit: int = 100) -> List[int]:
+    """Ids новостей по релевантности (для админки)."""
+    return [row[0] for row in _ranked_ids(query, limit)]
+
+
+def search_news(query: str, limit: int = 20) -> List[SearchResult]:
+    """
+    Ищет новости по заголовку, краткому описанию и тексту.
+
+    Args:
+        query: Поисковая строка пользователя
+        limit: Максимальное количество результатов
+
+    Returns:
+        list[SearchResult]: Новости с рангом и подсвеченным фрагментом
+    """
+    query = (query or '').strip()
+    if not query:
+        return []
+
+    if backend() == 'basic':
+        news = (News.objects.filter(Q(title__icontains=query) | Q(short_description__icontains=query))
+                .only(*RESULT_FIELDS).select_related('cover').prefetch_related('cover__variants')
+                .order_by('-created_at')[:limit])
+        return [SearchResult(n, 0.0, _highlight(n.excerpt)) for n in news]
+
+    rows = _ranked_ids(query, limit)
+    news_by_id = (News.objects.only(*RESULT_FIELDS).select_related('cover').prefetch_related('cover__variants')
+                  .in_bulk([row[0] for row in rows]))
+    return [
+        SearchResult(news_by_id[news_id], rank, _highlight(snippet))
+        for news_id, rank, snippet in rows
+        if news_id in news_by_id
+    ]
+
+
+def ordered_by_ids(queryset, ids: List[int]):
+    """Фильтрует queryset по ids, сохраняя их порядок."""
+    if not ids:
+        return queryset.none()
+    order = Case(*[When(pk=pk, then=position) for position, pk in enumerate(ids)])
+    return queryset.filter(pk__in=ids).order_by(order)
+
+
+@receiver(post_save, sender=News)
+def news_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: index_news(instance))
+
+
+@receiver(post_delete, sender=News)
+def news_deleted(sender, instance, **kwargs):
+    news_id = instance.pk
+    transaction.on_commit(lambda: unindex_news(news_id))
@@ -0,0 +1,55 @@
+# main/sessions.py
+"""
+Сессии в подписанной cookie с переносом старых сессий из БД.
+
+SESSION_BACKEND=signed_cookies подключает этот модуль как SESSION_ENGINE:
+данные сессии хранятся в cookie, подписанной SECRET_KEY, и запросы не
+обращаются к таблице django_session.
+
+Cookie сессий, созданных до перехода (ключ из 32 символов вместо подписанного
+значения), не сбрасываются: при первом запросе сессия читается из БД,
+строка удаляется, а ответ выставляет подписанную cookie с теми же данными —
+пользователи остаются в системе. Строки, которые так и не были перенесены,
+удаляет manage.py cleanup_sessions после истечения срока.
+"""
+import logging
+import re
+
+from asgiref.sync import sync_to_async
+from django.contrib.sessions.backends.signed_cookies import SessionStore as SignedCookieSessionStore
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Формат ключа сессий django.contrib.sessions.backends.db и cached_db
+LEGACY_SESSION_KEY_RE = re.compile(r'[a-z0-9]{32}')
+
+
+class SessionStore(SignedCookieSessionStore):
+    """Подписанная cookie; сессия из БД переносится в нее при первом запросе."""
+
+    def _is_legacy(self) -> bool:
+        return bool(self.session_key) and LEGACY_SESSION_KEY_RE.fullmatch(self.session_key) is not None
+
+    def _load_legacy(self) -> dict:
+        session = Session.objects.filter(session_key=self.session_key, expire_date__gt=timezone.now()).first()
+        # Ответ запишет подписанную cookie (пустую сессию — удалит)
+        self.modified = True
+        if session is None:
+            return {}
+        data = self.decode(session.session_data)
+        # Старый ключ больше не действует: иначе после выхода им можно было бы восстановить сессию
+        Session.objects.filter(session_key=self.session_key).delete()
+        logger.info("Session moved from the database to a signed cookie")
+        return data
+
+    def load(self):
+        if self._is_legacy():
+            return self._load_legacy()
+        return super().load()
+
+    async def aload(self):
+        if self._is_legacy():
+            return await sync_to_async(self._load_legacy)()
+        return await super().aload()
@@ -0,0 +1,81 @@
+# main/spreadsheets.py
+"""
+Чтение загружаемых таблиц CSV/XLSX (тарифы, импорт заявок).
+
+Строки читаются по одной: CSV — из потока файла, XLSX — через openpyxl
+в режиме read_only, так что большой файл не загружается в память целиком.
+openpyxl (requirements.txt) загружается при первом чтении XLSX (lazy_imports.openpyxl).
+"""
+import csv
+import io
+import logging
+from typing import Iterable, Iterator, List, Optional
+
+from django.core.exceptions import ValidationError
+
+from . import lazy_imports
+
+logger = logging.getLogger(__name__)
+
+
+def _read_csv(file) -> Iterator[list]:
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    first_line = text.readline()
+    delimiter = ';' if first_line.count(';') > first_line.count(',') else ','
+    yield from csv.reader(io.StringIO(first_line), delimiter=delimiter)
+    yield from csv.reader(text, delimiter=delimiter)
+
+
+def _read_xlsx(file) -> Iterator[list]:
+    workbook = lazy_imports.openpyxl().load_workbook(file, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield ['' if value is None else value for value in row]
+    finally:
+        workbook.close()
+
+
+def read_spreadsheet(file, filename: str) -> Iterator[list]:
+    """
+    Строки таблицы CSV (разделитель «;» или «,», UTF-8) или XLSX.
+
+    Raises:
+        ValidationError: Формат не поддерживается или openpyxl не установлен (окружение
+            собрано не по requirements.txt)
+    """
+    name = filename.lower()
+    if name.endswith('.csv'):
+        return _read_csv(file)
+    if name.endswith('.xlsx'):
+        try:
+            lazy_imports.openpyxl()
+        except ImportError:
+            logger.error("openpyxl is not installed, XLSX upload rejected (see requirements.txt)")
+            raise ValidationError('Чтение XLSX сейчас недоступно — загрузите таблицу в формате CSV')
+        return _read_xlsx(file)
+    raise ValidationError('Поддерживаются файлы .csv и .xlsx')
+
+
+def header_columns(header: Iterable, model, fields: Iterable[str]) -> List[Optional[str]]:
+    """
+    Поля модели по заголовкам столбцов: заголовок — имя поля или его verbose_name
+    (без учета регистра). Для посторонних столбцов — None.
+    """
+    aliases = {}
+    for name in fields:
+        aliases[name] = name
+        aliases[str(model._meta.get_field(name).verbose_name).lower()] = name
+    return [aliases.get(str(title).strip().lower()) for title in header]
+
+
+def choice_code(value, choices, field_label: str) -> str:
+    """Код choices по коду или подписи (без учета регистра)."""
+    text = str(value).strip()
+    for code, label in choices:
+        if text == code or text.lower() == str(label).lower():
+            return code
+    raise ValidationError(f'{field_label}: неизвестное значение «{text}»')
+
+
+def is_blank_row(row: Iterable) -> bool:
+    return not any(str(value).strip() for value in row)
@@ -2,19 +2,19 @@ document.addEventListener('DOMContentLoaded', function() {
     /* =========================
        Обработчики событий
        ========================= */
+    const table = document.getElementById('applications-table');
+    if (!table) return;
+
+    const bulkUrl = table.dataset.bulkUrl;
+
     // Обработчик изменения статуса через select
     document.querySelectorAll('.status-select').forEach(select => {
+        select.dataset.current = select.value;
         select.addEventListener('change', function() {
-            const appId = this.dataset.appId;
-            const status = this.value;
-            const badge = this.closest('tr').querySelector('.badge'); // На случай, если оставим badge
-
-            updateApplicationStatus(appId, status, badge);
+            updateApplicationStatus(this.closest('tr'), this.value);
         });
     });
 
-    const table = document.getElementById('applications-table');
-
     table.addEventListener('click', function(e) {
         const row = e.target.closest('tr');
         if (!row) return;
@@ -68,105 +68,102 @@ document.addEventListener('DOMContentLoaded', function() {
         row.querySelector('.cancel-btn').style.display = 'none';
     }
 
+    /* =========================
+       Пакетное изменение заявок
+       ========================= */
+    // Отправляет строки {id, version, ...} одним запросом и возвращает результат по каждой строке
+    function sendBulkUpdate(items) {
+        const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]').value;
+
+        return fetch(bulkUrl, {
+            method: 'POST',
+            body: JSON.stringify(items),
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': csrfToken,
+                'X-Requested-With': 'XMLHttpRequest',
+                'Accept': 'application/json'
+            }
+        })
+        .then(response => response.json().then(data => {
+            if (!response.ok || !data.success) {
+                throw new Error(data.error || 'Ошибка сервера');
+            }
+            return data.results;
+        }));
+    }
+
+    // Переносит в строку таблицы состояние заявки из ответа сервера
+    function applyRowState(row, state) {
+        if (!state.version) return;
+
+        row.dataset.version = state.version;
+
+        const select = row.querySelector('.status-select');
+        select.value = state.status;
+        select.dataset.current = state.status;
+
+        row.querySelector('[data-field="name"]').textContent = state.fields.name;
+        row.querySelector('[data-field="email"]').textContent = state.fields.email;
+        row.querySelector('[data-field="phone"]').textContent = state.fields.phone;
+        row.querySelector('[data-field="service_display"]').textContent = state.fields.service_display;
+
+        row.querySelector('.edit-mode [name="name"]').value = state.fields.name;
+        row.querySelector('.edit-mode [name="email"]').value = state.fields.email;
+        row.querySelector('.edit-mode [name="phone"]').value = state.fields.phone;
+        row.querySelector('.edit-mode [name="service"]').value = state.fields.service;
+    }
+
+    function resultError(result) {
+        if (result.error) return result.error;
+        return Object.entries(result.errors || {})
+            .map(([field, errors]) => `${field}: ${errors.join(' ')}`)
+            .join('; ') || 'Ошибка при обновлении';
+    }
+
     /* =========================
        Сохранение изменений
        ========================= */
     function saveChanges(row, appId) {
-        const formData = new FormData();
+        const item = { id: Number(appId), version: Number(row.dataset.version) };
 
         // Собираем данные из полей редактирования
-        row.querySelectorAll('.edit-mode input, .edit-mode select').forEach(field => {
-            formData.append(field.name, field.value);
+        row.querySelectorAll('.edit-mode input[type="text"], .edit-mode input[type="email"], ' +
+                             '.edit-mode input[type="tel"], .edit-mode select').forEach(field => {
+            item[field.name] = field.value;
         });
 
-        // Добавляем CSRF токен
-        const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]').value;
-        formData.append('csrfmiddlewaretoken', csrfToken);
-
-        // Отправляем на сервер
-        fetch(`/applications/${appId}/update/`, {
-            method: 'POST',
-            body: formData,
-            headers: { 'X-Requested-With': 'XMLHttpRequest' }
-        })
-        .then(response => response.json())
-        .then(data => {
-            if (data.success) {
-                // Обновляем данные в режиме просмотра
-                row.querySelector('td:nth-child(1)').textContent = data.fields.name;
-                row.querySelector('td:nth-child(2)').textContent = data.fields.email;
-                row.querySelector('td:nth-child(3)').textContent = data.fields.phone;
-                row.querySelector('td:nth-child(4)').textContent = data.fields.service_display;
-
-                // Обновляем статус
-                const statusBadge = row.querySelector('td:nth-child(6) .badge');
-                if (data.fields.is_processed) {
-                    statusBadge.className = 'badge bg-success';
-                    statusBadge.textContent = 'Обработано';
-                } else {
-                    statusBadge.className = 'badge bg-warning text-dark';
-                    statusBadge.textContent = 'В ожидании';
-                }
-
+        sendBulkUpdate([item])
+        .then(([result]) => {
+            applyRowState(row, result);
+            if (result.success) {
                 disableEditMode(row);
-
-                // Показываем уведомление
                 showToast('Заявка успешно обновлена', 'success');
             } else {
-                showToast('Ошибка при обновлении', 'danger');
+                showToast(resultError(result), result.conflict ? 'warning' : 'danger');
             }
         })
         .catch(error => {
             console.error('Error:', error);
-            showToast('Ошибка при обновлении', 'danger');
+            showToast(error.message || 'Ошибка при обновлении', 'danger');
         });
     }
 
     /* =========================
        Обновление статуса
        ========================= */
-    function updateApplicationStatus(appId, status, badgeElement) {
-        // Подготавливаем данные для отправки
-        const formData = new FormData();
-        formData.append('status', status);
-
-        // Добавляем CSRF токен с проверкой его наличия
-        const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]').value;
-        if (!csrfToken) {
-            showToast('Ошибка CSRF токена', 'danger');
-            return;
-        }
-        formData.append('csrfmiddlewaretoken', csrfToken);
-
-        // Отправляем запрос на сервер
-        fetch(`/applications/${appId}/update-status/`, {
-            method: 'POST',
-            body: formData,
-            headers: {
-                'X-Requested-With': 'XMLHttpRequest',
-                'Accept': 'application/json'
-            }
-        })
-        .then(response => {
-            if (!response.ok) {
-                return response.json().then(err => {
-                    console.error('Server error:', err);
-                    throw new Error(err.error || 'Ошибка сервера');
-                });
-            }
-            return response.json();
-        })
-        .then(data => {
-            if (data.success) {
-                // Обновляем выбранный статус в select (на случай, если сервер вернул другой статус)
-                const select = document.querySelector(`.status-select[data-app-id="${appId}"]`);
-                if (select) {
-                    select.value = data.status;
-                }
+    function updateApplicationStatus(row, status) {
+        const select = row.querySelector('.status-select');
+        const item = { id: Number(row.dataset.appId), version: Number(row.dataset.version), status: status };
 
+        sendBulkUpdate([item])
+        .then(([result]) => {
+            applyRowState(row, result);
+            if (result.success) {
                 showToast('Статус успешно обновлен', 'success');
             } else {
-                throw new Error(data.error || 'Не удалось обновить статус');
+                select.value = select.dataset.current;
+                showToast(resultError(result), result.conflict ? 'warning' : 'danger');
             }
         })
         .catch(error => {
@@ -174,13 +171,79 @@ document.addEventListener('DOMContentLoaded', function() {
             showToast(error.message || 'Ошибка при обновлении статуса', 'danger');
 
             // Возвращаем предыдущее значение в select
-            const select = document.querySelector(`.status-select[data-app-id="${appId}"]`);
-            if (select && badgeElement) {
-                select.value = badgeElement.dataset.previousStatus;
-            }
+            select.value = select.dataset.current;
         });
     }
 
+    /* =========================
+       Выбор строк и статус для выбранных
+       ========================= */
+    const selectAll = document.getElementById('select-all');
+    const bulkApply = document.getElementById('bulk-apply');
+    const selectedCount = document.getElementById('bulk-selected-count');
+
+    function selectedRows() {
+        return Array.from(table.querySelectorAll('.row-select:checked')).map(box => box.closest('tr'));
+    }
+
+    function refreshSelection() {
+        const count = selectedRows().length;
+        const total = table.querySelectorAll('.row-select').length;
+        selectedCount.textContent = count;
+        bulkApply.disabled = count === 0;
+        selectAll.checked = total > 0 && count === total;
+        selectAll.indeterminate = count > 0 && count < total;
+    }
+
+    selectAll.addEventListener('change', function() {
+        table.querySelectorAll('.row-select').forEach(box => box.checked = this.checked);
+        refreshSelection();
+    });
+
+    table.addEventListener('change', function(e) {
+        if (e.target.classList.contains('row-select')) {
+            refreshSelection();
+        }
+    });
+
+    bulkApply.addEventListener('click', function() {
+        const rows = selectedRows();
+        const status = document.getElementById('bulk-status').value;
+        const items = rows.map(row => ({
+            id: Number(row.dataset.appId),
+            version: Number(row.dataset.version),
+            status: status
+        }));
+
+        bulkApply.disabled = true;
+        sendBulkUpdate(items)
+        .then(results => {
+            let updated = 0;
+            let conflicts = 0;
+            results.forEach((result, index) => {
+                const row = rows[index];
+                applyRowState(row, result);
+                if (result.success) {
+                    updated += 1;
+                    row.querySelector('.row-select').checked = false;
+                } else if (result.conflict) {
+                    conflicts += 1;
+                }
+            });
+
+            let message = `Обновлено заявок: ${updated} из ${results.length}`;
+            if (conflicts) {
+                message += `. Изменены другим пользователем: ${conflicts}, проверьте их и повторите`;
+            }
+            showToast(message, updated === results.length ? 'success' : 'warning');
+        })
+        .catch(error => {
+            console.error('Bulk update error:', error);
+            showToast(error.message || 'Ошибка при обновлении статуса', 'danger');
+        })
+        .finally(refreshSelection);
+    });
+
     /* =========================
        Удаление заявки
        ========================= */
@@ -0,0 +1,155 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const form = document.getElementById('calculator');
+    if (!form) return;
+
+    const quoteUrl = form.dataset.quoteUrl;
+    const maxLines = parseInt(form.dataset.maxLines, 10);
+    const linesBody = document.getElementById('calculator-lines');
+    const template = document.getElementById('calculator-line-template');
+    const totalCell = document.getElementById('calculator-total');
+    const errorBox = document.getElementById('calculator-error');
+    const moneyFormat = new Intl.NumberFormat('ru-RU', { minimumFractionDigits: 2, maximumFractionDigits: 2 });
+    const unitLabels = {
+        container: '',
+        day: ' (за сутки)',
+        km: ' (за км)',
+        cargo_value: ' (страхование)'
+    };
+
+    /* =========================
+       Строки расчета
+       ========================= */
+    function addLine(values) {
+        if (linesBody.children.length >= maxLines) {
+            showError(`Не больше ${maxLines} строк в одном расчете`);
+            return null;
+        }
+        const row = template.content.firstElementChild.cloneNode(true);
+        if (values) {
+            row.querySelector('[name=service]').value = values.service;
+            row.querySelector('[name=container_type]').value = values.container_type;
+            row.querySelector('[name=loaded]').checked = values.loaded;
+            row.querySelector('[name=quantity]').value = values.quantity;
+            row.querySelector('[name=units]').value = values.units;
+        }
+        linesBody.appendChild(row);
+        return row;
+    }
+
+    function readLine(row) {
+        return {
+            service: row.querySelector('[name=service]').value,
+            container_type: row.querySelector('[name=container_type]').value,
+            loaded: row.querySelector('[name=loaded]').checked,
+            quantity: row.querySelector('[name=quantity]').value || 1,
+            units: row.querySelector('[name=units]').value || 0
+        };
+    }
+
+    function resetResults() {
+        linesBody.querySelectorAll('.calculator-line').forEach(row => {
+            row.classList.remove('has-error');
+            row.querySelector('.line-price').textContent = '—';
+            row.querySelector('.line-total').textContent = '—';
+        });
+        totalCell.textContent = '—';
+    }
+
+    function showError(message) {
+        errorBox.textContent = message;
+        errorBox.classList.toggle('d-none', !message);
+    }
+
+    function parsePasted(text) {
+        const lines = [];
+        text.split(/\r?\n/).forEach(line => {
+            const parts = line.split(/[;\t]/).map(part => part.trim());
+            if (!parts[0]) return;
+            lines.push({
+                service: parts[0],
+                container_type: parts[1] || '',
+                loaded: !['0', 'нет', 'false', 'порожний'].includes((parts[2] || '1').toLowerCase()),
+                quantity: parts[3] || 1,
+                units: (parts[4] || '0').replace(',', '.')
+            });
+        });
+        return lines;
+    }
+
+    /* =========================
+       Расчет
+       ========================= */
+    function calculate() {
+        const rows = Array.from(linesBody.querySelectorAll('.calculator-line'));
+        if (!rows.length) {
+            showError('Добавьте хотя бы одну строку');
+            return;
+        }
+        showError('');
+        const csrfToken = form.querySelector('[name=csrfmiddlewaretoken]').value;
+
+        fetch(quoteUrl, {
+            method: 'POST',
+            body: JSON.stringify(rows.map(readLine)),
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': csrfToken,
+                'Accept': 'application/json'
+            }
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) throw new Error(data.error || 'Ошибка расчета');
+            resetResults();
+            data.lines.forEach(result => {
+                const row = rows[result.index];
+                if (result.error) {
+                    row.classList.add('has-error');
+                    row.querySelector('.line-total').innerHTML = '';
+                    const error = document.createElement('span');
+                    error.className = 'line-error';
+                    error.textContent = result.error;
+                    row.querySelector('.line-total').appendChild(error);
+                    return;
+                }
+                row.querySelector('.line-price').textContent = moneyFormat.format(result.price) + (unitLabels[result.unit] || '');
+                row.querySelector('.line-total').textContent = moneyFormat.format(result.total);
+            });
+            totalCell.textContent = moneyFormat.format(data.total);
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showError(error.message || 'Не удалось выполнить расчет');
+        });
+    }
+
+    /* =========================
+       Обработчики событий
+       ========================= */
+    document.getElementById('add-line').addEventListener('click', () => addLine());
+
+    document.getElementById('paste-lines').addEventListener('click', function() {
+        const textarea = document.getElementById('calculator-paste');
+        parsePasted(textarea.value).forEach(values => {
+            const row = addLine(values);
+            // Неизвестный код в выпадающем списке — сразу видно, что строку надо поправить
+            if (row && row.querySelector('[name=service]').value !== values.service) {
+                row.classList.add('has-error');
+            }
+        });
+        textarea.value = '';
+    });
+
+    linesBody.addEventListener('click', function(e) {
+        if (e.target.closest('.remove-line')) {
+            e.target.closest('tr').remove();
+        }
+    });
+
+    form.addEventListener('submit', function(e) {
+        e.preventDefault();
+        calculate();
+    });
+
+    addLine();
+});
@@ -0,0 +1,38 @@
+# main/static_files.py
+"""
+WhiteNoise в асинхронной цепочке middleware.
+
+WhiteNoiseMiddleware только синхронный: под ASGI Django из-за него выполнял бы
+каждый запрос (и заявки, и страницы) через переход в поток и обратно.
+Поиск статического файла — обращение к словарю в памяти (диск читается
+только при WHITENOISE_AUTOREFRESH, то есть в DEBUG), поэтому в асинхронном
+режиме его можно выполнять прямо в цикле событий.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoiseMiddleware, работающий и в синхронной, и в асинхронной цепочке."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
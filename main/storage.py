@@ -0,0 +1,103 @@
+# main/storage.py
+"""
+Контент-адресное файловое хранилище для медиафайлов.
+
+Файл сохраняется под именем <каталог upload_to>/<sha256 содержимого><расширение>.
+Одинаковые загрузки попадают в один и тот же файл, поэтому каждый blob
+хранится на диске один раз. Учет ссылок и удаление — в main/blobs.py.
+
+Переиспользование существующего blob'а и его удаление выполняются под
+блокировкой blob'а (lock-файл рядом с ним). Переиспользованный blob получает
+свежее время изменения: строка БД, которая на него сошлется, появится только
+после фиксации транзакции загрузки, и до этого удаление должно его пропустить
+(см. blobs.release_blob и MEDIA_BLOB_RELEASE_GRACE).
+"""
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+import time
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+from .file_locks import file_lock
+
+# Имя файла без расширения — шестнадцатеричный SHA-256
+CONTENT_HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+
+# Через сколько секунд lock-файл blob'а считается брошенным упавшим процессом
+BLOB_LOCK_STALE_AFTER = 30
+
+
+def content_name(name: str, digest: str) -> str:
+    """Имя blob'а для загрузки name с SHA-256 содержимого digest (в шестнадцатеричном виде)."""
+    return posixpath.join(posixpath.dirname(name), digest + os.path.splitext(name)[1].lower())
+
+
+def is_content_addressed(name: str) -> bool:
+    """Проверяет, что имя файла сформировано контент-адресным хранилищем."""
+    stem = os.path.splitext(posixpath.basename(name or ''))[0]
+    return bool(CONTENT_HASH_RE.match(stem))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage, который именует файлы по SHA-256 содержимого.
+
+    Хэш считается по ходу потоковой записи загрузки во временный файл,
+    после чего файл атомарно переименовывается. Если такой blob уже есть,
+    временный файл удаляется и возвращается имя существующего.
+    """
+    chunk_size = 64 * 1024
+
+    def lock(self, name: str):
+        """Блокировка blob'а name между потоками и процессами."""
+        return file_lock(self.path(name) + '.lock', BLOB_LOCK_STALE_AFTER)
+
+    def stored_within(self, name: str, seconds: float) -> bool:
+        """Был ли blob записан или переиспользован загрузкой за последние seconds секунд."""
+        try:
+            return time.time() - os.path.getmtime(self.path(name)) < seconds
+        except FileNotFoundError:
+            return False
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяется содержимым в _save, суффиксы не нужны
+        return name
+
+    def _save(self, name, content):
+        full_directory = self.path(posixpath.dirname(name))
+        os.makedirs(full_directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=full_directory, suffix='.upload')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                for chunk in content.chunks(self.chunk_size):
+                    digest.update(chunk)
+                    tmp_file.write(chunk)
+
+            final_name = content_name(name, digest.hexdigest())
+            final_path = self.path(final_name)
+            with self.lock(final_name):
+                if os.path.exists(final_path):
+                    # Такое содержимое уже хранится — переиспользуем blob и
+                    # обновляем время изменения, чтобы release_blob его не удалил
+                    os.utime(final_path)
+                    os.remove(tmp_path)
+                else:
+                    if self.file_permissions_mode is not None:
+                        os.chmod(tmp_path, self.file_permissions_mode)
+                    os.replace(tmp_path, final_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return final_name
+
+
+content_addressed_storage = ContentAddressedStorage()
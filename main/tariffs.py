@@ -0,0 +1,309 @@
+# main/tariffs.py
+"""
+Расчет стоимости услуг по тарифам.
+
+Тарифы (модель Tariff) редактируются в админке или загружаются таблицей
+CSV/XLSX. Для расчета они компилируются в массивы NumPy с осями
+[услуга, тип контейнера, груженый/порожний], и пакет из сотен строк
+считается одной векторной операцией без запросов к БД:
+
+    цена за контейнер = max(базовая цена + ставка × единицы, минимальная цена)
+    сумма строки      = цена за контейнер × количество
+
+Единицы — сутки хранения, километры доставки или стоимость груза для
+страхования (ставка в процентах); для тарифов «за контейнер» они не учитываются.
+
+Скомпилированная таблица и результаты расчета кэшируются по версии тарифов:
+сигналы модели Tariff и импорт таблицы увеличивают версию (main/versioning.py),
+и старые записи LRU-кэшей больше не используются.
+"""
+import logging
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import lazy_imports
+from .models import Application, Tariff
+from .spreadsheets import choice_code, header_columns, is_blank_row
+from .versioning import CacheVersion
+
+logger = logging.getLogger(__name__)
+
+TARIFF_VERSION_KEY = 'main:tariffs:version'
+
+SERVICE_INDEX = {code: i for i, (code, _) in enumerate(Application.SERVICE_CHOICES)}
+CONTAINER_INDEX = {code: i for i, (code, _) in enumerate(Tariff.CONTAINER_TYPES)}
+UNIT_CODES = [code for code, _ in Tariff.UNIT_CHOICES]
+
+# Поля тарифа в загружаемой таблице (заголовок — код поля или его verbose_name)
+IMPORT_FIELDS = ('service', 'container_type', 'loaded', 'base_price', 'unit', 'unit_price', 'min_price')
+
+TRUE_VALUES = {'1', 'true', 'yes', 'да', 'груженый', 'груженые'}
+FALSE_VALUES = {'0', 'false', 'no', 'нет', 'порожний', 'порожние'}
+
+# Ограничения на строку расчета
+MAX_QUANTITY = 10000
+
+_version = CacheVersion(TARIFF_VERSION_KEY, 'TARIFF_VERSION_TTL')
+
+
+def get_version() -> int:
+    """Текущая версия тарифов."""
+    return _version.get()
+
+
+def bump_version() -> None:
+    """Делает недействительными скомпилированные тарифы и результаты расчета."""
+    _version.bump()
+
+
+class QuoteLineError(ValueError):
+    """Строка расчета заполнена неверно."""
+
+
+@dataclass(frozen=True)
+class TariffTable:
+    """Тарифы, скомпилированные в массивы формы (услуги, типы контейнеров, 2)."""
+    version: int
+    defined: Any  # bool: тариф задан
+    base: Any
+    rate: Any     # ставка за единицу; для процентов уже поделена на 100, для «за контейнер» — 0
+    minimum: Any
+    unit: Any     # индекс в UNIT_CODES
+
+    def quote(self, services, containers, loaded, quantities, units):
+        """
+        Векторный расчет пакета строк.
+
+        Returns:
+            tuple: (defined, цена за контейнер, сумма строки, индекс единицы) — массивы по строкам
+        """
+        np = lazy_imports.numpy()
+        index = (services, containers, loaded)
+        price = np.maximum(self.base[index] + self.rate[index] * units, self.minimum[index])
+        return self.defined[index], np.round(price, 2), np.round(price * quantities, 2), self.unit[index]
+
+
+@lru_cache(maxsize=2)
+def compile_tariffs(version: int) -> TariffTable:
+    """Загружает тарифы из БД и собирает массивы (один раз на версию в процессе)."""
+    np = lazy_imports.numpy()
+    shape = (len(SERVICE_INDEX), len(CONTAINER_INDEX), 2)
+    defined = np.zeros(shape, dtype=bool)
+    base = np.zeros(shape)
+    rate = np.zeros(shape)
+    minimum = np.zeros(shape)
+    unit = np.zeros(shape, dtype=np.int8)
+
+    rows = Tariff.objects.values_list(
+        'service', 'container_type', 'loaded', 'base_price', 'unit', 'unit_price', 'min_price'
+    )
+    for service, container_type, is_loaded, base_price, unit_code, unit_price, min_price in rows:
+        if service not in SERVICE_INDEX or container_type not in CONTAINER_INDEX:
+            # Устаревшие коды, которых больше нет в choices
+            continue
+        cell = (SERVICE_INDEX[service], CONTAINER_INDEX[container_type], int(is_loaded))
+        defined[cell] = True
+        base[cell] = base_price
+        minimum[cell] = min_price
+        unit[cell] = UNIT_CODES.index(unit_code)
+        if unit_code == 'cargo_value':
+            rate[cell] = float(unit_price) / 100
+        elif unit_code != 'container':
+            rate[cell] = unit_price
+
+    logger.info(f"Тарифы версии {version} скомпилированы: {int(defined.sum())} ячеек")
+    return TariffTable(version=version, defined=defined, base=base, rate=rate, minimum=minimum, unit=unit)
+
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise QuoteLineError(f'Неверное значение «груженый/порожний»: {value!r}')
+
+
+def parse_quote_line(item) -> Tuple[str, str, bool, int, float]:
+    """
+    Проверяет строку расчета {service, container_type, loaded?, quantity?, units?}.
+
+    Returns:
+        tuple: (service, container_type, loaded, quantity, units) — ключ для кэша расчета
+
+    Raises:
+        QuoteLineError: Строка заполнена неверно
+    """
+    if not isinstance(item, dict):
+        raise QuoteLineError('Строка должна быть объектом')
+    service = item.get('service')
+    if service not in SERVICE_INDEX:
+        raise QuoteLineError(f'Неизвестная услуга: {service!r}')
+    container_type = item.get('container_type')
+    if container_type not in CONTAINER_INDEX:
+        raise QuoteLineError(f'Неизвестный тип контейнера: {container_type!r}')
+    loaded = _parse_bool(item.get('loaded', True))
+    try:
+        quantity = int(item.get('quantity', 1))
+        units = float(item.get('units', 0) or 0)
+    except (TypeError, ValueError):
+        raise QuoteLineError('Количество и единицы должны быть числами')
+    if not 1 <= quantity <= MAX_QUANTITY:
+        raise QuoteLineError(f'Количество должно быть от 1 до {MAX_QUANTITY}')
+    if not 0 <= units < 1e12:
+        raise QuoteLineError('Единицы должны быть неотрицательным числом')
+    return service, container_type, loaded, quantity, units
+
+
+@lru_cache(maxsize=settings.TARIFF_QUOTE_CACHE_SIZE)
+def _quote_cached(version: int, lines: Tuple[tuple, ...]) -> Tuple[Optional[tuple], ...]:
+    """Расчет проверенных строк; None — тариф для строки не задан."""
+    np = lazy_imports.numpy()
+    table = compile_tariffs(version)
+    services = np.fromiter((SERVICE_INDEX[line[0]] for line in lines), dtype=np.intp, count=len(lines))
+    containers = np.fromiter((CONTAINER_INDEX[line[1]] for line in lines), dtype=np.intp, count=len(lines))
+    loaded = np.fromiter((line[2] for line in lines), dtype=np.intp, count=len(lines))
+    quantities = np.fromiter((line[3] for line in lines), dtype=float, count=len(lines))
+    units = np.fromiter((line[4] for line in lines), dtype=float, count=len(lines))
+
+    defined, prices, totals, unit_indexes = table.quote(services, containers, loaded, quantities, units)
+    return tuple(
+        (float(price), float(total), UNIT_CODES[unit_index]) if is_defined else None
+        for is_defined, price, total, unit_index in zip(
+            defined.tolist(), prices.tolist(), totals.tolist(), unit_indexes.tolist()
+        )
+    )
+
+
+def quote_lines(items: List[dict]) -> dict:
+    """
+    Рассчитывает стоимость пакета строк.
+
+    Args:
+        items: Строки {service, container_type, loaded, quantity, units}
+
+    Returns:
+        dict: {'tariff_version', 'total', 'lines': [{'index', 'price', 'total', 'unit'} или {'index', 'error'}]}
+    """
+    results: List[Optional[dict]] = [None] * len(items)
+    valid_indexes = []
+    valid_lines = []
+    for index, item in enumerate(items):
+        try:
+            valid_lines.append(parse_quote_line(item))
+            valid_indexes.append(index)
+        except QuoteLineError as e:
+            results[index] = {'index': index, 'error': str(e)}
+
+    version = get_version()
+    quoted = _quote_cached(version, tuple(valid_lines)) if valid_lines else ()
+    total = 0.0
+    for index, quote in zip(valid_indexes, quoted):
+        if quote is None:
+            results[index] = {'index': index, 'error': 'Тариф для этой услуги и контейнера не задан'}
+            continue
+        price, line_total, unit = quote
+        total += line_total
+        results[index] = {'index': index, 'price': price, 'total': line_total, 'unit': unit}
+
+    return {'tariff_version': version, 'total': round(total, 2), 'lines': results}
+
+
+# -------------------------------------------------------------------
+# Загрузка тарифов из таблицы
+# -------------------------------------------------------------------
+def _decimal(value, field_label: str) -> Decimal:
+    text = str(value).strip().replace(' ', '').replace(',', '.') or '0'
+    try:
+        return Decimal(text)
+    except InvalidOperation:
+        raise ValidationError(f'{field_label}: «{value}» не число')
+
+
+def tariff_from_row(values: Dict[str, Any]) -> Tariff:
+    """Тариф из строки таблицы (значения — коды или подписи choices)."""
+    try:
+        loaded = _parse_bool(values.get('loaded', True))
+    except QuoteLineError as e:
+        raise ValidationError(str(e))
+    tariff = Tariff(
+        service=choice_code(values.get('service', ''), Application.SERVICE_CHOICES, 'Услуга'),
+        container_type=choice_code(values.get('container_type', ''), Tariff.CONTAINER_TYPES, 'Тип контейнера'),
+        loaded=loaded,
+        base_price=_decimal(values.get('base_price', 0), 'Базовая цена'),
+        unit=choice_code(values.get('unit') or 'container', Tariff.UNIT_CHOICES, 'Единица'),
+        unit_price=_decimal(values.get('unit_price', 0), 'Ставка'),
+        min_price=_decimal(values.get('min_price', 0), 'Минимальная цена'),
+    )
+    tariff.full_clean(exclude=['updated_at'], validate_unique=False, validate_constraints=False)
+    return tariff
+
+
+def import_tariffs(rows: Iterable[list], replace: bool = False) -> Tuple[int, List[str]]:
+    """
+    Загружает тарифы из строк таблицы (первая строка — заголовки).
+
+    Существующие тарифы с той же услугой, типом контейнера и признаком
+    «груженый» обновляются. При ошибках в строках ничего не сохраняется.
+
+    Args:
+        rows: Строки таблицы (read_spreadsheet)
+        replace: Удалить тарифы, которых нет в таблице
+
+    Returns:
+        tuple: (количество загруженных тарифов, список ошибок)
+    """
+    rows = iter(rows)
+    header = next(rows, None)
+    if not header:
+        return 0, ['Таблица пуста']
+    columns = header_columns(header, Tariff, IMPORT_FIELDS)
+    missing = {'service', 'container_type', 'base_price'} - set(columns)
+    if missing:
+        return 0, [f'Нет обязательных столбцов: {", ".join(sorted(missing))}']
+
+    tariffs = {}
+    errors = []
+    for line_number, row in enumerate(rows, start=2):
+        if is_blank_row(row):
+            continue
+        values = {column: value for column, value in zip(columns, row) if column}
+        try:
+            tariff = tariff_from_row(values)
+        except ValidationError as e:
+            errors.append(f'Строка {line_number}: {"; ".join(e.messages)}')
+            continue
+        tariffs[(tariff.service, tariff.container_type, tariff.loaded)] = tariff
+
+    if errors:
+        return 0, errors
+
+    with transaction.atomic():
+        if replace:
+            Tariff.objects.all().delete()
+        Tariff.objects.bulk_create(
+            tariffs.values(),
+            update_conflicts=True,
+            unique_fields=['service', 'container_type', 'loaded'],
+            update_fields=['base_price', 'unit', 'unit_price', 'min_price', 'updated_at'],
+        )
+        # bulk_create не отправляет post_save
+        transaction.on_commit(bump_version)
+    return len(tariffs), []
+
+
+@receiver(post_save, sender=Tariff)
+@receiver(post_delete, sender=Tariff)
+def tariff_changed(sender, **kwargs):
+    """Тариф изменен в админке — новая версия после фиксации транзакции."""
+    transaction.on_commit(bump_version)
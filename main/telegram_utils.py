@@ -1,60 +1,184 @@
-import requests
 from django.conf import settings
+import asyncio
 import logging
-from typing import Optional
+import threading
+from typing import TYPE_CHECKING, Optional
+
+from . import lazy_imports
+from .metrics import outbound
+
+if TYPE_CHECKING:
+    import httpx
+    import requests
 
 # Настройка логгера для текущего модуля
 logger = logging.getLogger(__name__)
 
+# Общая HTTP-сессия с пулом соединений (создается лениво, одна на процесс)
+_session: Optional['requests.Session'] = None
+_session_lock = threading.Lock()
+
+# Общий асинхронный клиент и цикл событий, к которому привязаны его соединения
+_async_client: Optional['httpx.AsyncClient'] = None
+_async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+class TelegramError(Exception):
+    """Ошибка доставки сообщения в Telegram."""
+
+
+class TelegramRetryAfter(TelegramError):
+    """Telegram ограничил частоту отправки (HTTP 429) и просит повторить позже."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Flood control exceeded, retry after {retry_after} s")
+        self.retry_after = retry_after
+
+
+def get_session() -> 'requests.Session':
+    """
+    Возвращает общую для процесса HTTP-сессию с keep-alive соединениями к api.telegram.org.
+
+    Returns:
+        requests.Session: Сессия с пулом соединений
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                requests = lazy_imports.requests()
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+def get_async_client() -> 'httpx.AsyncClient':
+    """
+    Возвращает общий для цикла событий асинхронный HTTP-клиент с keep-alive
+    соединениями к api.telegram.org (под uvicorn — один на воркер).
+
+    Соединения httpx привязаны к циклу событий, поэтому в новом цикле
+    (например, async_to_sync под WSGI) создается новый клиент.
+
+    Returns:
+        httpx.AsyncClient: Клиент с пулом соединений
+    """
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop:
+        httpx = lazy_imports.httpx()
+        _async_client = httpx.AsyncClient(limits=httpx.Limits(
+            max_connections=settings.TELEGRAM_ASYNC_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.TELEGRAM_ASYNC_MAX_CONNECTIONS,
+        ))
+        _async_client_loop = loop
+    return _async_client
+
+
+def _message_request(message: str, chat_id: Optional[str]) -> tuple:
+    """URL и тело запроса sendMessage."""
+    if not settings.TELEGRAM_BOT_TOKEN or not (chat_id or settings.TELEGRAM_CHAT_ID):
+        raise TelegramError("Telegram bot token or chat ID not configured")
+
+    url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
+    payload = {
+        'chat_id': chat_id or settings.TELEGRAM_CHAT_ID,
+        'text': message,
+        'parse_mode': 'HTML'
+    }
+    return url, payload
+
+
+def _retry_after(response) -> float:
+    """Через сколько секунд Telegram разрешает повторить запрос (ответ 429)."""
+    try:
+        return float(response.json().get('parameters', {}).get('retry_after', 1))
+    except ValueError:
+        return 1.0
+
+
+def post_message(message: str, chat_id: Optional[str] = None,
+                 session: Optional['requests.Session'] = None, timeout: float = 10) -> None:
+    """
+    Отправляет сообщение в Telegram и пробрасывает ошибки вызывающему коду.
+
+    Args:
+        message (str): Текст сообщения (HTML разметка)
+        chat_id (str, optional): ID чата, по умолчанию TELEGRAM_CHAT_ID
+        session (requests.Session, optional): HTTP-сессия, по умолчанию общая сессия процесса
+        timeout (float): Таймаут запроса в секундах
+
+    Raises:
+        TelegramError: Если бот не настроен
+        TelegramRetryAfter: Если Telegram вернул 429 Too Many Requests
+        requests.exceptions.RequestException: При сетевых и HTTP ошибках
+    """
+    url, payload = _message_request(message, chat_id)
+
+    with outbound('telegram'):
+        response = (session or get_session()).post(url, data=payload, timeout=timeout)
+
+    if response.status_code == 429:
+        # Telegram сообщает, через сколько секунд можно повторить запрос
+        raise TelegramRetryAfter(_retry_after(response))
+
+    # Проверка статуса ответа (вызывает исключение при ошибке HTTP)
+    response.raise_for_status()
+
+
+async def apost_message(message: str, chat_id: Optional[str] = None,
+                        client: Optional['httpx.AsyncClient'] = None, timeout: float = 10) -> None:
+    """
+    Асинхронный вариант post_message на общем httpx.AsyncClient.
+
+    Raises:
+        TelegramError: Если бот не настроен
+        TelegramRetryAfter: Если Telegram вернул 429 Too Many Requests
+        httpx.HTTPError: При сетевых и HTTP ошибках
+    """
+    url, payload = _message_request(message, chat_id)
+
+    with outbound('telegram'):
+        response = await (client or get_async_client()).post(url, data=payload, timeout=timeout)
+
+    if response.status_code == 429:
+        raise TelegramRetryAfter(_retry_after(response))
+
+    response.raise_for_status()
+
+
 def send_telegram_message(message: str) -> bool:
     """
     Отправляет сообщение в Telegram чат с использованием бота.
-    
+
     Args:
         message (str): Текст сообщения для отправки в Telegram
-        
+
     Returns:
         bool: True если сообщение успешно отправлено, False в случае ошибки
-        
+
     Raises:
         Логирует ошибки, но не вызывает исключения для внешнего использования
     """
-    # Проверка наличия необходимых настроек
-    if not settings.TELEGRAM_BOT_TOKEN or not settings.TELEGRAM_CHAT_ID:
-        logger.warning("Telegram bot token or chat ID not configured")
-        return False
-    
-    # Формирование URL для API Telegram
-    url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
-    
-    # Подготовка данных для отправки
-    payload = {
-        'chat_id': settings.TELEGRAM_CHAT_ID,  # ID чата для отправки сообщения
-        'text': message,                       # Текст сообщения
-        'parse_mode': 'HTML'                   # Режим парсинга (HTML разметка)
-    }
-    
+    requests = lazy_imports.requests()
     try:
-        # Отправка POST запроса к API Telegram
-        response = requests.post(url, data=payload, timeout=10)
-        
-        # Проверка статуса ответа (вызывает исключение при ошибке HTTP)
-        response.raise_for_status()
-        
+        post_message(message)
         logger.info("Telegram message sent successfully")
         return True
-        
+
     except requests.exceptions.Timeout:
         # Обработка ошибки таймаута
         logger.error("Timeout error while sending Telegram message")
         return False
-        
+
     except requests.exceptions.HTTPError as e:
         # Обработка HTTP ошибок (404, 500, etc.)
         logger.error(f"HTTP error while sending Telegram message: {e}")
         return False
-        
-    except requests.exceptions.RequestException as e:
+
+    except (TelegramError, requests.exceptions.RequestException) as e:
         # Общая обработка ошибок запроса
         logger.error(f"Error sending Telegram message: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,68 @@
+# main/templates_warmup.py
+"""
+Предварительная компиляция шаблонов при старте процесса.
+
+С кэширующим загрузчиком (production) каждый шаблон разбирается один раз
+на процесс — но при первом запросе к странице. precompile_templates()
+делает это заранее для всех шаблонов всех движков, чтобы первые запросы
+после деплоя или перезапуска воркера не платили за разбор.
+Вызывается из transagency/wsgi.py и asgi.py при TEMPLATES_PRECOMPILE.
+"""
+import logging
+import os
+import time
+from typing import Dict, List
+
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+
+def template_dirs(engine) -> List[str]:
+    """Каталоги, в которых движок ищет шаблоны."""
+    if not isinstance(engine, DjangoTemplates):
+        return [str(d) for d in engine.template_dirs]
+    dirs = []
+    loaders = list(engine.engine.template_loaders)
+    while loaders:
+        loader = loaders.pop(0)
+        # cached.Loader оборачивает реальные загрузчики
+        loaders.extend(getattr(loader, 'loaders', []))
+        if hasattr(loader, 'get_dirs'):
+            dirs.extend(str(d) for d in loader.get_dirs())
+    return list(dict.fromkeys(dirs))
+
+
+def template_names(engine) -> List[str]:
+    """Имена всех шаблонов движка; при совпадении имен берется первый каталог."""
+    names = []
+    for directory in template_dirs(engine):
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                names.append(os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/'))
+    return list(dict.fromkeys(names))
+
+
+def precompile_templates() -> Dict[str, int]:
+    """
+    Загружает (и тем самым компилирует и кэширует) все шаблоны всех движков.
+
+    Returns:
+        dict: Количество скомпилированных шаблонов по имени движка
+    """
+    compiled = {}
+    started = time.perf_counter()
+    for engine in engines.all():
+        count = 0
+        for name in template_names(engine):
+            try:
+                engine.get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError, UnicodeDecodeError) as e:
+                # Не шаблон (например, картинка) или шаблон для другого окружения
+                logger.debug(f"Шаблон {name} ({engine.name}) не скомпилирован: {e}")
+                continue
+            count += 1
+        compiled[engine.name] = count
+    logger.info(f"Шаблоны скомпилированы за {time.perf_counter() - started:.2f} с: {compiled}")
+    return compiled
@@ -0,0 +1,31 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+@register.simple_tag
+def responsive_image(news_image, sizes='100vw', **attrs):
+    """
+    Выводит <picture> с вариантами AVIF/WebP (srcset) и оригиналом в качестве запасного <img>.
+
+    Пример: {% responsive_image news.images.first sizes="(min-width: 992px) 33vw, 100vw" class="card-img-top" alt=news.title %}
+    """
+    if not news_image or not news_image.image:
+        return ''
+
+    by_format = {}
+    # variants.all() использует prefetch_related('images__variants'), если он есть
+    for variant in news_image.variants.all():
+        by_format.setdefault(variant.mime_type, []).append(variant)
+
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (mime_type, ', '.join(f'{v.file.url} {v.width}w' for v in variants), sizes)
+            for mime_type, variants in sorted(by_format.items())
+        )
+    )
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    img_attrs = format_html_join(' ', '{}="{}"', sorted(attrs.items()))
+    return format_html('<picture>{}<img src="{}" {}></picture>', sources, news_image.image.url, img_attrs)
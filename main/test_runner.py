@@ -0,0 +1,33 @@
+# main/test_runner.py
+"""
+Запуск тестов (manage.py test): файлы, которые приложение пишет в var/
+(метрики воркеров, кэш PDF реквизитов, отчеты импорта), попадают во
+временный каталог, удаляемый после прогона.
+"""
+import os
+import shutil
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from .metrics import registry
+
+
+class TempDirTestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._tmp_dir = tempfile.mkdtemp(prefix='transagency-tests-')
+        self._tmp_settings = override_settings(
+            METRICS_DIR=os.path.join(self._tmp_dir, 'metrics'),
+            REQUISITES_PDF_CACHE_DIR=os.path.join(self._tmp_dir, 'requisites_pdf'),
+            APPLICATION_IMPORT_ERRORS_DIR=os.path.join(self._tmp_dir, 'import_errors'),
+        )
+        self._tmp_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        # Метрики тестовых запросов не должны сброситься в настоящий METRICS_DIR при выходе
+        registry.discard()
+        self._tmp_settings.disable()
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,79 @@
+import csv
+import io
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from openpyxl import Workbook
+
+from ..models import Application, TelegramNotification
+from .utils import LOCMEM_CACHES, override_for_test, temporary_directory
+
+ROWS = [
+    ['Имя', 'Email', 'Телефон', 'Услуга', 'Статус'],
+    ['Иван', 'ivan@example.com', '+7 900 000-00-01', 'Страхование грузов', ''],
+    ['Петр', 'не email', '+7 900 000-00-02', 'cargo_insurance', 'new'],
+    ['', '', '', '', ''],
+    ['Анна', 'anna@example.com', '+7 900 000-00-03', 'container_storage', 'В процессе'],
+]
+
+
+@override_settings(CACHES=LOCMEM_CACHES, TELEGRAM_CHAT_ID='42', APPLICATION_IMPORT_BATCH_SIZE=1)
+class ApplicationImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='password')
+
+    def setUp(self):
+        override_for_test(self, APPLICATION_IMPORT_ERRORS_DIR=temporary_directory(self))
+        self.client.force_login(self.admin)
+
+    def upload(self, name: str, content: bytes, **data):
+        response = self.client.post(reverse('application_import'),
+                                    {'file': SimpleUploadedFile(name, content), **data}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.context['result']
+
+    def csv_bytes(self) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, delimiter=';').writerows(ROWS)
+        return buffer.getvalue().encode('utf-8-sig')
+
+    def test_csv_import_saves_valid_rows_and_reports_rejected(self):
+        result = self.upload('leads.csv', self.csv_bytes())
+        self.assertEqual((result.total, result.created, result.failed), (3, 2, 1))
+        self.assertEqual(
+            sorted(Application.objects.values_list('name', 'service', 'status')),
+            [('Анна', 'container_storage', 'in_progress'), ('Иван', 'cargo_insurance', 'new')],
+        )
+        # Одно сводное уведомление на весь файл
+        self.assertEqual(TelegramNotification.objects.count(), 1)
+
+        response = self.client.get(reverse('application_import_errors', args=[result.errors_token]), secure=True)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig')),
+                               delimiter=';'))
+        response.close()
+        self.assertEqual(rows[0][:2], ['Строка', 'Ошибка'])
+        self.assertEqual(rows[1][0], '3')
+        self.assertIn('Email', rows[1][1])
+        self.assertEqual(len(rows), 2)
+
+    def test_xlsx_dry_run_saves_nothing(self):
+        workbook = Workbook()
+        for row in ROWS:
+            workbook.active.append(row)
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+
+        result = self.upload('leads.xlsx', buffer.getvalue(), dry_run='on')
+        self.assertEqual((result.created, result.failed), (2, 1))
+        self.assertFalse(Application.objects.exists())
+        self.assertFalse(TelegramNotification.objects.exists())
+
+    def test_missing_columns_are_reported(self):
+        response = self.client.post(reverse('application_import'), {
+            'file': SimpleUploadedFile('leads.csv', 'Имя;Email\nИван;ivan@example.com\n'.encode()),
+        }, secure=True)
+        self.assertContains(response, 'Нет обязательных столбцов')
+        self.assertFalse(Application.objects.exists())
@@ -0,0 +1,62 @@
+import asyncio
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Application, TelegramNotification
+from ..notifications import NotificationDispatcher, _instant_tasks, chat_wait, hold_chat
+from .utils import LOCMEM_CACHES
+
+APPLICATION = {'name': 'Клиент', 'email': 'client@example.com', 'phone': '+7 900 000-00-00',
+               'service': 'container_delivery'}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, TELEGRAM_CHAT_ID='42', TELEGRAM_CHAT_MIN_INTERVAL=1.0,
+                   TELEGRAM_INSTANT_DELIVERY=True, TELEGRAM_OUTBOX_LEASE=60)
+class AsyncSubmissionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        post = mock.patch('main.notifications.apost_message', new_callable=mock.AsyncMock)
+        self.apost_message = post.start()
+        self.addCleanup(post.stop)
+
+    async def submit(self):
+        response = await self.async_client.post(reverse('application'), APPLICATION, secure=True)
+        self.assertEqual(response.status_code, 302)
+        # Дожидаемся фоновой отправки, запущенной представлением
+        await asyncio.gather(*_instant_tasks)
+        return await TelegramNotification.objects.select_related('application').alatest('pk')
+
+    async def test_application_is_saved_and_sent_instantly(self):
+        notification = await self.submit()
+        self.assertEqual(notification.application.name, 'Клиент')
+        self.assertEqual(notification.status, TelegramNotification.STATUS_SENT)
+        self.apost_message.assert_awaited_once()
+        self.assertEqual(self.apost_message.await_args.kwargs['chat_id'], '42')
+
+    async def test_busy_chat_is_left_to_dispatcher(self):
+        await self.submit()
+        # Вторая заявка в пределах интервала чата остается в outbox
+        notification = await self.submit()
+        self.assertEqual(notification.status, TelegramNotification.STATUS_PENDING)
+        self.assertEqual(self.apost_message.await_count, 1)
+        self.assertEqual(await Application.objects.acount(), 2)
+
+    async def test_instant_delivery_waits_for_dispatcher_pause(self):
+        # Воркер получил 429 и поставил паузу чату — мгновенная доставка ее соблюдает
+        hold_chat('42', 30)
+        notification = await self.submit()
+        self.assertEqual(notification.status, TelegramNotification.STATUS_PENDING)
+        self.apost_message.assert_not_awaited()
+
+    def test_dispatcher_waits_after_instant_delivery(self):
+        hold_chat('42', 1.0)
+        sleeps = []
+        dispatcher = NotificationDispatcher(session=mock.sentinel.session, sleep=sleeps.append)
+        with mock.patch('main.notifications.post_message'):
+            dispatcher._send('42', 'Заявка')
+        self.assertEqual(len(sleeps), 1)
+        self.assertGreater(sleeps[0], 0.5)
+        self.assertGreater(chat_wait('42'), 0.5)
@@ -0,0 +1,42 @@
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from ..blobs import release_blob
+from ..models import Document
+from ..storage import content_addressed_storage
+from .utils import override_for_test, temporary_directory
+
+
+@override_settings(MEDIA_BLOB_RELEASE_GRACE=0)
+class ReleaseBlobTests(TestCase):
+    def setUp(self):
+        override_for_test(self, MEDIA_ROOT=temporary_directory(self))
+
+    def create_document(self, content: bytes) -> Document:
+        return Document.objects.create(title='Документ', file=ContentFile(content, name='document.txt'))
+
+    def test_blob_is_deleted_after_last_reference(self):
+        first = self.create_document(b'same content')
+        second = self.create_document(b'same content')
+        self.assertEqual(first.file.name, second.file.name)
+        name = first.file.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(content_addressed_storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(content_addressed_storage.exists(name))
+
+    def test_referenced_blob_is_kept(self):
+        document = self.create_document(b'content')
+        self.assertFalse(release_blob(content_addressed_storage, document.file.name))
+        self.assertTrue(content_addressed_storage.exists(document.file.name))
+
+    @override_settings(MEDIA_BLOB_RELEASE_GRACE=600)
+    def test_recently_stored_blob_is_kept_without_references(self):
+        # Загрузка могла переиспользовать blob, но еще не зафиксировать строку
+        name = content_addressed_storage.save('documents/upload.txt', ContentFile(b'in flight'))
+        self.assertFalse(release_blob(content_addressed_storage, name))
+        self.assertTrue(content_addressed_storage.exists(name))
@@ -0,0 +1,102 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import DatabaseError
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Application
+
+
+class ApplicationVersionTests(TestCase):
+    def test_concurrent_saves_both_bump_version(self):
+        application = Application.objects.create(name='Клиент', email='client@example.com', phone='1',
+                                                 service='cargo_insurance')
+        first = Application.objects.get(pk=application.pk)
+        second = Application.objects.get(pk=application.pk)
+        first.status = 'in_progress'
+        first.save(update_fields=['status'])
+        second.phone = '2'
+        second.save(update_fields=['phone'])
+        self.assertEqual((first.version, second.version), (2, 3))
+        application.refresh_from_db()
+        self.assertEqual((application.version, application.status, application.phone), (3, 'in_progress', '2'))
+
+
+class BulkUpdateApplicationsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='password')
+        cls.fresh, cls.stale, cls.other = [
+            Application.objects.create(name=f'Клиент {i}', email='client@example.com', phone='1',
+                                       service='cargo_insurance')
+            for i in range(3)
+        ]
+        # Заявку изменили после того, как менеджер открыл список
+        cls.stale.status = 'pending'
+        cls.stale.save(update_fields=['status'])
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def post(self, items):
+        return self.client.post(reverse('bulk_update_applications'), json.dumps(items),
+                                content_type='application/json', secure=True,
+                                HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+    def mixed_batch(self):
+        return [
+            {'id': self.fresh.pk, 'version': 1, 'status': 'completed', 'name': 'Новое имя'},
+            {'id': self.stale.pk, 'version': 1, 'status': 'cancelled'},
+            {'id': self.other.pk, 'version': 1, 'status': 'unknown'},
+            {'id': 999999, 'version': 1, 'status': 'completed'},
+            {'id': self.fresh.pk, 'version': 1, 'status': 'new'},
+        ]
+
+    def test_mixed_batch_reports_each_row(self):
+        response = self.post(self.mixed_batch())
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['updated'], 1)
+        fresh, stale, invalid, missing, duplicate = data['results']
+
+        self.assertTrue(fresh['success'])
+        self.assertEqual((fresh['version'], fresh['status'], fresh['fields']['name']), (2, 'completed', 'Новое имя'))
+        self.assertFalse(stale['success'])
+        self.assertTrue(stale['conflict'])
+        # Строка таблицы обновляется текущим состоянием заявки
+        self.assertEqual((stale['version'], stale['status']), (2, 'pending'))
+        self.assertIn('status', invalid['errors'])
+        self.assertEqual(missing['error'], 'Заявка не найдена')
+        self.assertEqual(duplicate['error'], 'Заявка повторяется в пакете')
+
+        self.assertEqual(
+            dict(Application.objects.values_list('pk', 'status')),
+            {self.fresh.pk: 'completed', self.stale.pk: 'pending', self.other.pk: 'new'},
+        )
+        self.assertEqual(Application.objects.get(pk=self.fresh.pk).version, 2)
+        self.assertEqual(Application.objects.get(pk=self.other.pk).version, 1)
+
+    def test_batch_is_written_in_one_transaction(self):
+        items = [{'id': self.fresh.pk, 'version': 1, 'status': 'completed'},
+                 {'id': self.other.pk, 'version': 1, 'status': 'completed'}]
+        bulk_update = Application.objects.bulk_update
+
+        def fail_after_write(*args, **kwargs):
+            bulk_update(*args, **kwargs)
+            raise DatabaseError('connection lost')
+
+        self.client.raise_request_exception = False
+        with mock.patch.object(Application.objects, 'bulk_update', side_effect=fail_after_write), \
+                self.assertLogs('django.request', 'ERROR'):
+            self.assertEqual(self.post(items).status_code, 500)
+        # Записанные строки откатываются вместе с пакетом
+        self.assertEqual(set(Application.objects.values_list('status', 'version')), {('new', 1), ('pending', 2)})
+
+        self.assertEqual(self.post(items).json()['updated'], 2)
+
+    def test_rejects_non_list_and_oversized_batches(self):
+        self.assertEqual(self.post({'id': self.fresh.pk}).status_code, 400)
+        with self.settings(APPLICATION_BULK_MAX_ROWS=1):
+            self.assertEqual(self.post(self.mixed_batch()).status_code, 400)
@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import resolve, reverse
+
+from ..db_router import PIN_COOKIE_NAME, REPLICA_DB, ReplicaRouter, ReplicaRoutingMiddleware, RoutingState, _state
+from ..models import News
+
+
+@override_settings(DATABASE_REPLICA_VIEWS=('news_list',))
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def route(self, request, pinned: bool = False) -> RoutingState:
+        request.resolver_match = resolve(request.path_info)
+        state = RoutingState(request=request, pinned=pinned)
+        token = _state.set(state)
+        self.addCleanup(_state.reset, token)
+        return state
+
+    def test_public_view_reads_from_replica(self):
+        self.route(self.factory.get(reverse('news_list')))
+        self.assertEqual(self.router.db_for_read(News), REPLICA_DB)
+
+    def test_other_views_read_from_primary(self):
+        self.route(self.factory.get(reverse('home')))
+        self.assertIsNone(self.router.db_for_read(News))
+
+    def test_reads_after_write_go_to_primary(self):
+        state = self.route(self.factory.get(reverse('news_list')))
+        self.router.db_for_write(News)
+        self.assertTrue(state.wrote)
+        self.assertIsNone(self.router.db_for_read(News))
+
+    def test_pinned_request_reads_from_primary(self):
+        self.route(self.factory.get(reverse('news_list')), pinned=True)
+        self.assertIsNone(self.router.db_for_read(News))
+
+    def test_page_cache_render_reads_from_primary(self):
+        request = self.factory.get(reverse('news_list'))
+        request._page_cache_render = True
+        self.route(request)
+        self.assertIsNone(self.router.db_for_read(News))
+
+    def test_middleware_pins_writers_and_non_read_requests(self):
+        self.assertFalse(ReplicaRoutingMiddleware._begin(self.factory.get('/')).pinned)
+        self.assertTrue(ReplicaRoutingMiddleware._begin(self.factory.post('/')).pinned)
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE_NAME] = '1'
+        self.assertTrue(ReplicaRoutingMiddleware._begin(request).pinned)
+
+        response = ReplicaRoutingMiddleware._finish(RoutingState(request=request, pinned=False, wrote=True),
+                                                    mock.Mock(spec=['set_cookie']))
+        response.set_cookie.assert_called_once()
+        self.assertEqual(response.set_cookie.call_args.args[0], PIN_COOKIE_NAME)
@@ -0,0 +1,48 @@
+import csv
+import io
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from openpyxl import load_workbook
+
+from ..models import Application
+from .utils import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES, TELEGRAM_INSTANT_DELIVERY=False)
+class ApplicationExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='password')
+
+    def export(self, export_format: str) -> bytes:
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('export_applications'), {'format': export_format}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_csv_cells_are_not_formulas(self):
+        formula = '=HYPERLINK("http://example.com","Открыть")'
+        response = self.client.post(reverse('application'), {
+            'name': formula, 'email': 'client@example.com', 'phone': '+7 900 000-00-00',
+            'service': 'container_storage',
+        }, secure=True)
+        self.assertEqual(response.status_code, 302)
+
+        rows = list(csv.reader(io.StringIO(self.export('csv').decode('utf-8-sig')), delimiter=';'))
+        self.assertEqual(rows[0][2], 'Имя')
+        self.assertEqual(rows[1][2], "'" + formula)
+        self.assertEqual(rows[1][4], "'+7 900 000-00-00")
+        self.assertEqual(rows[1][5], 'Хранение контейнеров на терминале')
+
+    def test_xlsx_contains_all_rows(self):
+        Application.objects.bulk_create(
+            Application(name=f'Клиент {i}', email='client@example.com', phone='1', service='cargo_insurance')
+            for i in range(3)
+        )
+        sheet = load_workbook(io.BytesIO(self.export('xlsx')), read_only=True).active
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(sorted(row[2] for row in rows[1:]), ['Клиент 0', 'Клиент 1', 'Клиент 2'])
+        self.assertEqual(rows[1][6], 'Новый')
@@ -0,0 +1,63 @@
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import NewsImage
+from .utils import LOCMEM_CACHES, create_news, override_for_test, png_bytes, temporary_directory
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PAGE_CACHE_ENABLED=False)
+class ConditionalNewsPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_superuser('admin', password='password')
+        cls.news = create_news(cls.author, 'Новость')
+        create_news(cls.author, 'Еще новость')
+
+    def setUp(self):
+        override_for_test(self, MEDIA_ROOT=temporary_directory(self), IMAGE_VARIANTS_BACKGROUND=False)
+
+    def get(self, url: str, **headers):
+        return self.client.get(url, secure=True, **headers)
+
+    def test_detail_answers_304_with_one_query(self):
+        url = reverse('news_detail', args=[self.news.pk])
+        response = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage', response['Cache-Control'])
+        with self.assertNumQueries(1):
+            response = self.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        with self.assertNumQueries(1):
+            response = self.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_detail_etag_changes_with_news_and_images(self):
+        url = reverse('news_detail', args=[self.news.pk])
+        etag = self.get(url)['ETag']
+        NewsImage.objects.create(news=self.news, image=ContentFile(png_bytes(), name='image.png'))
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_etag_changes_on_deletion(self):
+        url = reverse('news_list')
+        etag = self.get(url)['ETag']
+        # Удаляется не самая новая запись: MAX(updated_at) не меняется
+        with self.captureOnCommitCallbacks(execute=True):
+            self.news.delete()
+        self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_signed_in_etag_is_private_and_tied_to_csrf_secret(self):
+        url = reverse('news_detail', args=[self.news.pk])
+        self.client.force_login(self.author)
+        response = self.get(url)
+        self.assertIn('private', response['Cache-Control'])
+        etag = response['ETag']
+        self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Новый CSRF-секрет — старая страница с формой выхода не подтверждается
+        self.client.cookies.pop('csrftoken')
+        self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -0,0 +1,53 @@
+import marshal
+import subprocess
+import sys
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..metrics import ARCHIVE_NAME, collect, registry
+from .utils import LOCMEM_CACHES, override_for_test, temporary_directory
+
+
+def exited_pid() -> int:
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+@override_settings(CACHES=LOCMEM_CACHES, METRICS_ENABLED=True, METRICS_TOKEN='secret', PAGE_CACHE_ENABLED=False)
+class MetricsTests(TestCase):
+    def setUp(self):
+        registry.discard()
+        self.addCleanup(registry.discard)
+        self.directory = Path(temporary_directory(self))
+        override_for_test(self, METRICS_DIR=str(self.directory))
+
+    def scrape(self) -> str:
+        response = self.client.get(reverse('metrics'), secure=True, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def write_process_file(self, name: str, count: int) -> None:
+        (self.directory / name).write_bytes(marshal.dumps({
+            'requests': {}, 'statuses': {('home', 'GET', '200'): count}, 'outbound': {},
+        }))
+
+    def test_requests_are_counted_by_view(self):
+        self.assertEqual(self.client.get(reverse('metrics'), secure=True).status_code, 401)
+        self.client.get(reverse('news_list'), secure=True)
+        text = self.scrape()
+        self.assertIn('http_requests_total{view="metrics",method="GET",status="401"} 1', text)
+        self.assertIn('http_request_duration_seconds_count{view="news_list",method="GET"} 1', text)
+        self.assertRegex(text, r'db_queries_total\{view="news_list",method="GET"\} [1-9]')
+
+    def test_files_of_exited_processes_are_folded_into_archive(self):
+        self.write_process_file(f'{exited_pid()}-aaaaaaaa.metrics', 2)
+        self.write_process_file(f'{exited_pid()}-bbbbbbbb.metrics', 3)
+        self.assertEqual(collect()['statuses'][('home', 'GET', '200')], 5)
+        self.assertEqual([path.name for path in self.directory.glob('*.metrics')], [ARCHIVE_NAME])
+
+        self.write_process_file(f'{exited_pid()}-cccccccc.metrics', 1)
+        self.assertEqual(collect()['statuses'][('home', 'GET', '200')], 6)
+        self.assertEqual([path.name for path in self.directory.glob('*.metrics')], [ARCHIVE_NAME])
@@ -0,0 +1,72 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import TelegramNotification
+from ..notifications import NotificationDispatcher
+from ..telegram_utils import TelegramError
+from .utils import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES, TELEGRAM_RETRY_BASE_DELAY=5, TELEGRAM_RETRY_MAX_DELAY=3600,
+                   TELEGRAM_MAX_ATTEMPTS=3, TELEGRAM_OUTBOX_LEASE=60, TELEGRAM_DIGEST_THRESHOLD=3)
+class OutboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.dispatcher = NotificationDispatcher(session=mock.sentinel.session, batch_size=10,
+                                                 sleep=lambda seconds: None)
+
+    def notify(self, **fields) -> TelegramNotification:
+        return TelegramNotification.objects.create(chat_id='1', message='Заявка', **fields)
+
+    def test_claim_batch_takes_due_pending_rows_and_leases_them(self):
+        now = timezone.now()
+        due = [self.notify(), self.notify()]
+        self.notify(next_attempt_at=now + timedelta(hours=1))
+        self.notify(status=TelegramNotification.STATUS_SENT)
+
+        batch = self.dispatcher.claim_batch()
+        self.assertEqual([n.pk for n in batch], [n.pk for n in due])
+        for notification in TelegramNotification.objects.filter(pk__in=[n.pk for n in due]):
+            self.assertGreater(notification.next_attempt_at, now + timedelta(seconds=50))
+        # Арендованные строки другой воркер не возьмет
+        self.assertEqual(self.dispatcher.claim_batch(), [])
+
+    def test_backoff_doubles_up_to_limit(self):
+        self.assertEqual(NotificationDispatcher.backoff(1), timedelta(seconds=5))
+        self.assertEqual(NotificationDispatcher.backoff(2), timedelta(seconds=10))
+        self.assertEqual(NotificationDispatcher.backoff(4), timedelta(seconds=40))
+        self.assertEqual(NotificationDispatcher.backoff(20), timedelta(seconds=3600))
+
+    def test_failed_delivery_is_retried_with_backoff_then_failed(self):
+        notification = self.notify()
+        with mock.patch('main.notifications.post_message', side_effect=TelegramError('boom')), \
+                self.assertLogs('main.notifications', 'ERROR'):
+            started = timezone.now()
+            self.assertEqual(self.dispatcher.dispatch_once(), 1)
+            notification.refresh_from_db()
+            self.assertEqual(notification.status, TelegramNotification.STATUS_PENDING)
+            self.assertEqual(notification.attempts, 1)
+            self.assertEqual(notification.last_error, 'boom')
+            self.assertGreaterEqual(notification.next_attempt_at, started + timedelta(seconds=5))
+
+            TelegramNotification.objects.filter(pk=notification.pk).update(attempts=2, next_attempt_at=started)
+            self.dispatcher.dispatch_once()
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, TelegramNotification.STATUS_FAILED)
+        self.assertEqual(notification.attempts, 3)
+
+    def test_burst_is_sent_as_one_digest(self):
+        notifications = [self.notify() for _ in range(3)]
+        with mock.patch('main.notifications.post_message') as post_message:
+            self.dispatcher.dispatch_once()
+        post_message.assert_called_once()
+        self.assertIn('СВОДКА: 3', post_message.call_args.args[0])
+        self.assertEqual(
+            TelegramNotification.objects.filter(pk__in=[n.pk for n in notifications],
+                                                status=TelegramNotification.STATUS_SENT).count(),
+            3,
+        )
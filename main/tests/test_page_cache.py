@@ -0,0 +1,65 @@
+import json
+import re
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .utils import LOCMEM_CACHES, create_news, override_for_test, temporary_directory
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PAGE_CACHE_ENABLED=True)
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author')
+        create_news(cls.author, 'Новость')
+
+    def setUp(self):
+        cache.clear()
+        override_for_test(self, MEDIA_ROOT=temporary_directory(self))
+
+    def visitor(self) -> Client:
+        return Client(enforce_csrf_checks=True)
+
+    def test_second_visitor_gets_cached_page_with_own_csrf_token(self):
+        first, second = self.visitor(), self.visitor()
+        self.assertEqual(first.get(reverse('calculate'), secure=True)['X-Page-Cache'], 'miss')
+        response = second.get(reverse('calculate'), secure=True)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+
+        html = response.content.decode()
+        self.assertNotIn('page-cache-csrf-token-placeholder', html)
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', html).group(1)
+        # Токен из закэшированной страницы принимается вместе с cookie этого посетителя
+        response = second.post(reverse('calculate_quote'), json.dumps([]), content_type='application/json',
+                               secure=True, HTTP_X_CSRFTOKEN=token, HTTP_REFERER='https://testserver/')
+        self.assertNotEqual(response.status_code, 403)
+        response = first.post(reverse('calculate_quote'), json.dumps([]), content_type='application/json',
+                              secure=True, HTTP_X_CSRFTOKEN=token, HTTP_REFERER='https://testserver/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_key_uses_only_parameters_read_by_view(self):
+        url = reverse('news_list')
+        self.assertEqual(self.client.get(url, secure=True)['X-Page-Cache'], 'miss')
+        self.assertEqual(self.client.get(url, {'cursor': 'abc'}, secure=True)['X-Page-Cache'], 'miss')
+        self.assertEqual(self.client.get(url, {'cursor': 'abc'}, secure=True)['X-Page-Cache'], 'hit')
+        # Посторонние параметры — страница рендерится без кэша и новых записей
+        response = self.client.get(url, {'cursor': 'abc', 'utm_source': 'mail'}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertFalse(self.client.get(reverse('home'), {'x': '1'}, secure=True).has_header('X-Page-Cache'))
+
+    def test_signed_in_users_bypass_cache(self):
+        self.client.get(reverse('home'), secure=True)
+        self.client.force_login(self.author)
+        self.assertFalse(self.client.get(reverse('home'), secure=True).has_header('X-Page-Cache'))
+
+    def test_content_change_invalidates_pages(self):
+        self.client.get(reverse('news_list'), secure=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            create_news(self.author, 'Свежая новость')
+        response = self.client.get(reverse('news_list'), secure=True)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Свежая новость')
@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import News
+from ..pagination import KeysetPaginator, decode_cursor
+from .utils import create_news
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('author')
+        start = timezone.now() - timedelta(days=30)
+        # Две пары новостей с одинаковой датой: порядок внутри пары задает pk
+        dates = [start, start, start + timedelta(days=1), start + timedelta(days=2),
+                 start + timedelta(days=2), start + timedelta(days=3), start + timedelta(days=4)]
+        for i, created_at in enumerate(dates):
+            create_news(author, f'Новость {i}', created_at)
+        cls.expected = list(News.objects.order_by('-created_at', '-pk').values_list('pk', flat=True))
+
+    def pages(self, per_page: int = 3):
+        paginator = KeysetPaginator(News.objects.all(), per_page)
+        page = paginator.get_page(None)
+        pages = [page]
+        while page.has_next():
+            page = paginator.get_page(page.next_cursor)
+            pages.append(page)
+        return paginator, pages
+
+    def test_next_cursors_walk_all_rows_once_in_order(self):
+        _, pages = self.pages()
+        self.assertEqual([news.pk for page in pages for news in page], self.expected)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertFalse(pages[0].has_previous())
+        self.assertFalse(pages[-1].has_next())
+
+    def test_previous_cursor_returns_previous_page(self):
+        paginator, pages = self.pages()
+        for current, previous in zip(pages[1:], pages):
+            page = paginator.get_page(current.previous_cursor)
+            self.assertEqual([news.pk for news in page], [news.pk for news in previous])
+            self.assertEqual(page.has_previous(), previous.has_previous())
+            self.assertTrue(page.has_next())
+
+    def test_invalid_cursor_returns_first_page(self):
+        paginator, pages = self.pages()
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+        page = paginator.get_page('not-a-cursor')
+        self.assertEqual([news.pk for news in page], [news.pk for news in pages[0]])
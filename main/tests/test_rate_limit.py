@@ -0,0 +1,32 @@
+from django.test import SimpleTestCase, override_settings
+
+from ..rate_limit import Rate, parse_rate, take_token
+from .utils import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RateLimitTests(SimpleTestCase):
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('5/m'), Rate(5, 60))
+        self.assertEqual(parse_rate('100/h'), Rate(100, 3600))
+        self.assertEqual(parse_rate(' 10 / 15m '), Rate(10, 900))
+
+    def test_parse_rate_rejects_invalid_values(self):
+        for value in ('0/m', '5', '5/x', 'm/5', ''):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                parse_rate(value)
+
+    def test_take_token_empties_and_refills_bucket(self):
+        rate = Rate(2, 60)
+        self.assertEqual(take_token('test:bucket', rate, now=1000), 0)
+        self.assertEqual(take_token('test:bucket', rate, now=1000), 0)
+        # Корзина пуста: токен появится через period / capacity секунд
+        self.assertAlmostEqual(take_token('test:bucket', rate, now=1000), 30)
+        self.assertAlmostEqual(take_token('test:bucket', rate, now=1010), 20)
+        self.assertEqual(take_token('test:bucket', rate, now=1030), 0)
+
+    def test_take_token_buckets_are_independent(self):
+        rate = Rate(1, 60)
+        self.assertEqual(take_token('test:a', rate, now=1000), 0)
+        self.assertGreater(take_token('test:a', rate, now=1000), 0)
+        self.assertEqual(take_token('test:b', rate, now=1000), 0)
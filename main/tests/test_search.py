@@ -0,0 +1,41 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import News
+from ..search import search_news
+from .utils import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NewsSearchTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user('author')
+
+    def create(self, title: str, content: str) -> News:
+        with self.captureOnCommitCallbacks(execute=True):
+            return News.objects.create(title=title, short_description=title, content=content, author=self.author)
+
+    def test_ranked_results_with_highlighted_snippet(self):
+        match = self.create('Контейнерный терминал', '<p>Прием <b>контейнеров</b> круглосуточно</p>')
+        self.create('График работы', '<p>Склад работает без выходных</p>')
+
+        response = self.client.get(reverse('news_search'), {'q': 'контейнер'}, secure=True,
+                                   HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        results = response.json()['results']
+        self.assertEqual([result['id'] for result in results], [match.pk])
+        self.assertIn('<mark>', results[0]['snippet'])
+        # Разметка текста в индекс не попадает
+        self.assertEqual(search_news('b'), [])
+
+    def test_index_follows_edits_and_deletions(self):
+        news = self.create('Тарифы', 'Старый текст')
+        news.content = 'Новые цены на хранение'
+        with self.captureOnCommitCallbacks(execute=True):
+            news.save()
+        self.assertEqual([result.news.pk for result in search_news('хранение')], [news.pk])
+        self.assertEqual(search_news('старый'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            news.delete()
+        self.assertEqual(search_news('хранение'), [])
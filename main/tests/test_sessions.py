@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.contrib.sessions.backends.db import SessionStore as DatabaseSessionStore
+from django.contrib.sessions.models import Session
+from django.test import TestCase
+from django.utils import timezone
+
+from ..sessions import SessionStore
+
+
+class LegacySessionTests(TestCase):
+    def create_legacy_session(self) -> str:
+        legacy = DatabaseSessionStore()
+        legacy['answer'] = 42
+        legacy.save()
+        return legacy.session_key
+
+    def test_legacy_session_moves_to_signed_cookie(self):
+        key = self.create_legacy_session()
+        session = SessionStore(session_key=key)
+        self.assertEqual(session['answer'], 42)
+        self.assertTrue(session.modified)
+        # Старый ключ больше не действует
+        self.assertFalse(Session.objects.filter(session_key=key).exists())
+        self.assertNotIn('answer', SessionStore(session_key=key))
+
+    def test_expired_legacy_session_is_empty(self):
+        key = self.create_legacy_session()
+        Session.objects.filter(session_key=key).update(expire_date=timezone.now() - timedelta(days=1))
+        session = SessionStore(session_key=key)
+        self.assertNotIn('answer', session)
+        self.assertTrue(session.modified)
+
+    def test_signed_cookie_session_round_trip(self):
+        session = SessionStore()
+        session['answer'] = 42
+        session.save()
+        self.assertEqual(SessionStore(session_key=session.session_key)['answer'], 42)
@@ -0,0 +1,74 @@
+import json
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Tariff
+from ..tariffs import _quote_cached, compile_tariffs, import_tariffs
+from .utils import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TariffQuoteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Версия тарифов начинается заново — расчеты прошлых тестов не должны найтись в LRU-кэшах
+        _quote_cached.cache_clear()
+        compile_tariffs.cache_clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.storage = Tariff.objects.create(service='container_storage', container_type='20dc', loaded=True,
+                                                 base_price=1000, unit='day', unit_price=50, min_price=1500)
+            Tariff.objects.create(service='cargo_insurance', container_type='40hc', loaded=False,
+                                  unit='cargo_value', unit_price=Decimal('0.5'))
+
+    def quote(self, lines):
+        response = self.client.post(reverse('calculate_quote'), json.dumps(lines), content_type='application/json',
+                                    secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_batch_quote(self):
+        data = self.quote([
+            {'service': 'container_storage', 'container_type': '20dc', 'quantity': 2, 'units': 5},
+            {'service': 'container_storage', 'container_type': '20dc', 'loaded': 'да', 'units': 20},
+            {'service': 'cargo_insurance', 'container_type': '40hc', 'loaded': False, 'units': 100000},
+            {'service': 'container_storage', 'container_type': '40dc'},
+            {'service': 'unknown', 'container_type': '20dc'},
+        ])
+        lines = data['lines']
+        # Минимальная цена, ставка за сутки и процент от стоимости груза
+        self.assertEqual((lines[0]['price'], lines[0]['total'], lines[0]['unit']), (1500, 3000, 'day'))
+        self.assertEqual(lines[1]['total'], 2000)
+        self.assertEqual(lines[2]['total'], 500)
+        self.assertEqual(lines[3]['error'], 'Тариф для этой услуги и контейнера не задан')
+        self.assertIn('Неизвестная услуга', lines[4]['error'])
+        self.assertEqual(data['total'], 5500)
+
+    def test_changed_tariff_is_used_immediately(self):
+        line = {'service': 'container_storage', 'container_type': '20dc', 'units': 20}
+        version = self.quote([line])['tariff_version']
+        self.storage.unit_price = 100
+        with self.captureOnCommitCallbacks(execute=True):
+            self.storage.save()
+        data = self.quote([line])
+        self.assertNotEqual(data['tariff_version'], version)
+        self.assertEqual(data['total'], 3000)
+
+    def test_import_updates_tariffs_or_rejects_whole_file(self):
+        header = ['service', 'container_type', 'loaded', 'base_price', 'unit', 'unit_price', 'min_price']
+        rows = [header,
+                ['Хранение контейнеров на терминале', "20' DC", 'груженый', '1 200,50', 'За сутки', '60', '0'],
+                ['container_delivery', '40hc', 'нет', '3000', 'km', '80', '5000']]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(import_tariffs(rows), (2, []))
+        self.storage.refresh_from_db()
+        self.assertEqual((self.storage.base_price, self.storage.unit_price), (Decimal('1200.50'), Decimal('60')))
+        self.assertEqual(self.quote([{'service': 'container_delivery', 'container_type': '40hc',
+                                      'loaded': False, 'units': 10}])['total'], 5000)
+
+        count, errors = import_tariffs([header, ['container_storage', '20dc', '1', 'дорого']])
+        self.assertEqual(count, 0)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(Tariff.objects.count(), 3)
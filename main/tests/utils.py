@@ -0,0 +1,39 @@
+import io
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from PIL import Image
+
+from ..models import News
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def create_news(author: User, title: str, created_at=None) -> News:
+    news = News.objects.create(title=title, short_description=title, content=title, author=author)
+    if created_at is not None:
+        News.objects.filter(pk=news.pk).update(created_at=created_at)
+        news.refresh_from_db()
+    return news
+
+
+def png_bytes() -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), 'white').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def temporary_directory(test_case) -> str:
+    """Временный каталог, удаляемый после теста."""
+    path = tempfile.mkdtemp()
+    test_case.addCleanup(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+def override_for_test(test_case, **settings) -> None:
+    """override_settings на время одного теста (из setUp)."""
+    overridden = override_settings(**settings)
+    overridden.enable()
+    test_case.addCleanup(overridden.disable)
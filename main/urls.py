@@ -10,6 +10,7 @@ urlpatterns = [
     
     # Калькулятор стоимости услуг
     path('calculate/', views.calculate_cost, name='calculate'),
+    path('calculate/quote/', views.calculate_quote, name='calculate_quote'),
     
     # Реквизиты компании
     path('requisites/', views.requisites, name='requisites'),
@@ -18,6 +19,10 @@ urlpatterns = [
     # Работа с заявками
     path('application/', views.create_application, name='application'),
     path('applications/', views.application_list, name='application_list'),
+    path('applications/import/', views.application_import, name='application_import'),
+    path('applications/import/errors/<str:token>/', views.application_import_errors, name='application_import_errors'),
+    path('applications/export/', views.export_applications, name='export_applications'),
+    path('applications/bulk-update/', views.bulk_update_applications, name='bulk_update_applications'),
     path('applications/<int:pk>/update/', views.update_application, name='update_application'),
     path('applications/<int:pk>/update-status/', views.update_application_status, name='update_application_status'),
     path('applications/<int:pk>/delete/', views.delete_application, name='delete_application'),
@@ -27,6 +32,7 @@ urlpatterns = [
     # Работа с новостями
     path('create-news/', views.CreateNewsView.as_view(), name='create_news'),
     path('news/', views.news_list, name='news_list'),
+    path('news/search/', views.news_search, name='news_search'),
     path('news/delete/<int:pk>/', views.delete_news, name='delete_news'),
     path('news/edit/<int:pk>/', views.edit_news, name='edit_news'),
     path('news/<int:pk>/', views.news_detail, name='news_detail'),
@@ -39,6 +45,9 @@ urlpatterns = [
     # Профиль пользователя
     path('profile/', views.profile_view, name='profile'),
     path('profile/edit/', views.edit_profile, name='edit_profile'),
+
+    # Метрики для Prometheus
+    path('metrics', views.metrics, name='metrics'),
     
     # Дополнительные маршруты могут быть добавлены здесь
 ]
\ No newline at end of file
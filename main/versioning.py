@@ -0,0 +1,53 @@
+# main/versioning.py
+"""
+Номера версий данных в общем кэше.
+
+Версия входит в ключи производных данных (кэш страниц, скомпилированные
+тарифы): изменение данных увеличивает номер, и старые записи просто
+перестают использоваться. Чтобы не обращаться к кэшу на каждый вызов,
+номер запоминается в памяти процесса на короткое время (настройка ttl_setting).
+"""
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class CacheVersion:
+    """Счетчик версии под ключом key с локальной копией на getattr(settings, ttl_setting) секунд."""
+
+    def __init__(self, key: str, ttl_setting: str):
+        self.key = key
+        self.ttl_setting = ttl_setting
+        self._lock = threading.Lock()
+        self._value: Optional[int] = None
+        self._expires_at = 0.0
+
+    def get(self) -> int:
+        """Текущая версия."""
+        now = time.monotonic()
+        value = self._value
+        if value is not None and now < self._expires_at:
+            return value
+
+        value = cache.get(self.key)
+        if value is None:
+            cache.add(self.key, 1, None)
+            value = cache.get(self.key, 1)
+
+        with self._lock:
+            self._value = value
+            self._expires_at = now + getattr(settings, self.ttl_setting)
+        return value
+
+    def bump(self) -> None:
+        """Увеличивает версию; в текущем процессе новая версия видна сразу."""
+        try:
+            cache.incr(self.key)
+        except ValueError:
+            # Ключа еще нет (или он вытеснен) — начинаем с версии, которой точно не было
+            cache.set(self.key, int(time.time()), None)
+        with self._lock:
+            self._value = None
@@ -1,23 +1,41 @@
 # main/views.py
 from django.shortcuts import render, redirect, get_object_or_404
-from django.urls import reverse_lazy
-from .models import News, Application, NewsImage, CompanyRequisites
-from .forms import ApplicationForm, NewsForm, RegistrationForm, ProfileEditForm
+from django.urls import reverse, reverse_lazy
+from .models import News, Application, NewsImage, Tariff, TelegramNotification, UserProfile
+from .forms import ApplicationForm, ApplicationFilterForm, ApplicationImportForm, NewsForm, RegistrationForm, ProfileEditForm
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic import CreateView
-from django.core.paginator import Paginator
+from .pagination import KeysetPaginator
+from .search import search_news
 from django.http import HttpResponse, JsonResponse
-from django.template.loader import render_to_string
-from weasyprint import HTML
 from django.contrib import messages
 from django.contrib.auth import login, update_session_auth_hash
+import json
 import logging
 from django.http import HttpRequest
 from django.contrib.auth.models import User
-from .telegram_utils import send_telegram_message
+from .notifications import enqueue_application_notification, schedule_instant_delivery
 from django.conf import settings
-from django.utils import timezone
+from django.db import transaction
+from django.views.decorators.http import condition
+from django.utils.cache import patch_cache_control
+from .requisites_pdf import get_requisites_pdf, requisites_fingerprint
+from .requisites_cache import get_company_requisites
+from .page_cache import cache_anonymous_page
+from .http_cache import conditional_page, news_detail_validator, news_list_validator
+from .bulk_updates import apply_application_changes
+from .tariffs import quote_lines
+from .exports import EXPORT_FORMATS, export_response
+from .application_import import errors_file_path, import_applications
+from .spreadsheets import read_spreadsheet
+from django.core.exceptions import ValidationError
+from django.http import FileResponse, Http404
+from .metrics import collect, render_prometheus
+import hmac
+from typing import Optional
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -30,56 +48,17 @@ def is_superuser(user: User) -> bool:
     return user.is_superuser
 
 def base_context(request: HttpRequest) -> dict:
-    """Контекстный процессор для всех шаблонов."""
-    requisites = CompanyRequisites.objects.first()
-    return {'requisites': requisites}
-
-def send_new_application_notification(application: Application) -> bool:
-    """
-    Формирует и отправляет уведомление о новой заявке в Telegram.
-    
-    Args:
-        application: Объект заявки Application
-        
-    Returns:
-        bool: Результат отправки сообщения
-    """
-    try:
-        # Получаем название услуги
-        service_display = dict(Application.SERVICE_CHOICES).get(application.service, application.service)
-        
-        # Определяем тип пользователя
-        user_type = "Зарегистрированный пользователь" if application.user else "Анонимный пользователь"
-        username = f"@{application.user.username}" if application.user else "Не указан"
-        
-        # Формируем сообщение
-        message = f"""
-🚀 <b>НОВАЯ ЗАЯВКА</b>
-
-👤 <b>Имя:</b> {application.name}
-📧 <b>Email:</b> {application.email}
-📞 <b>Телефон:</b> {application.phone}
-
-🛠 <b>Услуга:</b> {service_display}
-📅 <b>Дата:</b> {timezone.localtime(application.created_at).strftime('%d.%m.%Y %H:%M')}
-
-👥 <b>Тип:</b> {user_type}
-🔗 <b>Логин:</b> {username}
-🆔 <b>ID заявки:</b> #{application.id}
-        """
-        
-        # Отправляем сообщение
-        return send_telegram_message(message)
-    except Exception as e:
-        logger.error(f"Ошибка формирования уведомления в Telegram: {str(e)}")
-        return False
+    """Контекстный процессор для всех шаблонов (реквизиты берутся из кэша)."""
+    return {'requisites': get_company_requisites()}
 
 # -------------------------------------------------------------------
 # Публичные представления
 # -------------------------------------------------------------------
+@cache_anonymous_page('home')
 def home(request: HttpRequest) -> HttpResponse:
     """Главная страница с последними новостями."""
-    latest_news = News.objects.all().order_by('-created_at').prefetch_related('images')[:3]
+    latest_news = (News.objects.only('id', 'title', 'teaser', 'created_at', 'cover')
+                   .select_related('cover').prefetch_related('cover__variants').order_by('-created_at')[:3])
     return render(request, 'main/home.html', {**{'latest_news': latest_news}, **base_context(request)})
 
 def contacts(request: HttpRequest) -> HttpResponse:
@@ -90,45 +69,81 @@ def documents(request: HttpRequest) -> HttpResponse:
     """Страница документов."""
     return render(request, 'main/documents.html', base_context(request))
 
-def create_application(request: HttpRequest) -> HttpResponse:
+@sync_to_async
+def save_application(application: Application) -> Optional[TelegramNotification]:
+    """
+    Сохраняет заявку и уведомление в очереди Telegram атомарно (отправкой занимается
+    воркер send_notifications). Асинхронный ORM транзакций не поддерживает,
+    поэтому запись выполняется одним синхронным вызовом в отдельном потоке.
+    """
+    with transaction.atomic():
+        application.save()
+        return enqueue_application_notification(application)
+
+@sync_to_async
+def render_application_page(request: HttpRequest, form: ApplicationForm) -> HttpResponse:
+    """Страница формы заявки: контекст, шаблон и контекстные процессоры обращаются к кэшу, сессии и request.user синхронно."""
+    return render(request, 'main/application.html', {**{'form': form}, **base_context(request)})
+
+async def request_user(request: HttpRequest) -> User:
+    """
+    Пользователь запроса для async-представления. Подставляется в request.user,
+    чтобы шаблоны и middleware не загружали его повторно синхронно.
+    """
+    request.user = await request.auser()
+    return request.user
+
+async def submit_application(request: HttpRequest, form: ApplicationForm) -> None:
+    """Сохраняет заявку из валидной формы; под ASGI сразу отправляет уведомление в фоне."""
+    user = await request_user(request)
+    application = form.save(commit=False)
+    if user.is_authenticated:
+        application.user = user
+    notification = await save_application(application)
+    if notification and settings.TELEGRAM_INSTANT_DELIVERY and isinstance(request, ASGIRequest):
+        schedule_instant_delivery(notification)
+
+async def create_application(request: HttpRequest) -> HttpResponse:
     """
     Создание новой заявки с привязкой к пользователю и отправкой в Telegram.
+    Асинхронное представление: под ASGI (uvicorn) не занимает поток на время запросов к БД.
     """
     if request.method == 'POST':
         form = ApplicationForm(request.POST)
         if form.is_valid():
-            application = form.save(commit=False)
-            if request.user.is_authenticated:
-                application.user = request.user
-            application.save()
-            
-            # Отправка уведомления в Telegram
-            send_new_application_notification(application)
-            
+            await submit_application(request, form)
             messages.success(request, 'Ваша заявка успешно отправлена!')
             return redirect('home')
     else:
         # Автоматическое заполнение данных для авторизованных пользователей
         initial_data = {}
-        if request.user.is_authenticated:
+        user = await request_user(request)
+        if user.is_authenticated:
             initial_data = {
-                'name': request.user.username,
-                'email': request.user.email,
+                'name': user.username,
+                'email': user.email,
             }
-            # Добавляем телефон из профиля, если он есть
-            if hasattr(request.user, 'profile') and request.user.profile.phone:
-                initial_data['phone'] = request.user.profile.phone
-        
+            # Добавляем телефон из профиля, если он есть (профиль остается в кэше user.profile для шаблона)
+            profile = await UserProfile.objects.filter(user=user).afirst()
+            if profile:
+                user.profile = profile
+                if profile.phone:
+                    initial_data['phone'] = profile.phone
+
         form = ApplicationForm(initial=initial_data)
-    
-    return render(request, 'main/application.html', {**{'form': form}, **base_context(request)})
 
+    return await render_application_page(request, form)
+
+@conditional_page(news_list_validator)
+@cache_anonymous_page('news_list', query_params=('cursor',))
 def news_list(request: HttpRequest) -> HttpResponse:
     """Список всех новостей с пагинацией."""
-    news = News.objects.all().order_by('-created_at').prefetch_related('images')
-    paginator = Paginator(news, 5)           # 5 новостей на страницу
-    page_obj = paginator.get_page(request.GET.get('page'))
-    return render(request, 'main/news_list.html', {**{'page_obj': page_obj}, **base_context(request)})
+    # Карточкам нужен только анонс: полный текст (content*) не загружается
+    news = News.objects.only('id', 'title', 'excerpt', 'created_at', 'cover').select_related('cover').prefetch_related('cover__variants')
+    paginator = KeysetPaginator(news, 5)     # 5 новостей на страницу
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    return render(request, 'main/news_list.html', {**{'page_obj': page_obj}, **base_context(request)},
+                  using=settings.HOT_PAGES_TEMPLATE_ENGINE)
 
 @login_required
 @user_passes_test(is_superuser)
@@ -178,54 +193,117 @@ def edit_news(request: HttpRequest, pk: int) -> HttpResponse:
         form = NewsForm(instance=news)
     return render(request, 'main/edit_news.html', {**{'form': form, 'news': news}, **base_context(request)})
 
+@conditional_page(news_detail_validator)
+@cache_anonymous_page('news_detail')
 def news_detail(request: HttpRequest, pk: int) -> HttpResponse:
     """Детальная страница новости."""
     try:
-        news = get_object_or_404(News.objects.prefetch_related('images'), pk=pk)
-        return render(request, 'main/news_detail.html', {**{'news': news}, **base_context(request)})
+        news = get_object_or_404(News.objects.defer('content', 'content_text').select_related('author', 'cover').prefetch_related('cover__variants', 'images__variants'), pk=pk)
+        return render(request, 'main/news_detail.html', {**{'news': news}, **base_context(request)},
+                      using=settings.HOT_PAGES_TEMPLATE_ENGINE)
     except Exception as e:
-        return render(request, 'main/news_detail.html', {**{'error': f'Ошибка: {e}'}, **base_context(request)})
+        return render(request, 'main/news_detail.html', {**{'error': f'Ошибка: {e}'}, **base_context(request)},
+                      using=settings.HOT_PAGES_TEMPLATE_ENGINE)
 
+def news_search(request: HttpRequest) -> HttpResponse:
+    """
+    Полнотекстовый поиск по новостям (?q=...).
+    При AJAX‑запросе возвращает JSON с результатами и подсвеченными фрагментами.
+    """
+    query = request.GET.get('q', '').strip()[:200]
+    results = search_news(query)
+
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({
+            'query': query,
+            'results': [
+                {
+                    'id': result.news.pk,
+                    'title': result.news.title,
+                    'url': reverse('news_detail', args=[result.news.pk]),
+                    'created_at': result.news.created_at.isoformat(),
+                    'rank': result.rank,
+                    'snippet': str(result.snippet),
+                }
+                for result in results
+            ]
+        })
+
+    return render(request, 'main/news_search.html', {**{'query': query, 'results': results}, **base_context(request)})
+
+@cache_anonymous_page('calculate')
 def calculate_cost(request: HttpRequest) -> HttpResponse:
-    """Страница калькулятора стоимости."""
-    return render(request, 'main/calculate.html', base_context(request))
+    """Страница калькулятора стоимости (расчет — calculate_quote)."""
+    context = {
+        'services': Application.SERVICE_CHOICES,
+        'container_types': Tariff.CONTAINER_TYPES,
+        'max_lines': settings.TARIFF_QUOTE_MAX_LINES,
+    }
+    return render(request, 'main/calculate.html', {**context, **base_context(request)})
+
+def calculate_quote(request: HttpRequest) -> JsonResponse:
+    """
+    Пакетный расчет стоимости по тарифам.
+    Тело запроса — JSON-список строк {service, container_type, loaded, quantity, units}
+    (или объект {"lines": [...]}); ответ — см. tariffs.quote_lines.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Only POST requests allowed'}, status=405)
 
+    try:
+        lines = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+    if isinstance(lines, dict):
+        lines = lines.get('lines')
+    if not isinstance(lines, list) or not lines:
+        return JsonResponse({'success': False, 'error': 'Expected a non-empty JSON list'}, status=400)
+    if len(lines) > settings.TARIFF_QUOTE_MAX_LINES:
+        return JsonResponse({
+            'success': False,
+            'error': f'Too many lines: {len(lines)} > {settings.TARIFF_QUOTE_MAX_LINES}'
+        }, status=400)
+
+    return JsonResponse({'success': True, **quote_lines(lines)})
+
+@cache_anonymous_page('requisites')
 def requisites(request: HttpRequest) -> HttpResponse:
     """Страница реквизитов компании."""
-    # Дублируемый код, но оставляем для совместимости
-    requisites = CompanyRequisites.objects.first()
-    return render(request, 'main/requisites.html', {**{'requisites': requisites}, **base_context(request)})
+    return render(request, 'main/requisites.html', base_context(request))
+
+def requisites_pdf_etag(request: HttpRequest):
+    """ETag PDF реквизитов: хэш полей реквизитов и шаблона (без рендера PDF)."""
+    requisites = get_company_requisites()
+    return requisites_fingerprint(requisites) if requisites else None
 
+@condition(etag_func=requisites_pdf_etag)
 def download_requisites_pdf(request: HttpRequest) -> HttpResponse:
-    """Скачивание реквизитов компании в формате PDF."""
-    requisites = CompanyRequisites.objects.first()
+    """
+    Скачивание реквизитов компании в формате PDF.
+    PDF берется из кэша (см. requisites_pdf), при совпадении If-None-Match отдается 304.
+    """
+    requisites = get_company_requisites()
     if not requisites:
         return HttpResponse("Реквизиты не найдены", status=404)
-    html_string = render_to_string('main/requisites_pdf.html', {'requisites': requisites})
-    result = HTML(string=html_string).write_pdf()
-    response = HttpResponse(content_type='application/pdf')
+    fingerprint, result = get_requisites_pdf(requisites)
+    response = HttpResponse(result, content_type='application/pdf')
     response['Content-Disposition'] = 'attachment; filename="company_requisites.pdf"'
-    response.write(result)
+    response['ETag'] = f'"{fingerprint}"'
+    # Браузер может хранить файл, но обязан перепроверять его по ETag
+    patch_cache_control(response, no_cache=True)
     return response
 
-def application_view(request: HttpRequest) -> HttpResponse:
+async def application_view(request: HttpRequest) -> HttpResponse:
     """Обработка заявки с сообщением об успехе."""
     if request.method == 'POST':
         form = ApplicationForm(request.POST)
         if form.is_valid():
-            application = form.save(commit=False)
-            if request.user.is_authenticated:
-                application.user = request.user
-            application.save()
-            
-            # Отправка уведомления в Telegram
-            send_new_application_notification(application)
-            
+            await submit_application(request, form)
             messages.success(request, 'Ваша заявка успешно отправлена! Мы свяжемся с вами в ближайшее время.')
             return redirect('application')
     else:
         form = ApplicationForm()
-    return render(request, 'main/application.html', {'form': form})
+    return await render_application_page(request, form)
 
 def register(request: HttpRequest) -> HttpResponse:
     """
@@ -295,9 +373,10 @@ def edit_profile(request: HttpRequest) -> HttpResponse:
 @login_required
 def my_applications(request):
     """Список заявок текущего пользователя"""
-    applications = Application.objects.filter(user=request.user).order_by('-created_at')
+    applications = Application.objects.filter(user=request.user)
+    page_obj = KeysetPaginator(applications, 20).get_page(request.GET.get('cursor'))
     return render(request, 'main/my_applications.html', {
-        **{'applications': applications}, 
+        **{'applications': page_obj, 'page_obj': page_obj}, 
         **base_context(request)
     })
 
@@ -326,9 +405,72 @@ def update_my_application(request, pk):
 @login_required
 @user_passes_test(is_superuser)
 def application_list(request: HttpRequest) -> HttpResponse:
-    """Список всех заявок (только для суперпользователя)."""
-    applications = Application.objects.all().order_by('-created_at')
-    return render(request, 'main/application_list.html', {**{'applications': applications}, **base_context(request)})
+    """
+    Список всех заявок (только для суперпользователя).
+    Фильтры и сортировка из GET-параметров применяются в БД; выбираются только выводимые колонки.
+    """
+    filter_form = ApplicationFilterForm(request.GET)
+    applications = filter_form.filter_queryset(
+        Application.objects.only('id', 'name', 'email', 'phone', 'service', 'status', 'created_at', 'version')
+    )
+    paginator = KeysetPaginator(applications, 50, descending=filter_form.descending)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    return render(request, 'main/application_list.html', {
+        **{'applications': page_obj, 'page_obj': page_obj, 'filter_form': filter_form,
+           'status_choices': Application.STATUS_CHOICES},
+        **base_context(request)
+    })
+
+@login_required
+@user_passes_test(is_superuser)
+def export_applications(request: HttpRequest) -> HttpResponse:
+    """
+    Выгрузка заявок в CSV или XLSX (?format=csv|xlsx) с фильтрами и сортировкой списка заявок.
+    Ответ потоковый: строки читаются из БД пачками по мере отправки.
+    """
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponse('Unknown export format', status=400)
+
+    filter_form = ApplicationFilterForm(request.GET)
+    order = '-' if filter_form.descending else ''
+    applications = filter_form.filter_queryset(Application.objects.all()).order_by(f'{order}created_at', f'{order}pk')
+    return export_response(applications, export_format)
+
+@login_required
+@user_passes_test(is_superuser)
+def application_import(request: HttpRequest) -> HttpResponse:
+    """
+    Импорт заявок из таблицы CSV/XLSX.
+    Итог показывается на той же странице; отклоненные строки — в файле ошибок для скачивания.
+    """
+    result = None
+    form = ApplicationImportForm(request.POST or None, request.FILES or None)
+    if request.method == 'POST' and form.is_valid():
+        upload = form.cleaned_data['file']
+        try:
+            result = import_applications(
+                read_spreadsheet(upload, upload.name), source=upload.name, dry_run=form.cleaned_data['dry_run']
+            )
+        except ValidationError as e:
+            form.add_error('file', e)
+        except (UnicodeDecodeError, ValueError) as e:
+            form.add_error('file', f'Не удалось прочитать файл: {e}')
+        else:
+            for error in result.header_errors:
+                form.add_error('file', error)
+
+    context = {'form': form, 'result': result}
+    return render(request, 'main/application_import.html', {**context, **base_context(request)})
+
+@login_required
+@user_passes_test(is_superuser)
+def application_import_errors(request: HttpRequest, token: str) -> FileResponse:
+    """Скачивание файла с отклоненными строками импорта."""
+    path = errors_file_path(token)
+    if path is None:
+        raise Http404('Файл ошибок не найден')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename='import-errors.csv', content_type='text/csv')
 
 @login_required
 @user_passes_test(is_superuser)
@@ -369,6 +511,36 @@ def update_application(request: HttpRequest, pk: int) -> HttpResponse:
     context = {'form': form, 'application': application}
     return render(request, 'main/update_application.html', {**context, **base_context(request)})
 
+@login_required
+@user_passes_test(is_superuser)
+def bulk_update_applications(request: HttpRequest) -> JsonResponse:
+    """
+    Пакетное изменение заявок через AJAX.
+    Тело запроса — JSON-список строк {id, version, status?, name?, email?, phone?, service?}.
+    Возвращает результат по каждой строке (см. bulk_updates.apply_application_changes).
+    """
+    if request.method != 'POST' or request.headers.get('x-requested-with') != 'XMLHttpRequest':
+        return JsonResponse({'success': False, 'error': 'Only AJAX POST requests allowed'}, status=400)
+
+    try:
+        items = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+    if not isinstance(items, list) or not items:
+        return JsonResponse({'success': False, 'error': 'Expected a non-empty JSON list'}, status=400)
+    if len(items) > settings.APPLICATION_BULK_MAX_ROWS:
+        return JsonResponse({
+            'success': False,
+            'error': f'Too many rows: {len(items)} > {settings.APPLICATION_BULK_MAX_ROWS}'
+        }, status=400)
+
+    results = apply_application_changes(items)
+    return JsonResponse({
+        'success': True,
+        'updated': sum(1 for result in results if result['success']),
+        'results': results,
+    })
+
 @login_required
 @user_passes_test(is_superuser)
 def update_application_status(request: HttpRequest, pk: int) -> JsonResponse:
@@ -383,7 +555,7 @@ def update_application_status(request: HttpRequest, pk: int) -> JsonResponse:
             
             if new_status in available_statuses:
                 application.status = new_status
-                application.save()
+                application.save(update_fields=['status'])
                 
                 return JsonResponse({
                     'success': True,
@@ -424,4 +596,19 @@ def delete_application(request: HttpRequest, pk: int) -> HttpResponse:
         messages.success(request, 'Заявка успешно удалена!')
         return redirect('application_list')
     
-    return JsonResponse({'success': False, 'error': 'Only POST requests allowed'}, status=400)
\ No newline at end of file
+    return JsonResponse({'success': False, 'error': 'Only POST requests allowed'}, status=400)
+
+def metrics(request: HttpRequest) -> HttpResponse:
+    """
+    Метрики запросов в формате Prometheus (main/metrics.py).
+    Доступ: заголовок Authorization: Bearer <METRICS_TOKEN> или сессия суперпользователя.
+    """
+    authorization = request.headers.get('Authorization', '')
+    token_ok = bool(settings.METRICS_TOKEN) and hmac.compare_digest(
+        authorization.encode(), f'Bearer {settings.METRICS_TOKEN}'.encode()
+    )
+    if not token_ok and not request.user.is_superuser:
+        response = HttpResponse('Unauthorized', status=401, content_type='text/plain')
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    return HttpResponse(render_prometheus(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -5,6 +5,8 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Профиль развертывания gunicorn + uvicorn — gunicorn.conf.py в корне проекта.
 """
 
 import os
@@ -14,3 +16,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'transagency.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.TEMPLATES_PRECOMPILE:
+    from main.templates_warmup import precompile_templates
+    precompile_templates()
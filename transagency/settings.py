@@ -15,6 +15,7 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 
 
@@ -36,13 +37,107 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'main/static')]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Отдача медиафайлов в production (см. main/media.py):
+# None — Python (FileResponse + os.sendfile), 'x-accel-redirect' — nginx, 'x-sendfile' — Apache/lighttpd
+MEDIA_OFFLOAD = os.getenv('MEDIA_OFFLOAD') or None
+# internal location nginx, который смотрит в MEDIA_ROOT
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+# Время кэширования медиафайлов без хэша в имени, секунд
+MEDIA_CACHE_MAX_AGE = 3600
+# Сколько секунд после записи или переиспользования blob не удаляется, даже без ссылок:
+# строка загрузки, которая на него сошлется, могла еще не зафиксироваться (main/blobs.py)
+MEDIA_BLOB_RELEASE_GRACE = 600
+
+# Ширины WebP/AVIF вариантов изображений новостей (см. main/image_variants.py)
+NEWS_IMAGE_WIDTHS = [320, 640, 960, 1280]
+# Строить варианты в фоновом потоке сразу после загрузки
+IMAGE_VARIANTS_BACKGROUND = os.getenv('IMAGE_VARIANTS_BACKGROUND', 'True') == 'True'
+
+# Кэш отрендеренного PDF с реквизитами (см. main/requisites_pdf.py)
+REQUISITES_PDF_CACHE_DIR = os.getenv('REQUISITES_PDF_CACHE_DIR', os.path.join(BASE_DIR, 'var', 'requisites_pdf'))
+
 # База данных (используем PostgreSQL на хостинге)
+# Как запущено приложение: 'wsgi' или 'asgi' (gunicorn.conf.py выставляет 'asgi'
+# для uvicorn-воркеров; при запуске uvicorn напрямую задается вручную)
+SERVER_MODE = os.getenv('SERVER_MODE') or 'wsgi'
+if SERVER_MODE not in ('wsgi', 'asgi'):
+    raise ImproperlyConfigured(f"SERVER_MODE должен быть 'wsgi' или 'asgi', а не {SERVER_MODE!r}")
+
+# Постоянные соединения с проверкой перед повторным использованием. Под ASGI
+# Django не переиспользует постоянные соединения (ORM работает в потоке запроса),
+# поэтому там по умолчанию соединение на запрос, а соединения держит пул
+# psycopg 3 (DB_POOL=True, нужны пакеты psycopg[binary,pool]) или PgBouncer.
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '0' if SERVER_MODE == 'asgi' else '600'))   # секунд, 0 — соединение на запрос
+DB_POOL = os.getenv('DB_POOL', 'False') == 'True'
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))  # соединений на процесс
+
 DATABASES = {
     'default': dj_database_url.config(
-        default='sqlite:///' + str(BASE_DIR / 'db.sqlite3')
+        default='sqlite:///' + str(BASE_DIR / 'db.sqlite3'),
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=True,
     )
 }
 
+# Реплика для чтения публичных страниц (main/db_router.py)
+DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+DATABASE_REPLICA_VIEWS = ('home', 'news_list', 'news_detail', 'requisites')
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv('DATABASE_REPLICA_PIN_SECONDS', '10'))  # после записи посетитель читает с основной БД
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = {
+        **dj_database_url.parse(DATABASE_REPLICA_URL, conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True),
+        # В тестах реплика — та же база, что и основная
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['main.db_router.ReplicaRouter']
+
+if DB_POOL:
+    for database in DATABASES.values():
+        if database['ENGINE'] == 'django.db.backends.postgresql':
+            # Пул несовместим с постоянными соединениями Django
+            database['CONN_MAX_AGE'] = 0
+            database.setdefault('OPTIONS', {})['pool'] = {'min_size': 1, 'max_size': DB_POOL_MAX_SIZE, 'timeout': 10}
+
+# Кэш: Redis, если задан REDIS_URL, иначе файловый кэш, общий для всех воркеров на хосте
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_DIR', os.path.join(BASE_DIR, 'var', 'cache')),
+        }
+    }
+
+# Сколько секунд реквизиты компании живут в памяти процесса (см. main/requisites_cache.py)
+REQUISITES_LOCAL_TTL = 30
+
+# Кэш страниц для анонимных посетителей (см. main/page_cache.py)
+PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', 'True') == 'True'
+PAGE_CACHE_TIMEOUT = 600
+# Сколько секунд версия кэша страниц живет в памяти процесса
+PAGE_CACHE_VERSION_TTL = 1
+# Блокировка рендера при промахе: время жизни и сколько ждать чужого рендера, секунд
+PAGE_CACHE_LOCK_TIMEOUT = 30
+PAGE_CACHE_LOCK_WAIT = 2
+
+# HTTP-кэширование страниц новостей (см. main/http_cache.py): сколько секунд
+# анонимную страницу хранят браузер и общий кэш (CDN) и сколько CDN может
+# отдавать устаревшую копию, перепроверяя ее в фоне
+HTTP_CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', '60'))
+HTTP_CACHE_S_MAXAGE = int(os.getenv('HTTP_CACHE_S_MAXAGE', '300'))
+HTTP_CACHE_STALE_WHILE_REVALIDATE = int(os.getenv('HTTP_CACHE_STALE_WHILE_REVALIDATE', '60'))
+# Версия развертывания в ETag: после выкладки новых шаблонов страницы не считаются прежними
+HTTP_CACHE_VERSION = os.getenv('HTTP_CACHE_VERSION', os.getenv('RENDER_GIT_COMMIT', ''))
+# Сколько секунд номер версии удалений новостей живет в памяти процесса
+HTTP_CACHE_VERSION_TTL = 1
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 
 
@@ -92,34 +187,96 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым: замеряет весь запрос (main/metrics.py)
+    'main.metrics.RequestMetricsMiddleware',
+    # Быстрый 503 при перегрузке процесса (main/rate_limit.py)
+    'main.rate_limit.ConcurrencyLimitMiddleware',
+    # Чтение публичных страниц с реплики, если она задана (main/db_router.py)
+    'main.db_router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise, совместимый с асинхронной цепочкой под ASGI (main/static_files.py)
+    'main.static_files.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Лимиты частоты POST по IP и учетной записи (RATE_LIMITS)
+    'main.rate_limit.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'transagency.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'main.views.base_context',
                 'django.contrib.messages.context_processors.messages',
+                'main.page_cache.csrf_placeholder',
+            ],
+            # В production шаблоны компилируются один раз на процесс
+            'loaders': TEMPLATE_LOADERS if DEBUG else [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)],
+        },
+    },
+    {
+        # Шаблоны в main/jinja2/ для горячих страниц (см. main/jinja2_env.py)
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'environment': 'main.jinja2_env.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+                'main.views.base_context',
+                'django.contrib.messages.context_processors.messages',
+                'main.page_cache.csrf_placeholder',
             ],
         },
     },
 ]
 
+# Движок для списка и карточки новостей: 'django' или 'jinja2'
+HOT_PAGES_TEMPLATE_ENGINE = os.getenv('HOT_PAGES_TEMPLATE_ENGINE', 'django')
+# Компилировать все шаблоны при старте WSGI-процесса (см. main/templates_warmup.py)
+TEMPLATES_PRECOMPILE = os.getenv('TEMPLATES_PRECOMPILE', str(not DEBUG)) == 'True'
+# Бюджет времени импорта transagency.wsgi, мс (manage.py import_profile)
+STARTUP_IMPORT_BUDGET_MS = int(os.getenv('STARTUP_IMPORT_BUDGET_MS', 1500))
+
+# Максимум строк в одном запросе пакетного изменения заявок
+APPLICATION_BULK_MAX_ROWS = 500
+# Размер пачки строк при потоковой выгрузке заявок (QuerySet.iterator)
+APPLICATION_EXPORT_CHUNK_SIZE = 2000
+# Импорт заявок из таблиц: размер пачки bulk_create и каталог файлов с отклоненными строками
+APPLICATION_IMPORT_BATCH_SIZE = int(os.getenv('APPLICATION_IMPORT_BATCH_SIZE', 1000))
+APPLICATION_IMPORT_ERRORS_DIR = os.getenv('APPLICATION_IMPORT_ERRORS_DIR', os.path.join(BASE_DIR, 'var', 'import_errors'))
+
+# Калькулятор: максимум строк в одном расчете, размер LRU-кэша расчетов
+# и сколько секунд процесс не перечитывает версию тарифов из кэша
+TARIFF_QUOTE_MAX_LINES = 500
+TARIFF_QUOTE_CACHE_SIZE = 256
+TARIFF_VERSION_TTL = 1
+
+# Метрики запросов (main/metrics.py): каталог файлов воркеров, период сброса в него (с)
+# и токен для /metrics (Authorization: Bearer <токен>; без токена — только суперпользователь)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(BASE_DIR, 'var', 'metrics'))
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 1))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# manage.py test: каталоги var/ подменяются временными (main/test_runner.py)
+TEST_RUNNER = 'main.test_runner.TempDirTestRunner'
+
 WSGI_APPLICATION = 'transagency.wsgi.application'
 
 
@@ -182,9 +339,52 @@ if DEBUG:
     mimetypes.add_type("application/javascript", ".js", True)
     mimetypes.add_type("text/css", ".css", True)
 
-# Хранение сообщений в сессиях
-MESSAGE_STORAGE = 'django.contrib.messages.storage.session.SessionStorage'
+# Сессии: cached_db — кэш поверх таблицы django_session (существующие сессии
+# продолжают работать), signed_cookies — подписанная cookie без обращений к БД
+# (старые сессии переносятся из БД при первом запросе, см. main/sessions.py), db — только БД.
+# Истекшие строки django_session удаляет manage.py cleanup_sessions.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'main.sessions',
+}
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'cached_db')
+if SESSION_BACKEND not in SESSION_ENGINES:
+    raise ImproperlyConfigured(f"SESSION_BACKEND должен быть одним из: {', '.join(SESSION_ENGINES)}")
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+
+# Сообщения хранятся в cookie: messages.success() не пишет в БД и не создает сессию анониму
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
 
 # Настройки Telegram бота
 TELEGRAM_BOT_TOKEN = '8419245801:AAE1qGCV-Djm6JmK54o7MZOrkRgtngnsqaU'  # Например: '1234567890:ABCDEFGHIJKLMNOPQRSTUVWXYZ'
-TELEGRAM_CHAT_ID = '977471626'       # Например: '123456789'
\ No newline at end of file
+TELEGRAM_CHAT_ID = '977471626'       # Например: '123456789'
+
+# Очередь уведомлений Telegram (outbox, manage.py send_notifications)
+TELEGRAM_OUTBOX_BATCH_SIZE = int(os.getenv('TELEGRAM_OUTBOX_BATCH_SIZE', '50'))
+TELEGRAM_OUTBOX_LEASE = 60            # секунд, на которые воркер резервирует пачку
+TELEGRAM_DIGEST_THRESHOLD = 3         # с какого количества заявок в пачке слать сводку
+TELEGRAM_CHAT_MIN_INTERVAL = 1.0      # секунд между сообщениями в один чат
+TELEGRAM_MAX_ATTEMPTS = 8
+TELEGRAM_RETRY_BASE_DELAY = 5         # секунд, удваивается с каждой попыткой
+TELEGRAM_RETRY_MAX_DELAY = 3600
+# Под ASGI заявка отправляется в Telegram сразу после сохранения, воркер — запасной путь
+TELEGRAM_INSTANT_DELIVERY = os.getenv('TELEGRAM_INSTANT_DELIVERY', 'True') == 'True'
+TELEGRAM_ASYNC_MAX_CONNECTIONS = 4    # соединений httpx.AsyncClient на процесс
+
+# Лимиты частоты запросов по имени URL (main/rate_limit.py): token bucket в кэше
+# по IP и по учетной записи, '<количество>/<период>' (s, m, h, d)
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'True') == 'True'
+RATE_LIMIT_METHODS = ('POST',)
+RATE_LIMITS = {
+    'application': {'ip': '5/m', 'account': '20/h'},
+    'register': {'ip': '5/h'},
+    'login': {'ip': '20/m', 'account': '5/m'},
+}
+# Сколько прокси перед приложением дописывают X-Forwarded-For (Render — 1; 0 — брать REMOTE_ADDR)
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv('RATE_LIMIT_TRUSTED_PROXIES', '1'))
+
+# Сброс нагрузки: 503 с Retry-After вместо ожидания до таймаута
+CONCURRENCY_LIMIT = int(os.getenv('CONCURRENCY_LIMIT', '100'))                        # запросов на процесс, 0 — без ограничения
+CONCURRENCY_MAX_QUEUE_TIME = float(os.getenv('CONCURRENCY_MAX_QUEUE_TIME', '0'))      # секунд в очереди прокси, 0 — не проверять
+CONCURRENCY_RETRY_AFTER = 5                                                            # секунд
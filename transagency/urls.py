@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from django.views.static import serve
+from main.media import serve_media
 from django.urls import re_path
 
 urlpatterns = [
@@ -13,7 +13,5 @@ urlpatterns = [
 # ДЛЯ PRODUCTION - обслуживаем медиа файлы
 if not settings.DEBUG:
     urlpatterns += [
-        re_path(r'^media/(?P<path>.*)$', serve, {
-            'document_root': settings.MEDIA_ROOT,
-        }),
+        re_path(r'^media/(?P<path>.*)$', serve_media),
     ]
\ No newline at end of file